@@ -1,12 +1,14 @@
-from .openai_client import OpenAIClient
-from .ollama_client import OllamaClient
-from .openrouter_client import OpenRouterClient
+# Provider modules are imported on first use so that only the configured
+# backend (and its SDK) gets loaded.
 
 def get_ai_provider(config):
     provider_type = config.get('ai', {}).get('provider', 'openai')
     if provider_type == 'ollama':
+        from .ollama_client import OllamaClient
         return OllamaClient(config)
     elif provider_type == 'openrouter':
+        from .openrouter_client import OpenRouterClient
         return OpenRouterClient(config)
     else:
+        from .openai_client import OpenAIClient
         return OpenAIClient(config)
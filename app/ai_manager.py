@@ -4,15 +4,32 @@ import queue
 import io
 import time
 import re
-import numpy as np # type: ignore
-import sounddevice as sd # type: ignore
-from scipy.io.wavfile import write, read # type: ignore
-from openai import OpenAI # type: ignore
+# numpy, sounddevice, scipy and openai are imported where they are first
+# needed; they dominate startup time and most sessions never record audio.
 from app.ai import get_ai_provider
 from app.tts import get_tts_provider
+from app.audio_devices import AudioDeviceInventory
+
+# Config keys each chat provider is built from. Used to decide whether a
+# settings change actually requires rebuilding the provider.
+CHAT_PROVIDER_KEYS = {
+    'openai': ['api_key', 'openai_model'],
+    'ollama': ['ollama_endpoint', 'ollama_model'],
+    'openrouter': ['openrouter_api_key', 'openrouter_model'],
+}
+
+# Spoken command acknowledgements kept for reuse (text -> audio)
+ACK_AUDIO_CACHE_SIZE = 32
+
+# Config section holding each TTS provider's settings
+TTS_PROVIDER_SECTIONS = {
+    'typecast': 'typecast',
+    'elevenlabs': 'elevenlabs',
+    'gpt_sovits': 'gpt_sovits',
+}
 
 class AIManager:
-    def __init__(self, config):
+    def __init__(self, config, device_inventory=None):
         self.config = config
         self.recording = False
         self.audio_data = []
@@ -24,6 +41,19 @@ class AIManager:
         self.memory_enabled = config.get('ai', {}).get('memory_enabled', True)
         self.mouth_sensitivity = config.get('render', {}).get('mouth_sensitivity', 5.0)
         self.local_whisper_model = None
+        self.ack_audio = {}
+
+        # Reconfiguration state: the settings each component was last built
+        # from, and whether a change arrived while a turn was running.
+        self.applied_settings = {}
+        self.turn_lock = threading.Lock()
+        self.turns_in_flight = 0
+        self.reconfigure_pending = False
+
+        # Shared, cached device list (enumerated off the GUI thread)
+        self.device_inventory = device_inventory or AudioDeviceInventory()
+        self.device_inventory.streams_active = lambda: self.recording or self.turns_in_flight > 0
+
         self.clear_memory()
         self.setup_client()
         
@@ -82,34 +112,92 @@ class AIManager:
         print("Memory cleared.")
 
     def setup_client(self):
+        # Full rebuild of the STT client and the chat and TTS providers
+        self._setup_stt_client()
+        self.provider = get_ai_provider(self.config)
+        self.tts_provider = get_tts_provider(self.config)
+        self.applied_settings = self._current_settings()
+
+    def _setup_stt_client(self):
         # Setup OpenAI Client for STT (if key exists)
         api_key = self.config.get('ai', {}).get('api_key', '')
         if api_key:
+            from openai import OpenAI # type: ignore
             self.client = OpenAI(api_key=api_key)
         else:
             self.client = None
-            
-        # Setup Chat Provider
-        self.provider = get_ai_provider(self.config)
-        
-        # Setup TTS Provider
-        self.tts_provider = get_tts_provider(self.config)
+
+    def _current_settings(self):
+        # Snapshot of the settings each component depends on, per component
+        ai_config = self.config.get('ai', {})
+        chat_provider = ai_config.get('provider', 'openai')
+        chat_keys = CHAT_PROVIDER_KEYS.get(chat_provider, CHAT_PROVIDER_KEYS['openai'])
+
+        tts_config = self.config.get('tts', {})
+        tts_provider = tts_config.get('provider', 'gpt_sovits')
+        tts_section = TTS_PROVIDER_SECTIONS.get(tts_provider, 'gpt_sovits')
+
+        return {
+            'stt': ai_config.get('api_key', ''),
+            'chat': (chat_provider, tuple(ai_config.get(k) for k in chat_keys)),
+            'tts': (
+                tts_config.get('enabled', False),
+                self.config.get('typecast', {}).get('enabled', False),
+                tts_provider,
+                tuple(sorted(self.config.get(tts_section, {}).items())),
+            ),
+        }
+
+    def apply_settings(self):
+        # Rebuild only the components whose settings changed. If a turn is in
+        # flight the change is deferred until the last running turn finishes.
+        with self.turn_lock:
+            if self.turns_in_flight > 0:
+                self.reconfigure_pending = True
+                return []
+            self.reconfigure_pending = False
+            return self._apply_settings_diff()
+
+    def _apply_settings_diff(self):
+        current = self._current_settings()
+        changed = [name for name, value in current.items() if self.applied_settings.get(name) != value]
+
+        if 'stt' in changed:
+            self._setup_stt_client()
+        if 'chat' in changed:
+            self.provider = get_ai_provider(self.config)
+        if 'tts' in changed:
+            self.tts_provider = get_tts_provider(self.config)
+            self.ack_audio = {}
+
+        self.applied_settings = current
+        if changed:
+            print(f"AI settings applied: rebuilt {', '.join(changed)}")
+        return changed
+
+    def _begin_turn(self):
+        # Turns play audio; stream_lock keeps a device rescan from starting
+        # between its "streams open?" check and re-initialising PortAudio
+        with self.device_inventory.stream_lock, self.turn_lock:
+            self.turns_in_flight += 1
+
+    def _end_turn(self):
+        with self.turn_lock:
+            self.turns_in_flight -= 1
+            idle = self.turns_in_flight == 0
+            if idle and self.reconfigure_pending:
+                self.reconfigure_pending = False
+                self._apply_settings_diff()
+        if idle:
+            self.device_inventory.streams_closed()
 
     def get_input_devices(self):
-        try:
-            devices = sd.query_devices()
-            input_devices = []
-            for i, dev in enumerate(devices):
-                if dev['max_input_channels'] > 0:
-                    input_devices.append((i, dev['name']))
-            return input_devices
-        except Exception as e:
-            print(f"Error listing devices: {e}")
-            return []
+        return self.device_inventory.get_input_devices()
 
     def start_recording(self):
         if self.recording: return
-        self.recording = True
+        with self.device_inventory.stream_lock:
+            self.recording = True
         self.audio_data = []
         
         # Start recording in a separate thread to not block UI
@@ -124,12 +212,14 @@ class AIManager:
             device_index = None
             
         try:
+            import sounddevice as sd # type: ignore
             with sd.InputStream(samplerate=self.samplerate, channels=1, device=device_index, callback=self._audio_callback):
                 while self.recording:
                     sd.sleep(100)
         except Exception as e:
             print(f"Recording error: {e}")
             self.recording = False
+            self.device_inventory.streams_closed()
 
     def _audio_callback(self, indata, frames, time, status):
         if status:
@@ -141,17 +231,27 @@ class AIManager:
         self.recording = False
         self.record_thread.join()
         print("Recording stopped.")
+        self.device_inventory.streams_closed()
         
         if not self.audio_data:
             callback("Error: No audio recorded", "Neutral", 5.0)
             return
 
         # Process in a separate thread to not block UI
+        self._begin_turn()
         process_thread = threading.Thread(target=self._process_audio, args=(callback, lip_sync_callback, user_text_callback))
         process_thread.start()
 
     def _process_audio(self, callback, lip_sync_callback=None, user_text_callback=None):
         try:
+            self._process_audio_turn(callback, lip_sync_callback, user_text_callback)
+        finally:
+            self._end_turn()
+
+    def _process_audio_turn(self, callback, lip_sync_callback=None, user_text_callback=None):
+        try:
+            import numpy as np # type: ignore
+
             # Flatten audio data
             audio_np = np.concatenate(self.audio_data, axis=0).flatten()
             
@@ -162,6 +262,7 @@ class AIManager:
             if self.client:
                 # Use OpenAI Whisper if available
                 # Convert to WAV in memory
+                from scipy.io.wavfile import write # type: ignore
                 audio_int16 = np.int16(np.clip(audio_np, -1, 1) * 32767)
                 buffer = io.BytesIO()
                 buffer.name = "audio.wav"
@@ -193,36 +294,135 @@ class AIManager:
 
             print(f"User said: {user_text}")
             
-            if user_text_callback:
-                user_text_callback(user_text)
+            # The callback may handle the text itself (a Minecraft command) and
+            # return a short acknowledgement to say instead of asking the AI
+            acknowledgement = user_text_callback(user_text) if user_text_callback else None
             
             if not user_text.strip():
                 callback("...", "Neutral", 2.0)
                 return
 
+            if acknowledgement:
+                self._acknowledge(user_text, acknowledgement, callback, lip_sync_callback)
+                return
+
             self.process_text_input(user_text, callback, lip_sync_callback)
         except Exception as e:
             print(f"Audio Processing Error: {e}")
             callback(f"Error: {str(e)}", "Neutral", 5.0)
 
-    def process_text_input(self, user_text, callback, lip_sync_callback=None):
-        threading.Thread(target=self._process_text_worker, args=(user_text, callback, lip_sync_callback)).start()
+    def _acknowledge(self, user_text, reply, callback, lip_sync_callback=None):
+        print(f"Handled as a command: {reply}")
+        if self.memory_enabled:
+            self.history.append({"role": "user", "content": user_text})
+            self.history.append({"role": "assistant", "content": reply})
+        self._speak(reply, "Neutral", callback, lip_sync_callback, cache=True)
+
+    def _speak(self, reply, emotion, callback, lip_sync_callback=None, cache=False):
+        # Shows the reply and plays it through TTS with lip sync. With cache,
+        # the audio is kept for the next time the same text is spoken.
+        audio_played = False
+        if self.tts_provider:
+            import numpy as np # type: ignore
+            import sounddevice as sd # type: ignore
+            # Replace hyphens with spaces for TTS to prevent "minus" pronunciation
+            tts_text = reply.replace("-", " ")
+            cached = self.ack_audio.get(tts_text) if cache else None
+            if cached:
+                samplerate, data = cached
+            else:
+                print("Generating speech...")
+                samplerate, data = self.tts_provider.generate_audio(tts_text)
+            if cache and not cached and samplerate and data is not None:
+                if len(self.ack_audio) >= ACK_AUDIO_CACHE_SIZE:
+                    self.ack_audio.pop(next(iter(self.ack_audio)))
+                self.ack_audio[tts_text] = (samplerate, data)
+
+            if samplerate and data is not None:
+                duration = len(data) / samplerate
+
+                # Show text when audio starts
+                callback(reply, emotion, duration)
+                audio_played = True
+
+                # Simple Lip Sync Loop
+                # We need to play audio and update lip sync value simultaneously
+                # Since sd.play is non-blocking, we can loop while it plays
+
+                start_time = time.time()
+
+                sd.play(data, samplerate)
+
+                while time.time() - start_time < duration:
+                    # Calculate current amplitude for lip sync
+                    # Get current position in samples
+                    current_time = time.time() - start_time
+                    sample_idx = int(current_time * samplerate)
+
+                    if sample_idx < len(data):
+                        # Get a small chunk around current sample
+                        chunk_size = 1024
+                        start = max(0, sample_idx - chunk_size // 2)
+                        end = min(len(data), sample_idx + chunk_size // 2)
+                        chunk = data[start:end]
+
+                        if len(chunk) > 0:
+                            # Calculate RMS amplitude
+                            rms = np.sqrt(np.mean(chunk.astype(float)**2))
+
+                            # Normalize based on data type
+                            if np.issubdtype(data.dtype, np.integer):
+                                # Assuming 16-bit PCM
+                                amplitude = rms / 32768.0
+                            else:
+                                # Assuming float (-1.0 to 1.0)
+                                amplitude = rms
+
+                            # Scale up a bit to make mouth open more visible
+                            lip_value = min(1.0, amplitude * self.mouth_sensitivity)
+
+                            if lip_sync_callback:
+                                lip_sync_callback(lip_value)
+
+                    time.sleep(0.016) # ~60fps update
 
-    def _process_text_worker(self, user_text, callback, lip_sync_callback=None):
+                if lip_sync_callback:
+                    lip_sync_callback(0.0) # Close mouth
+
+                sd.wait()
+
+        # Fallback: If no audio was played (TTS disabled or failed), show text now
+        if not audio_played:
+            callback(reply, emotion, 5.0)
+
+    def process_text_input(self, user_text, callback, lip_sync_callback=None, context=None):
+        # context: text put in front of user_text for this request only (e.g.
+        # the current Minecraft state); history keeps just user_text
+        self._begin_turn()
+        threading.Thread(target=self._process_text_worker, args=(user_text, callback, lip_sync_callback, context)).start()
+
+    def _process_text_worker(self, user_text, callback, lip_sync_callback=None, context=None):
+        try:
+            self._process_text_turn(user_text, callback, lip_sync_callback, context)
+        finally:
+            self._end_turn()
+
+    def _process_text_turn(self, user_text, callback, lip_sync_callback=None, context=None):
         try:
             print("Sending to AI...")
             
             messages_to_send = []
+            prompt = f"{context}\n{user_text}" if context else user_text
             
             if self.memory_enabled:
                 # Append user message to history
                 self.history.append({"role": "user", "content": user_text})
-                messages_to_send = self.history
+                messages_to_send = self.history[:-1] + [{"role": "user", "content": prompt}]
             else:
                 # Use fresh context
                 messages_to_send = [
                     {"role": "system", "content": self.get_effective_system_prompt()},
-                    {"role": "user", "content": user_text}
+                    {"role": "user", "content": prompt}
                 ]
             
             # Chat
@@ -252,70 +452,7 @@ class AIManager:
             
             print(f"AI replied: {reply} (Emotion: {emotion})")
             
-            # TTS Generation
-            audio_played = False
-            if self.tts_provider:
-                print("Generating speech...")
-                # Replace hyphens with spaces for TTS to prevent "minus" pronunciation
-                tts_text = reply.replace("-", " ")
-                samplerate, data = self.tts_provider.generate_audio(tts_text)
-                
-                if samplerate and data is not None:
-                    duration = len(data) / samplerate
-                    
-                    # Show text when audio starts
-                    callback(reply, emotion, duration)
-                    audio_played = True
-                    
-                    # Simple Lip Sync Loop
-                    # We need to play audio and update lip sync value simultaneously
-                    # Since sd.play is non-blocking, we can loop while it plays
-                    
-                    start_time = time.time()
-                    
-                    sd.play(data, samplerate)
-                    
-                    while time.time() - start_time < duration:
-                        # Calculate current amplitude for lip sync
-                        # Get current position in samples
-                        current_time = time.time() - start_time
-                        sample_idx = int(current_time * samplerate)
-                        
-                        if sample_idx < len(data):
-                            # Get a small chunk around current sample
-                            chunk_size = 1024
-                            start = max(0, sample_idx - chunk_size // 2)
-                            end = min(len(data), sample_idx + chunk_size // 2)
-                            chunk = data[start:end]
-                            
-                            if len(chunk) > 0:
-                                # Calculate RMS amplitude
-                                rms = np.sqrt(np.mean(chunk.astype(float)**2))
-                                
-                                # Normalize based on data type
-                                if np.issubdtype(data.dtype, np.integer):
-                                    # Assuming 16-bit PCM
-                                    amplitude = rms / 32768.0
-                                else:
-                                    # Assuming float (-1.0 to 1.0)
-                                    amplitude = rms
-                                
-                                # Scale up a bit to make mouth open more visible
-                                lip_value = min(1.0, amplitude * self.mouth_sensitivity)
-                                
-                                if lip_sync_callback:
-                                    lip_sync_callback(lip_value)
-                        
-                        time.sleep(0.016) # ~60fps update
-                        
-                    if lip_sync_callback:
-                        lip_sync_callback(0.0) # Close mouth
-                        
-                    sd.wait()
-            
-            # Fallback: If no audio was played (TTS disabled or failed), show text now
-            if not audio_played:
-                callback(reply, emotion, 5.0)
+            self._speak(reply, emotion, callback, lip_sync_callback)
                 
         except Exception as e:
             print(f"AI Error: {e}")
@@ -0,0 +1,175 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+CACHE_DIR = os.path.join('cache', 'models')
+
+# Stop halving textures below this size
+MIN_TIER_SIZE = 512
+
+class ModelAssetCache:
+    """
+    Downscaled copies of a model's textures, one folder per mip tier.
+    Entries are keyed by a hash of the model's files, so editing or replacing
+    the model invalidates them. A tier folder holds a copy of the model files
+    with smaller textures and can be loaded like the original model.
+    """
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.lock = threading.Lock()
+        self.index = None
+
+    def _load_index(self):
+        # {abs_path: [size, mtime_ns, sha1]} so unchanged files aren't re-hashed
+        if self.index is None:
+            try:
+                with open(self.index_path, 'r') as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+        return self.index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _file_hash(self, path):
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.index.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.index[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return self.index[key][2]
+
+    def content_hash(self, json_file, paths):
+        # Combined hash of the model json and every file it references
+        with self.lock:
+            self._load_index()
+            digest = hashlib.sha1()
+            for path in [json_file] + sorted(paths):
+                if os.path.exists(path):
+                    digest.update(os.path.relpath(path, os.path.dirname(json_file)).encode('utf-8'))
+                    digest.update(self._file_hash(path).encode('ascii'))
+            self._save_index()
+        return digest.hexdigest()[:16]
+
+    def prepare(self, json_file, target_size):
+        # Returns the .model3.json to load: a cached tier whose textures are
+        # at least `target_size` pixels, or the original if none is smaller
+        with open(json_file, 'r', encoding='utf-8') as f:
+            model_data = json.load(f)
+        refs = model_data.get('FileReferences', {})
+        textures = refs.get('Textures', [])
+        if not textures:
+            return json_file
+
+        base_dir = os.path.dirname(json_file)
+        relative = referenced_files(refs)
+        if any(os.path.isabs(p) or os.path.normpath(p).startswith('..') for p in relative):
+            return json_file # Files outside the model folder; can't copy the layout
+
+        key = self.content_hash(json_file, [os.path.join(base_dir, p) for p in relative])
+        entry_dir = os.path.join(self.cache_dir, key)
+        manifest = self._load_manifest(entry_dir)
+        if manifest is None:
+            manifest = self._build(json_file, model_data, entry_dir)
+
+        tier = pick_tier(manifest['sizes'], target_size)
+        if tier == 0:
+            return json_file
+        return os.path.join(entry_dir, f"tier_{tier}", os.path.basename(json_file))
+
+    def _load_manifest(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, 'manifest.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _build(self, json_file, model_data, entry_dir):
+        from PIL import Image # type: ignore
+
+        base_dir = os.path.dirname(json_file)
+        refs = model_data.get('FileReferences', {})
+        textures = refs.get('Textures', [])
+        others = [p for p in referenced_files(refs) if p not in textures]
+
+        images = [Image.open(os.path.join(base_dir, p)) for p in textures]
+        for image in images:
+            image.load()
+        full_size = max(max(image.size) for image in images)
+        sizes = [full_size]
+
+        # Each build gets its own folder, so concurrent loads of the same
+        # model (e.g. a settings change during the startup load) don't
+        # delete each other's files; the first one finished is kept
+        os.makedirs(self.cache_dir, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix=os.path.basename(entry_dir) + '.partial-', dir=self.cache_dir)
+        try:
+            level = 1
+            while full_size >> level >= MIN_TIER_SIZE:
+                tier_dir = os.path.join(build_dir, f"tier_{level}")
+                for rel_path in others:
+                    dest = os.path.join(tier_dir, rel_path)
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    shutil.copy2(os.path.join(base_dir, rel_path), dest)
+                for rel_path, image in zip(textures, images):
+                    w, h = image.size
+                    scaled = image.resize((max(1, w >> level), max(1, h >> level)), Image.LANCZOS)
+                    dest = os.path.join(tier_dir, rel_path)
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    # Light compression: these are decoded on every startup
+                    scaled.save(dest, compress_level=1)
+                with open(os.path.join(tier_dir, os.path.basename(json_file)), 'w', encoding='utf-8') as f:
+                    json.dump(model_data, f, indent=4)
+                sizes.append(full_size >> level)
+                level += 1
+
+            manifest = {'model': os.path.abspath(json_file), 'sizes': sizes}
+            with open(os.path.join(build_dir, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=4)
+            existing = self._load_manifest(entry_dir)
+            if existing is not None:
+                return existing # Another build finished first and may be in use
+            shutil.rmtree(entry_dir, ignore_errors=True) # Leftover without a manifest
+            try:
+                os.replace(build_dir, entry_dir)
+            except OSError:
+                existing = self._load_manifest(entry_dir)
+                if existing is None:
+                    raise
+                return existing
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True) # Already gone if moved into place
+        print(f"Built texture cache for {os.path.basename(json_file)}: tiers {sizes}")
+        return manifest
+
+def referenced_files(refs):
+    # Paths (relative to the model folder) listed in FileReferences
+    files = [refs.get('Moc'), refs.get('Physics'), refs.get('Pose'), refs.get('UserData'), refs.get('DisplayInfo')]
+    files += refs.get('Textures', [])
+    files += [e.get('File') for e in refs.get('Expressions', [])]
+    for group in refs.get('Motions', {}).values():
+        for motion in group:
+            files += [motion.get('File'), motion.get('Sound')]
+    return [f for f in files if f]
+
+def pick_tier(sizes, target_size):
+    # Smallest tier that still covers target_size (index 0 = full resolution)
+    tier = 0
+    for i, size in enumerate(sizes):
+        if size >= target_size:
+            tier = i
+    return tier
@@ -0,0 +1,119 @@
+import threading
+
+class AudioDeviceInventory:
+    """
+    Cached list of audio input/output devices.
+    Enumeration runs on a background thread; listeners are called from that
+    thread with the new input device list (use a Qt signal's emit to get back
+    onto the GUI thread). Nothing is enumerated, and sounddevice isn't
+    imported, until something first asks for the devices.
+    """
+    def __init__(self):
+        self.input_devices = []
+        self.output_devices = []
+        self.loaded = False
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.refresh_thread = None
+        self.refresh_requested = False
+        self.rescan_requested = False
+        self.started = False
+
+        # Optional callable returning True while audio streams are open.
+        # PortAudio can't be re-initialised under an open stream, so rescans
+        # are held back until it returns False and then run from
+        # streams_closed(). Code opening streams holds stream_lock while it
+        # marks them active, so a stream can't open between the check and
+        # the re-initialisation.
+        self.streams_active = None
+        self.stream_lock = threading.Lock()
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+        if self.loaded:
+            callback(list(self.input_devices))
+        else:
+            self.load()
+
+    def load(self):
+        # First enumeration; later calls do nothing
+        if not self.started:
+            self.refresh()
+
+    def device_changed(self):
+        # Hotplug notification; only worth a rescan once devices were listed
+        if self.started:
+            self.refresh(rescan=True)
+
+    def streams_closed(self):
+        # Runs a rescan that was held back while streams were open
+        if self.rescan_requested:
+            self.refresh()
+
+    def get_input_devices(self):
+        self.load()
+        return list(self.input_devices)
+
+    def get_output_devices(self):
+        self.load()
+        return list(self.output_devices)
+
+    def refresh(self, rescan=False):
+        # rescan=True re-initialises PortAudio so newly plugged devices show up.
+        # Calls made while a refresh is running are folded into one more pass.
+        with self.lock:
+            self.started = True
+            self.refresh_requested = True
+            self.rescan_requested = self.rescan_requested or rescan
+            if self.refresh_thread and self.refresh_thread.is_alive():
+                return
+            self.refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self.refresh_thread.start()
+
+    def wait(self, timeout=None):
+        thread = self.refresh_thread
+        if thread:
+            thread.join(timeout)
+
+    def _refresh_loop(self):
+        while True:
+            with self.lock:
+                if not self.refresh_requested:
+                    self.refresh_thread = None
+                    return
+                self.refresh_requested = False
+                rescan = self.rescan_requested
+
+            self._enumerate(rescan)
+
+            for callback in list(self.listeners):
+                try:
+                    callback(list(self.input_devices))
+                except Exception as e:
+                    print(f"Audio device listener error: {e}")
+
+    def _enumerate(self, rescan):
+        try:
+            import sounddevice as sd # type: ignore
+            if rescan:
+                with self.stream_lock:
+                    # While streams are open it stays pending; streams_closed() runs it
+                    if not (self.streams_active and self.streams_active()):
+                        with self.lock:
+                            self.rescan_requested = False
+                        sd._terminate()
+                        sd._initialize()
+
+            inputs = []
+            outputs = []
+            for i, dev in enumerate(sd.query_devices()):
+                if dev['max_input_channels'] > 0:
+                    inputs.append((i, dev['name']))
+                if dev['max_output_channels'] > 0:
+                    outputs.append((i, dev['name']))
+
+            self.input_devices = inputs
+            self.output_devices = outputs
+        except Exception as e:
+            print(f"Error listing devices: {e}")
+        self.loaded = True
@@ -0,0 +1,392 @@
+"""
+End-to-end Minecraft bot benchmark against a local server stand-in.
+
+Starts app/minecraft/local_server.js (a scripted 1.12.2 server built on
+minecraft-protocol: flat world, a fake owner, chat floods) and the bot host,
+talks to the bot over the same framed channel MinecraftManager uses, and
+measures chat event throughput and latency, command round trips, pathfinding
+to the owner and outgoing chat rate limiting. Needs Node.js and the bot's
+node_modules, but no network or real server:
+
+    python -m app.bot_benchmark --flood 2000
+"""
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from app.ipc_framing import JsonLineDecoder, FrameDecoder, encode_frame, msgpack_available
+from app.render_benchmark import percentile
+
+BOT_DIR = os.path.join(os.path.dirname(__file__), 'minecraft')
+OWNER = "Owner"
+PATH_TARGETS = [(12.5, 12.5), (-15.5, 8.5), (20.5, -18.5)]
+PATH_STALL_SECONDS = 2.0
+
+class BotHarness:
+    """
+    Runs the stand-in server and the bot host as child processes. Their
+    output is read on background threads into one queue of
+    (source, message, received_at); pump() handles it on the caller's thread.
+    """
+    def __init__(self, node, codec):
+        self.node = node
+        self.codec = codec
+        self.events = queue.Queue()
+        self.server = None
+        self.host = None
+        self.listener = None
+        self.channel = None
+        self.tempdir = None
+        self.port = None
+        self.next_id = 1
+        self.acks = {}
+        self.handlers = []
+
+    def start(self, timeout=20.0):
+        env = dict(os.environ)
+        self.server = subprocess.Popen([self.node, os.path.join(BOT_DIR, 'local_server.js'), '--port', '0', '--owner', OWNER],
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=BOT_DIR, env=env)
+        self._read_lines('server', self.server.stdout)
+        listening = self.wait_for(lambda source, msg: source == 'server' and msg.get('type') == 'listening', timeout)
+        if listening is None:
+            raise RuntimeError("Local server did not start (is node_modules installed in app/minecraft?)")
+        self.port = listening['data']['port']
+
+        if hasattr(socket, 'AF_UNIX'):
+            self.tempdir = tempfile.mkdtemp(prefix='yazuki-bench-')
+            path = os.path.join(self.tempdir, 'bot.sock')
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.listener.bind(path)
+            self.listener.listen(1)
+            env['YAZUKI_IPC'] = path
+            env['YAZUKI_IPC_CODEC'] = self.codec
+        # Without AF_UNIX (older Windows Pythons) the bot falls back to stdout
+
+        self.host = subprocess.Popen([self.node, os.path.join(BOT_DIR, 'bot.js')],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=BOT_DIR, env=env)
+        self._read_lines('bot', self.host.stdout)
+        if self.listener is not None:
+            self.listener.settimeout(timeout)
+            self.channel, _ = self.listener.accept()
+            self.channel.settimeout(None)
+            threading.Thread(target=self._read_channel, daemon=True).start()
+        if self.wait_for(lambda source, msg: msg.get('type') == 'status' and msg.get('data') == 'Ready', timeout) is None:
+            raise RuntimeError("Bot host did not report Ready")
+
+    def stop(self):
+        for process in (self.host, self.server):
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+        if self.channel is not None:
+            self.channel.close()
+        if self.listener is not None:
+            self.listener.close()
+        if self.tempdir is not None:
+            for name in os.listdir(self.tempdir):
+                os.remove(os.path.join(self.tempdir, name))
+            os.rmdir(self.tempdir)
+
+    def _read_lines(self, source, stream):
+        def run():
+            decoder = JsonLineDecoder()
+            while True:
+                data = stream.read1(65536)
+                if not data:
+                    break
+                now = time.time()
+                messages, _ = decoder.feed(data)
+                for msg in messages:
+                    self.events.put((source, msg, now))
+        threading.Thread(target=run, daemon=True).start()
+
+    def _read_channel(self):
+        decoder = FrameDecoder()
+        while True:
+            try:
+                data = self.channel.recv(65536)
+            except OSError:
+                break
+            if not data:
+                break
+            now = time.time()
+            for msg in decoder.feed(data):
+                self.events.put(('bot', msg, now))
+
+    def pump(self, timeout):
+        # Handles queued output for up to `timeout` seconds; returns the events
+        deadline = time.monotonic() + timeout
+        handled = []
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                source, msg, received = self.events.get(timeout=max(0.0, remaining)) if remaining > 0 else self.events.get_nowait()
+            except queue.Empty:
+                return handled
+            if msg.get('type') == 'ack':
+                self.acks[msg['data'].get('id')] = (msg['data'], received)
+            for handler in self.handlers:
+                handler(source, msg, received)
+            handled.append((source, msg))
+
+    def wait_for(self, predicate, timeout):
+        # First message matching predicate(source, msg), or None on timeout
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for source, msg in self.pump(min(0.05, max(0.0, deadline - time.monotonic()))):
+                if predicate(source, msg):
+                    return msg
+        return None
+
+    def server_command(self, command, **data):
+        self.server.stdin.write((json.dumps({"command": command, **data}) + "\n").encode('utf-8'))
+        self.server.stdin.flush()
+
+    def send(self, command, data=None, bot_id='main'):
+        msg = {"command": command, "id": self.next_id, "bot": bot_id, **(data or {})}
+        self.next_id += 1
+        if self.channel is not None:
+            self.channel.sendall(encode_frame(msg))
+        else:
+            self.host.stdin.write((json.dumps(msg) + "\n").encode('utf-8'))
+            self.host.stdin.flush()
+        return msg['id'], time.time()
+
+    def call(self, command, data=None, timeout=10.0):
+        # Sends a command and waits for its ack: (ack data, round trip seconds)
+        command_id, sent = self.send(command, data)
+        deadline = time.monotonic() + timeout
+        while command_id not in self.acks and time.monotonic() < deadline:
+            self.pump(0.01)
+        if command_id not in self.acks:
+            raise TimeoutError(f"No ack for '{command}'")
+        ack, received = self.acks.pop(command_id)
+        return ack, received - sent
+
+def measure_connect(harness, args):
+    options = {
+        "host": "127.0.0.1",
+        "port": harness.port,
+        "username": "Yazuki",
+        "auth": "offline",
+        "version": "1.12.2",
+        "stateRate": args.state_rate,
+        "chatRate": args.chat_rate,
+        "chatBurst": args.chat_burst,
+        "reconnect": False,
+    }
+    start = time.time()
+    harness.send("connect", {"options": options})
+    spawned = harness.wait_for(lambda source, msg: msg.get('type') == 'status' and msg.get('data') == 'Spawned', args.timeout)
+    if spawned is None:
+        raise RuntimeError("Bot did not spawn on the local server")
+    # Let the owner and the first state snapshot arrive
+    harness.wait_for(lambda source, msg: msg.get('type') == 'state' and f"players.{OWNER}" in msg['data'].get('set', {}), 5.0)
+    return {'spawn_ms': (time.time() - start) * 1000.0}
+
+def measure_round_trips(harness, count):
+    rtt_ms = []
+    for _ in range(count):
+        ack, rtt = harness.call("state_sync")
+        if ack.get('ok'):
+            rtt_ms.append(rtt * 1000.0)
+    return {
+        'count': count,
+        'ok': len(rtt_ms),
+        'p50_ms': percentile(rtt_ms, 50),
+        'p95_ms': percentile(rtt_ms, 95),
+        'max_ms': max(rtt_ms) if rtt_ms else 0.0,
+    }
+
+def measure_flood(harness, count, rate, timeout):
+    received = {}
+    latency_ms = []
+    counts = {'state': 0, 'other': 0}
+
+    def on_event(source, msg, at):
+        if source != 'bot':
+            return
+        if msg.get('type') == 'chat' and str(msg['data'].get('message', '')).startswith('flood '):
+            parts = msg['data']['message'].split()
+            received[int(parts[1])] = at
+            latency_ms.append(at * 1000.0 - int(parts[2]))
+        elif msg.get('type') == 'state':
+            counts['state'] += 1
+        else:
+            counts['other'] += 1
+
+    harness.handlers.append(on_event)
+    start = time.time()
+    harness.server_command("flood", count=count, rate=rate)
+    deadline = time.monotonic() + timeout
+    while len(received) < count and time.monotonic() < deadline:
+        harness.pump(0.05)
+    harness.handlers.remove(on_event)
+
+    elapsed = (max(received.values()) - start) if received else 0.0
+    return {
+        'sent': count,
+        'received': len(received),
+        'events_per_s': len(received) / elapsed if elapsed > 0 else 0.0,
+        'latency_p50_ms': percentile(latency_ms, 50),
+        'latency_p95_ms': percentile(latency_ms, 95),
+        'latency_max_ms': max(latency_ms) if latency_ms else 0.0,
+        'state_deltas': counts['state'],
+        'in_order': list(received) == sorted(received),
+    }
+
+def measure_paths(harness, timeout):
+    runs = []
+    for x, z in PATH_TARGETS:
+        harness.server_command("owner", x=x, z=z, walk=False)
+        harness.wait_for(lambda source, msg: msg.get('type') == 'state'
+                         and abs((msg['data'].get('set', {}).get(f"players.{OWNER}") or [1e9])[0] - x) < 1, 3.0)
+        plans = []
+        result = {}
+        moved = [time.monotonic()]
+
+        def on_event(source, msg, at):
+            if msg.get('type') == 'path':
+                if 'planMs' in msg['data']:
+                    plans.append(msg['data'])
+                elif msg['data'].get('status') == 'reached':
+                    result.update(msg['data'])
+            elif msg.get('type') == 'state' and 'self.pos' in msg['data'].get('set', {}):
+                moved[0] = time.monotonic()
+
+        harness.handlers.append(on_event)
+        start = time.time()
+        retries = 0
+        ack, rtt = harness.call("come", {"username": OWNER})
+        if ack.get('ok'):
+            deadline = time.monotonic() + timeout
+            while not result and time.monotonic() < deadline:
+                harness.pump(0.05)
+                # The pathfinder can finish a path short of the goal and wait
+                # there; ask again once if the bot stops moving
+                if not result and retries == 0 and time.monotonic() - moved[0] > PATH_STALL_SECONDS:
+                    retries += 1
+                    moved[0] = time.monotonic()
+                    harness.call("come", {"username": OWNER})
+        harness.handlers.remove(on_event)
+        runs.append({
+            'target': [x, z],
+            'ok': bool(ack.get('ok') and result),
+            'error': ack.get('error'),
+            'ack_ms': rtt * 1000.0,
+            'searches': len(plans),
+            'retries': retries,
+            'plan_ms': sum(p['planMs'] for p in plans),
+            'nodes': sum(p.get('nodes', 0) for p in plans),
+            'reach_ms': result.get('elapsedMs', (time.time() - start) * 1000.0),
+        })
+    harness.server_command("owner", walk=True)
+    return runs
+
+def measure_outgoing_chat(harness, args):
+    # One reply long enough to be split, plus a burst of short ones
+    long_text = " ".join(f"word{i}" for i in range(140))
+    texts = [long_text] + [f"short reply {i}" for i in range(args.chat_messages)]
+    lines = []
+
+    def on_event(source, msg, at):
+        if source == 'server' and msg.get('type') == 'bot_chat':
+            lines.append((at, msg['data']['message']))
+
+    harness.handlers.append(on_event)
+    start = time.time()
+    chunks = 0
+    for text in texts:
+        ack, _ = harness.call("chat", {"message": text})
+        chunks += (ack.get('result') or {}).get('queued', 0)
+    deadline = time.monotonic() + args.timeout
+    while len(lines) < chunks and time.monotonic() < deadline:
+        harness.pump(0.05)
+    harness.handlers.remove(on_event)
+
+    duration = (lines[-1][0] - start) if lines else 0.0
+    # Fastest the token bucket allows: the burst at once, then one per 1/rate
+    expected = max(0.0, (chunks - args.chat_burst) / args.chat_rate)
+    return {
+        'messages': len(texts),
+        'chunks': chunks,
+        'delivered': len(lines),
+        'longest': max((len(text) for _, text in lines), default=0),
+        'seconds': duration,
+        'min_seconds': expected,
+        'rate_ok': duration >= expected * 0.9,
+    }
+
+def print_report(result):
+    print(f"Bot benchmark against the local server (channel: {result['channel']})")
+    print(f"  spawn           {result['connect']['spawn_ms']:.0f} ms")
+    r = result['round_trips']
+    print(f"  command RTT     p50 {r['p50_ms']:.2f} ms  p95 {r['p95_ms']:.2f} ms  max {r['max_ms']:.2f} ms ({r['ok']}/{r['count']})")
+    f = result['flood']
+    print(f"  chat events     {f['received']}/{f['sent']} at {f['events_per_s']:,.0f}/s, latency p50 {f['latency_p50_ms']:.1f} ms "
+          f"p95 {f['latency_p95_ms']:.1f} ms max {f['latency_max_ms']:.1f} ms{'' if f['in_order'] else ' (out of order!)'}")
+    for run in result['paths']:
+        status = "ok" if run['ok'] else f"FAILED {run['error'] or 'timeout'}"
+        print(f"  path to {str(run['target']):<14} {status}: {run['searches']} searches, {run['plan_ms']:.1f} ms planning, "
+              f"{run['nodes']} nodes, reached in {run['reach_ms']:.0f} ms"
+              f"{' after a retry' if run['retries'] else ''}")
+    c = result['outgoing_chat']
+    print(f"  outgoing chat   {c['delivered']}/{c['chunks']} messages from {c['messages']} replies in {c['seconds']:.1f}s "
+          f"(limit allows {c['min_seconds']:.1f}s), longest {c['longest']} chars")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end Minecraft bot benchmark on a local server stand-in")
+    parser.add_argument('--node', default='node')
+    parser.add_argument('--flood', type=int, default=2000, help="Chat lines the server floods the bot with")
+    parser.add_argument('--flood-rate', type=float, default=0, help="Lines per second (0 = all at once)")
+    parser.add_argument('--round-trips', type=int, default=200)
+    parser.add_argument('--state-rate', type=float, default=10)
+    parser.add_argument('--chat-rate', type=float, default=4.0)
+    parser.add_argument('--chat-burst', type=int, default=3)
+    parser.add_argument('--chat-messages', type=int, default=5, help="Short replies sent after the long one")
+    parser.add_argument('--codec', choices=['json', 'msgpack'], default='json')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    if args.codec == 'msgpack' and not msgpack_available():
+        print("msgpack is not installed; using JSON")
+        args.codec = 'json'
+
+    harness = BotHarness(args.node, args.codec)
+    try:
+        harness.start()
+        result = {'channel': f"socket/{args.codec}" if harness.channel is not None else "stdout"}
+        result['connect'] = measure_connect(harness, args)
+        result['round_trips'] = measure_round_trips(harness, args.round_trips)
+        result['flood'] = measure_flood(harness, args.flood, args.flood_rate, args.timeout)
+        result['paths'] = measure_paths(harness, args.timeout)
+        result['outgoing_chat'] = measure_outgoing_chat(harness, args)
+        harness.call("quit")
+    except (RuntimeError, TimeoutError, OSError) as e:
+        print(f"Bot benchmark failed: {e}")
+        return 2
+    finally:
+        harness.stop()
+
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=4)
+    ok = (result['round_trips']['ok'] == args.round_trips
+          and result['flood']['received'] == args.flood and result['flood']['in_order']
+          and all(run['ok'] for run in result['paths'])
+          and result['outgoing_chat']['delivered'] == result['outgoing_chat']['chunks']
+          and result['outgoing_chat']['longest'] <= 256
+          and result['outgoing_chat']['rate_ok'])
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
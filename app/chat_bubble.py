@@ -0,0 +1,143 @@
+from PySide6.QtCore import Qt, QPointF, QRect, QRectF # type: ignore
+from PySide6.QtGui import QPainter, QPixmap, QTextLayout, QTextOption, QRegion, QColor # type: ignore
+
+BUBBLE_PADDING = 10
+BUBBLE_RADIUS = 10
+
+def _cursor_x(line, position):
+    # PySide may return (x, position) for the pointer overload
+    x = line.cursorToX(position)
+    return x[0] if isinstance(x, tuple) else x
+
+class ChatBubble:
+    """
+    Chat bubble rendered once into cached pixmaps.
+    The text is laid out (word wrapped, centered) and painted when the text,
+    font, colors, width or pixel ratio change; drawing is then two pixmap
+    blits. The typewriter effect reveals the cached text by clipping.
+    """
+    def __init__(self):
+        self.font = None
+        self.text_color = QColor(255, 255, 255)
+        self.bg_color = QColor(0, 0, 0, 180)
+
+        self.key = None
+        self.text = ""
+        self.layout = None
+        self.bubble_rect = QRect() # Relative to the text origin
+        self.bg_pixmap = None
+        self.text_pixmap = None
+        self.reveal_count = -1
+        self.reveal_region = QRegion()
+
+    def set_style(self, font, text_color, bg_color):
+        self.font = font
+        self.text_color = QColor(text_color)
+        self.bg_color = QColor(bg_color)
+        self.key = None # Re-render on next prepare()
+
+    def prepare(self, text, width, pixel_ratio=1.0):
+        # Lay out and render `text` wrapped to `width` if anything changed
+        key = (text, width, pixel_ratio)
+        if key == self.key:
+            return
+        self.key = key
+        self.text = text
+        self.reveal_count = -1
+        self.bg_pixmap = None
+        self.text_pixmap = None
+
+        if not text or width <= 0 or self.font is None:
+            self.layout = None
+            self.bubble_rect = QRect()
+            return
+
+        layout = QTextLayout(text, self.font)
+        option = QTextOption(Qt.AlignHCenter)
+        option.setWrapMode(QTextOption.WordWrap)
+        layout.setTextOption(option)
+
+        layout.beginLayout()
+        y = 0.0
+        text_rect = QRectF()
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(width)
+            line.setPosition(QPointF(0, y))
+            y += line.height()
+            text_rect = text_rect.united(line.naturalTextRect())
+        layout.endLayout()
+
+        self.layout = layout
+        self.bubble_rect = text_rect.toAlignedRect().adjusted(-BUBBLE_PADDING, -BUBBLE_PADDING, BUBBLE_PADDING, BUBBLE_PADDING)
+        self._render(pixel_ratio)
+
+    def _new_pixmap(self, pixel_ratio):
+        size = self.bubble_rect.size()
+        pixmap = QPixmap(max(1, int(size.width() * pixel_ratio)), max(1, int(size.height() * pixel_ratio)))
+        pixmap.setDevicePixelRatio(pixel_ratio)
+        pixmap.fill(Qt.transparent)
+        return pixmap
+
+    def _render(self, pixel_ratio):
+        w = self.bubble_rect.width()
+        h = self.bubble_rect.height()
+
+        self.bg_pixmap = self._new_pixmap(pixel_ratio)
+        painter = QPainter(self.bg_pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(self.bg_color)
+        painter.setPen(Qt.NoPen)
+        painter.drawRoundedRect(QRect(0, 0, w, h), BUBBLE_RADIUS, BUBBLE_RADIUS)
+        painter.end()
+
+        self.text_pixmap = self._new_pixmap(pixel_ratio)
+        painter = QPainter(self.text_pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.text_color)
+        self.layout.draw(painter, QPointF(-self.bubble_rect.left(), -self.bubble_rect.top()))
+        painter.end()
+
+    def rect_at(self, origin):
+        # Bubble rectangle in widget coordinates for a given text origin
+        return self.bubble_rect.translated(origin)
+
+    def _reveal_clip(self, count):
+        # Region (pixmap coordinates) covering the first `count` characters
+        if count == self.reveal_count:
+            return self.reveal_region
+        region = QRegion()
+        dx = -self.bubble_rect.left()
+        dy = -self.bubble_rect.top()
+        for i in range(self.layout.lineCount()):
+            line = self.layout.lineAt(i)
+            start = line.textStart()
+            end = start + line.textLength()
+            if count <= start:
+                break
+            # Small margin so glyph overhangs aren't cut off
+            line_rect = line.naturalTextRect().adjusted(-2, -2, 2, 2)
+            if count < end:
+                right = _cursor_x(line, count)
+                line_rect.setRight(right)
+            region = region.united(QRegion(line_rect.translated(dx, dy).toAlignedRect()))
+        self.reveal_count = count
+        self.reveal_region = region
+        return region
+
+    def draw(self, painter, origin, revealed=None):
+        # revealed: number of characters shown (None = all)
+        if self.bg_pixmap is None:
+            return
+        rect = self.rect_at(origin)
+        painter.drawPixmap(rect.topLeft(), self.bg_pixmap)
+
+        if revealed is None or revealed >= len(self.text):
+            painter.drawPixmap(rect.topLeft(), self.text_pixmap)
+        elif revealed > 0:
+            painter.save()
+            painter.setClipRegion(self._reveal_clip(revealed).translated(rect.topLeft()))
+            painter.drawPixmap(rect.topLeft(), self.text_pixmap)
+            painter.restore()
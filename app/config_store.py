@@ -0,0 +1,128 @@
+import os
+import json
+import copy
+import stat
+import threading
+import time
+from types import MappingProxyType
+
+def freeze(value):
+    # Recursively convert dicts/lists into read-only mappings/tuples
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+class ConfigStore:
+    """
+    Persists the shared config dict to disk.
+    Writes are atomic (temp file + rename) and run on a background thread.
+    Bursts of save requests are coalesced into one write.
+    """
+    def __init__(self, path, config, save_delay=0.5):
+        self.path = path
+        self.config = config
+        self.save_delay = save_delay
+        self.autosave = False
+        self.dirty = False
+
+        self.condition = threading.Condition()
+        self.pending = None # Copy of the config waiting to be written
+        self.pending_since = 0.0
+        self.writing = False
+        self.closed = False
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+        self._snapshot = freeze(copy.deepcopy(config))
+
+    def snapshot(self):
+        # Immutable view of the config as of the last save(). Safe to read
+        # from any thread while the UI keeps editing the dict.
+        return self._snapshot
+
+    def mark_dirty(self):
+        # Call on the GUI thread after changing the config
+        self.dirty = True
+        if self.autosave:
+            self.save()
+
+    def save(self):
+        # Queue a write of the current config. Must be called on the thread
+        # that mutates the config (the GUI thread); the copy is taken here.
+        data = copy.deepcopy(self.config)
+        self._snapshot = freeze(data)
+        self.dirty = False
+        with self.condition:
+            self.pending = data
+            self.pending_since = time.monotonic()
+            self.condition.notify()
+
+    def flush(self, timeout=5.0):
+        # Write any pending change now and wait for it (e.g. on quit)
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.pending_since = 0.0
+            self.condition.notify()
+            while (self.pending is not None or self.writing) and time.monotonic() < deadline:
+                self.condition.wait(deadline - time.monotonic())
+
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join(1.0)
+
+    def _writer_loop(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+
+                # Wait for the burst to settle; new save() calls push this back
+                remaining = self.pending_since + self.save_delay - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+
+                data = self.pending
+                self.pending = None
+                self.writing = True
+
+            try:
+                self._write_atomic(data)
+                print(f"Settings saved to {self.path}")
+            except Exception as e:
+                print(f"Failed to save settings: {e}")
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def _write_atomic(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = os.path.join(directory, f'.config-{os.getpid()}.tmp')
+        # Created like any new file (umask applies), unlike mkstemp's 0600;
+        # one writer thread per process, so the name is ours
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            # Keep the existing file's permissions
+            try:
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(self.path).st_mode))
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,57 @@
+import time
+from collections import deque
+
+# Governor states
+ACTIVE = "active"
+IDLE = "idle"
+PAUSED = "paused"
+
+class FrameGovernor:
+    """
+    Picks the render rate from recent activity.
+    Runs at the full rate while something is moving, drops to an idle rate
+    once everything has settled, and pauses while the window can't be seen.
+    """
+    def __init__(self, active_fps=60, idle_fps=10, settle_time=2.0, enabled=True):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        # Keep the full rate this long after the last activity so physics
+        # (hair, clothes) can finish swinging before we slow down
+        self.settle_time = settle_time
+        self.enabled = enabled
+        self.last_activity = time.monotonic()
+        self.state = ACTIVE
+        self.frame_times = deque(maxlen=240)
+
+    def note_activity(self, now=None):
+        self.last_activity = time.monotonic() if now is None else now
+
+    def choose_state(self, visible, now=None):
+        now = time.monotonic() if now is None else now
+        if not visible:
+            self.state = PAUSED
+        elif not self.enabled or now - self.last_activity < self.settle_time:
+            self.state = ACTIVE
+        else:
+            self.state = IDLE
+        return self.state
+
+    def target_fps(self):
+        if self.state == PAUSED:
+            return 0
+        if self.state == IDLE:
+            return min(self.idle_fps, self.active_fps)
+        return self.active_fps
+
+    def note_frame(self, now=None):
+        self.frame_times.append(time.monotonic() if now is None else now)
+
+    def effective_fps(self, now=None, window=1.0):
+        # Frames actually rendered over the last `window` seconds
+        now = time.monotonic() if now is None else now
+        count = 0
+        for t in reversed(self.frame_times):
+            if now - t > window:
+                break
+            count += 1
+        return count / window
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+from collections import deque
+
+# Phases recorded per frame, in drawing order for the overlay graph
+PHASES = ['drag', 'model_update', 'expressions', 'draw', 'overlay']
+
+class FrameRecord:
+    __slots__ = ('start', 'interval', 'target', 'phases', 'end')
+
+    def __init__(self, start, interval, target):
+        self.start = start
+        self.interval = interval
+        self.target = target
+        self.phases = [] # (name, start, duration)
+        self.end = start
+
+class FrameProfiler:
+    """
+    Per-frame phase timings kept in a ring buffer.
+    Disabled profilers cost one attribute check per call.
+    `clock` defaults to wall time; time.thread_time gives CPU time instead.
+    """
+    def __init__(self, capacity=600, enabled=False, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.frames = deque(maxlen=capacity)
+        self.current = None
+        self.last_frame_start = None
+        self.dropped_frames = 0
+        # Phases timed between frames (e.g. the overlay layer repainting on
+        # its own); attached to the next frame
+        self.pending_phases = []
+        self.epoch = clock()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.current = None
+        self.last_frame_start = None
+        self.pending_phases = []
+
+    def clear(self):
+        self.frames.clear()
+        self.dropped_frames = 0
+
+    def begin_frame(self, target_interval):
+        # target_interval is the scheduled frame time in seconds (0 if unknown)
+        if not self.enabled:
+            return
+        now = self.clock()
+        interval = now - self.last_frame_start if self.last_frame_start is not None else 0.0
+        self.last_frame_start = now
+
+        # A frame that took more than 1.5 target intervals means we missed slots
+        if target_interval > 0 and interval > target_interval * 1.5:
+            self.dropped_frames += int(round(interval / target_interval)) - 1
+
+        self.current = FrameRecord(now, interval, target_interval)
+        if self.pending_phases:
+            self.current.phases.extend(self.pending_phases)
+            self.pending_phases = []
+
+    def start(self):
+        return self.clock() if self.enabled else 0.0
+
+    def stop(self, name, start):
+        if not self.enabled:
+            return
+        phase = (name, start, self.clock() - start)
+        if self.current is not None:
+            self.current.phases.append(phase)
+        elif len(self.pending_phases) < 64:
+            self.pending_phases.append(phase)
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        self.current.end = self.clock()
+        self.frames.append(self.current)
+        self.current = None
+
+    def summary(self):
+        # Averages (ms) over the buffered frames
+        frames = list(self.frames)
+        if not frames:
+            return None
+        totals = {}
+        for frame in frames:
+            for name, _, duration in frame.phases:
+                totals[name] = totals.get(name, 0.0) + duration
+        phase_ms = {name: total * 1000.0 / len(frames) for name, total in totals.items()}
+
+        intervals = [f.interval for f in frames if f.interval > 0]
+        # Jitter: mean deviation of the actual frame interval from the scheduled one
+        deviations = [abs(f.interval - f.target) for f in frames if f.interval > 0 and f.target > 0]
+        jitter_ms = sum(deviations) * 1000.0 / len(deviations) if deviations else 0.0
+        frame_ms = sum((f.end - f.start) for f in frames) * 1000.0 / len(frames)
+        return {
+            'frames': len(frames),
+            'phase_ms': phase_ms,
+            'frame_ms': frame_ms,
+            'interval_ms': sum(intervals) * 1000.0 / len(intervals) if intervals else 0.0,
+            'jitter_ms': jitter_ms,
+            'dropped_frames': self.dropped_frames,
+        }
+
+    def export_trace(self, path):
+        # Chrome Trace Event format; opens in chrome://tracing and Perfetto
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "Yazuki renderer"}}]
+
+        def us(t):
+            return (t - self.epoch) * 1_000_000.0
+
+        for frame in self.frames:
+            events.append({
+                "name": "frame", "ph": "X", "pid": pid, "tid": 1,
+                "ts": us(frame.start), "dur": (frame.end - frame.start) * 1_000_000.0,
+                "args": {"interval_ms": frame.interval * 1000.0, "target_ms": frame.target * 1000.0}
+            })
+            for name, start, duration in frame.phases:
+                events.append({
+                    "name": name, "ph": "X", "pid": pid, "tid": 1,
+                    "ts": us(start), "dur": duration * 1_000_000.0
+                })
+            if frame.interval > 0:
+                events.append({
+                    "name": "frame interval (ms)", "ph": "C", "pid": pid,
+                    "ts": us(frame.start), "args": {"interval": frame.interval * 1000.0}
+                })
+
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Frame trace written to {path} ({len(self.frames)} frames)")
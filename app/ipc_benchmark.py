@@ -0,0 +1,175 @@
+"""
+Throughput check for the Minecraft bot IPC decoding.
+
+Pushes a burst of bot events through the stdout JSON-lines decoder and the
+binary channel's frame decoder in randomly sized reads (splitting lines,
+frames and UTF-8 characters), checks that none are lost, and compares the
+two. With Node available it also times the bot-side encoding:
+
+    python -m app.ipc_benchmark --events 50000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+from app.ipc_framing import JsonLineDecoder, FrameDecoder, encode_frame, msgpack_available, CODEC_JSON, CODEC_MSGPACK
+
+NODE_ENCODE_SCRIPT = """
+const { encodeFrame, CODEC_JSON, CODEC_MSGPACK } = require(process.argv[1])
+const events = JSON.parse(require('fs').readFileSync(0, 'utf8'))
+function time(fn) {
+  const start = process.hrtime.bigint()
+  let bytes = 0
+  for (const e of events) bytes += fn(e).length
+  return { seconds: Number(process.hrtime.bigint() - start) / 1e9, bytes }
+}
+time(e => JSON.stringify(e)) // Warm up
+console.log(JSON.stringify({
+  json_lines: time(e => Buffer.from(JSON.stringify({ type: e.type, data: e.data }) + '\\n')),
+  frame_json: time(e => encodeFrame(e, CODEC_JSON)),
+  frame_msgpack: time(e => encodeFrame(e, CODEC_MSGPACK)),
+}))
+"""
+
+def make_events(count, seed=1):
+    rng = random.Random(seed)
+    names = ["Steve", "Alex", "ヤズキ", "Zoë"]
+    events = []
+    for i in range(count):
+        if i % 3 == 0:
+            events.append({"type": "chat", "data": {"username": rng.choice(names), "message": f"hello ☆ {i} " + "x" * rng.randint(0, 80)}})
+        elif i % 3 == 1:
+            events.append({"type": "info", "data": f"Moving to {rng.randint(-500, 500)} 64 {rng.randint(-500, 500)}"})
+        else:
+            events.append({"type": "status", "data": "Connected"})
+    return events
+
+def split_reads(data, max_chunk, seed=2):
+    # Cut the stream the way pipe reads do: anywhere, including mid-character
+    rng = random.Random(seed)
+    chunks = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(1, max_chunk)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return chunks
+
+def legacy_decode(chunks):
+    # The old handle_stdout: decode each read and splitlines()
+    parsed = 0
+    for chunk in chunks:
+        try:
+            text = chunk.decode('utf-8')
+        except UnicodeDecodeError:
+            continue
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                if isinstance(json.loads(line), dict):
+                    parsed += 1
+            except ValueError:
+                pass
+    return parsed
+
+def run_json_lines(events, max_chunk):
+    data = ''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in events).encode('utf-8')
+    chunks = split_reads(data, max_chunk)
+
+    decoder = JsonLineDecoder()
+    received = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        messages, _ = decoder.feed(chunk)
+        received += len(messages)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'events': len(events),
+        'received': received,
+        'malformed': decoder.malformed_frames,
+        'reads': len(chunks),
+        'mb': len(data) / (1024 * 1024),
+        'seconds': elapsed,
+        'legacy_received': legacy_decode(chunks),
+    }
+
+def run_frames(events, max_chunk, codec):
+    data = b''.join(encode_frame(e, codec) for e in events)
+    chunks = split_reads(data, max_chunk)
+
+    decoder = FrameDecoder()
+    received = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        received += len(decoder.feed(chunk))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'events': len(events),
+        'received': received,
+        'malformed': decoder.malformed_frames,
+        'reads': len(chunks),
+        'mb': len(data) / (1024 * 1024),
+        'seconds': elapsed,
+    }
+
+def run_node_encode(events):
+    # Bot-side encoding cost per format, or None if node isn't available
+    ipc_path = os.path.join(os.path.dirname(__file__), 'minecraft', 'ipc.js')
+    try:
+        result = subprocess.run(['node', '-e', NODE_ENCODE_SCRIPT, ipc_path], input=json.dumps(events),
+                                capture_output=True, text=True, timeout=120)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        print(f"Node encode benchmark failed: {result.stderr.strip()}")
+        return None
+    return json.loads(result.stdout)
+
+def report(name, result):
+    rate = result['received'] / result['seconds'] if result['seconds'] > 0 else float('inf')
+    print(f"{name}: {result['received']}/{result['events']} events in {result['reads']} reads "
+          f"({result['mb']:.1f} MB) -> {rate:,.0f} events/s, {result['malformed']} malformed")
+    return rate
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minecraft IPC decoding throughput")
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--max-read', type=int, default=4096, help="Largest simulated pipe read in bytes")
+    parser.add_argument('--min-rate', type=float, default=5000.0, help="Fail below this many events per second")
+
+    parser.add_argument('--no-node', action='store_true', help="Skip the Node.js encoding benchmark")
+    args = parser.parse_args(argv)
+
+    events = make_events(args.events)
+    results = []
+    result = run_json_lines(events, args.max_read)
+    results.append((report("stdout JSON lines", result), result))
+    print(f"  splitlines() per read would have parsed {result['legacy_received']}/{result['events']}")
+
+    result = run_frames(events, args.max_read, CODEC_JSON)
+    results.append((report("channel frames (JSON)", result), result))
+    if msgpack_available():
+        result = run_frames(events, args.max_read, CODEC_MSGPACK)
+        results.append((report("channel frames (MessagePack)", result), result))
+    else:
+        print("channel frames (MessagePack): skipped, msgpack package not installed")
+
+    node = None if args.no_node else run_node_encode(events)
+    if node:
+        print("Node encoding:")
+        for name, timing in node.items():
+            rate = len(events) / timing['seconds'] if timing['seconds'] > 0 else float('inf')
+            print(f"  {name:<14} {rate:,.0f} events/s, {timing['bytes'] / (1024 * 1024):.1f} MB")
+
+    ok = all(r['received'] == r['events'] and r['malformed'] == 0 and rate >= args.min_rate for rate, r in results)
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import json
+import codecs
+import struct
+
+# A line longer than this without a newline is treated as garbage and dropped
+MAX_LINE_LENGTH = 16 * 1024 * 1024
+
+# Binary channel frames: 4-byte big-endian payload length, codec byte, payload
+FRAME_HEADER = struct.Struct('>IB')
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+
+def msgpack_available():
+    try:
+        import msgpack # type: ignore
+        return True
+    except ImportError:
+        return False
+
+def encode_frame(message, codec=CODEC_JSON):
+    if codec == CODEC_MSGPACK:
+        import msgpack # type: ignore
+        payload = msgpack.packb(message)
+    else:
+        payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return FRAME_HEADER.pack(len(payload), codec) + payload
+
+class JsonLineDecoder:
+    """
+    Incremental decoder for a stream of JSON lines.
+    Bytes can arrive split anywhere, including inside a UTF-8 character or
+    a line; the remainder is kept until the next feed(). Lines that aren't
+    JSON objects are returned as raw text (e.g. stray console output), and
+    lines that look like JSON but don't parse are counted as malformed.
+    """
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.partial = ""
+        self.frames = 0
+        self.malformed_frames = 0
+        self.bytes_received = 0
+
+    def feed(self, data):
+        # Returns (messages, raw_lines) for the complete lines in `data`
+        self.bytes_received += len(data)
+        text = self.partial + self.decoder.decode(data)
+        lines = text.split('\n')
+        self.partial = lines.pop()
+        if len(self.partial) > MAX_LINE_LENGTH:
+            self.partial = ""
+            self.malformed_frames += 1
+        return self._parse(lines)
+
+    def flush(self):
+        # End of stream: parse whatever is left without a trailing newline
+        text = self.partial + self.decoder.decode(b'', final=True)
+        self.partial = ""
+        return self._parse([text] if text else [])
+
+    def _parse(self, lines):
+        frames = []
+        raw_lines = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] == '{':
+                frames.append(line)
+            else:
+                raw_lines.append(line)
+        if not frames:
+            return [], raw_lines
+
+        # Parse the whole batch in one call; fall back per line if any is bad
+        try:
+            messages = json.loads('[' + ','.join(frames) + ']')
+        except ValueError:
+            messages = None
+        if messages is None or len(messages) != len(frames):
+            messages = []
+            for frame in frames:
+                try:
+                    messages.append(json.loads(frame))
+                except ValueError:
+                    self.malformed_frames += 1
+                    raw_lines.append(frame)
+        self.frames += len(messages)
+        return messages, raw_lines
+
+class FrameDecoder:
+    """
+    Incremental decoder for length-prefixed frames (see encode_frame).
+    Partial frames are kept until the rest arrives. JSON payloads from one
+    read are parsed in a single call; MessagePack needs the msgpack package.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+        self.malformed_frames = 0
+        self.bytes_received = 0
+        self.unpackb = None
+
+    def feed(self, data):
+        # Returns the messages completed by `data`
+        self.bytes_received += len(data)
+        self.buffer += data
+        buffer = bytes(self.buffer) # Immutable snapshot to slice payloads from
+        json_payloads = []
+        messages = []
+        offset = 0
+        header_size = FRAME_HEADER.size
+        unpack_from = FRAME_HEADER.unpack_from
+        available = len(buffer)
+        while available - offset >= header_size:
+            length, codec = unpack_from(buffer, offset)
+            if length > MAX_FRAME_SIZE:
+                # Lost sync; nothing after this can be trusted
+                self.malformed_frames += 1
+                offset = available
+                break
+            end = offset + header_size + length
+            if end > available:
+                break
+            payload = buffer[offset + header_size:end]
+            offset = end
+            if codec == CODEC_JSON:
+                json_payloads.append(payload)
+            elif codec == CODEC_MSGPACK:
+                messages.extend(self._parse_json(json_payloads))
+                json_payloads = []
+                messages.extend(self._parse_msgpack(payload))
+            else:
+                self.malformed_frames += 1
+        messages.extend(self._parse_json(json_payloads))
+        del self.buffer[:offset]
+        self.frames += len(messages)
+        return messages
+
+    def _parse_json(self, payloads):
+        if not payloads:
+            return []
+        try:
+            messages = json.loads(b'[' + b','.join(payloads) + b']')
+            if len(messages) == len(payloads):
+                return messages
+        except ValueError:
+            pass
+        messages = []
+        for payload in payloads:
+            try:
+                messages.append(json.loads(payload))
+            except ValueError:
+                self.malformed_frames += 1
+        return messages
+
+    def _parse_msgpack(self, payload):
+        if self.unpackb is None:
+            try:
+                import msgpack # type: ignore
+                self.unpackb = msgpack.unpackb
+            except ImportError:
+                self.malformed_frames += 1
+                return []
+        try:
+            return [self.unpackb(payload)]
+        except Exception:
+            self.malformed_frames += 1
+            return []
@@ -1,7 +1,13 @@
 import os
+import json
 import time
 import math
+import mmap
 import random
+import threading
+from app.frame_profiler import FrameProfiler
+from app.param_blender import ParamBlender, load_model_expressions
+from app.asset_cache import ModelAssetCache, referenced_files
 from OpenGL.GL import ( # type: ignore
     glPushMatrix, glLoadIdentity, glRotatef, glBegin, glColor4f, 
     glVertex2f, glEnd, glPopMatrix, GL_QUADS, glScalef
@@ -28,6 +34,50 @@ except ImportError:
     except ImportError:
         print("Live2D library not found. Falling back to mock renderer.")
 
+# Animation rates are per second so motion speed doesn't depend on frame rate
+MOCK_ROTATION_SPEED = 120.0 # degrees per second
+# Exponential approach rate of random look towards its target (per second).
+# Matches the old 0.02-per-frame lerp at 60 fps: -ln(0.98) * 60
+RANDOM_LOOK_SMOOTHING = 1.21
+
+def find_model_json(model_path):
+    # The .model3.json inside a model folder (or the path itself if it's a file)
+    if os.path.isdir(model_path):
+        for f in os.listdir(model_path):
+            if f.endswith('.model3.json'):
+                return os.path.join(model_path, f)
+    elif os.path.isfile(model_path):
+        return model_path
+    return None
+
+def model_file_paths(json_file):
+    # Every file a .model3.json references (moc, textures, physics, motions...)
+    with open(json_file, 'r', encoding='utf-8') as f:
+        refs = json.load(f).get('FileReferences', {})
+    base_dir = os.path.dirname(json_file)
+    return [os.path.join(base_dir, f) for f in referenced_files(refs)]
+
+def prefetch_files(paths):
+    # Map files and ask the OS to page them in, so the native loader reads
+    # from memory instead of disk
+    total = 0
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise'):
+                        mm.madvise(mmap.MADV_WILLNEED)
+                    else:
+                        for offset in range(0, size, mmap.PAGESIZE):
+                            mm[offset] # Touch each page
+                total += size
+        except OSError as e:
+            print(f"Model file missing or unreadable: {path} ({e})")
+    return total
+
 class Live2DManager:
     def __init__(self, config):
         self.config = config
@@ -48,6 +98,9 @@ class Live2DManager:
         self.random_radius = config['render'].get('random_radius', 0.2)
         self.sensitivity = config['render'].get('sensitivity', 0.35)
         self.lip_sync_value = 0.0
+
+        # Phase timings; the renderer swaps in its own profiler
+        self.profiler = FrameProfiler()
         
         # Random look state
         self.last_random_look_time = time.time()
@@ -57,31 +110,47 @@ class Live2DManager:
         self.current_random_x = self.width / 2
         self.current_random_y = self.height / 2
         
-        # Expression state
-        self.expression_params = {}
-        self.emotions = {
-            "Joy": {"ParamEyeLSmile": 1.0, "ParamEyeRSmile": 1.0, "ParamMouthForm": 1.0},
-            "Happy": {"ParamEyeLSmile": 1.0, "ParamEyeRSmile": 1.0, "ParamMouthForm": 1.0},
-            "Anger": {"ParamBrowLY": -0.5, "ParamBrowRY": -0.5, "ParamBrowLAngle": 0.5, "ParamBrowRAngle": 0.5, "ParamMouthForm": -1.0},
-            "Angry": {"ParamBrowLY": -0.5, "ParamBrowRY": -0.5, "ParamBrowLAngle": 0.5, "ParamBrowRAngle": 0.5, "ParamMouthForm": -1.0},
-            "Surprise": {"ParamEyeLOpen": 1.2, "ParamEyeROpen": 1.2, "ParamBrowLY": 0.5, "ParamBrowRY": 0.5, "ParamMouthForm": -0.5},
-            "Neutral": {}
-        }
+        # Expression and lip-sync layers, blended and written once per frame
+        self.blender = ParamBlender(fade_time=config['render'].get('expression_fade', 0.3))
+        self.expression = None # Last expression asked for, kept across model loads
+
+        # Model loading: files are found, parsed and read on a worker thread;
+        # the GL-side load runs at the start of a frame, and the previous model
+        # keeps drawing until then. Replaced models are freed a frame later.
+        self.load_lock = threading.Lock()
+        self.load_generation = 0
+        self.pending_load = None # (json_file, expressions) ready for the GL thread
+        self.loading = False
+        self.retired_models = []
+
+        # Downscaled texture tiers, picked to match the on-screen model size
+        self.asset_cache = ModelAssetCache() if config['render'].get('texture_cache', True) else None
+        self.pixel_ratio = 1.0 # Set by the renderer
         
     def set_lip_sync(self, value):
         self.lip_sync_value = value
+        self.blender.set_lip_sync(value)
 
     def set_expression(self, emotion):
         print(f"Setting expression: {emotion}")
-        if emotion in self.emotions:
-            self.expression_params = self.emotions[emotion]
+        self.expression = emotion # Re-applied when the model is swapped
+        if self.blender.has_expression(emotion):
+            self.blender.set_expression(emotion)
         else:
-            # If unknown emotion, try to find closest match or ignore
-            # For now, just ignore or reset if "Neutral"
-            if emotion == "Neutral":
-                self.expression_params = {}
-            else:
-                print(f"Unknown emotion: {emotion}")
+            print(f"Unknown emotion: {emotion}")
+
+    def is_animating(self):
+        # True while something other than the cursor is driving the model
+        if self.lip_sync_value > 0.01 or self.blender.is_transitioning():
+            return True
+        if self.loading or self.retired_models:
+            return True
+        if self.random_look and not self.look_at_mouse:
+            dx = self.target_random_x - self.current_random_x
+            dy = self.target_random_y - self.current_random_y
+            if abs(dx) > 0.5 or abs(dy) > 0.5:
+                return True
+        return False
 
     def init_gl(self):
         if self.has_live2d:
@@ -106,37 +175,87 @@ class Live2DManager:
             print("Initializing Mock Renderer (Green rotating square)")
 
     def load_model(self):
+        # Start loading the configured model; returns immediately
         if not self.has_live2d:
             return
 
         # Refresh model path from config
         self.model_path = self.config.get('model_folder', 'resources/model/live2d/yazuki')
 
-        # Find the .model3.json file
-        json_file = None
-        if os.path.isdir(self.model_path):
-            for f in os.listdir(self.model_path):
-                if f.endswith('.model3.json'):
-                    json_file = os.path.join(self.model_path, f)
-                    break
-        elif os.path.isfile(self.model_path):
-            json_file = self.model_path
+        with self.load_lock:
+            self.load_generation += 1
+            generation = self.load_generation
+            self.pending_load = None
+            self.loading = True
+        threading.Thread(target=self._prepare_model, args=(self.model_path, generation), daemon=True).start()
 
+    def _prepare_model(self, model_path, generation):
+        # Worker thread: everything that doesn't need the GL context
+        start = time.perf_counter()
+        json_file = find_model_json(model_path)
+        prepared = None
+        if json_file and self.asset_cache:
+            try:
+                json_file = self.asset_cache.prepare(json_file, self.texture_target_size())
+            except Exception as e:
+                print(f"Texture cache unavailable, loading full resolution: {e}")
         if json_file:
-            print(f"Loading model: {json_file}")
             try:
-                if self.model:
-                    # Cleanup old model if needed (depends on library API)
-                    pass
-                self.model = live2d.LAppModel()
-                self.model.LoadModelJson(json_file)
-                
-                # Set initial scale/position if API allows
-                self.model.Resize(self.width, self.height)
+                size = prefetch_files([json_file] + model_file_paths(json_file))
+                prepared = (json_file, load_model_expressions(json_file))
+                print(f"Model files ready: {size / (1024 * 1024):.1f} MB in {(time.perf_counter() - start) * 1000:.0f} ms")
             except Exception as e:
-                print(f"Error loading model: {e}")
+                print(f"Error reading model {json_file}: {e}")
         else:
-            print(f"No .model3.json found in {self.model_path}")
+            print(f"No .model3.json found in {model_path}")
+
+        with self.load_lock:
+            if generation != self.load_generation:
+                return # Superseded by a newer load
+            self.pending_load = prepared
+            if prepared is None:
+                self.loading = False
+
+    def texture_target_size(self):
+        # Texture size (px) needed for the model as drawn. draw() keeps the model
+        # at a constant pixel size, so this follows the reference window size
+        # and the user scale. Assumes the atlas is about the size of the model
+        # canvas, which holds for typical exports.
+        return int(max(self.ref_width, self.ref_height) * self.scale * self.pixel_ratio)
+
+    def finish_pending_load(self):
+        # GL thread, context current. Free models replaced last frame, then
+        # create the pending model; on failure the current model stays.
+        if self.retired_models:
+            self.retired_models.clear() # Releases their GL resources
+        with self.load_lock:
+            prepared = self.pending_load
+            self.pending_load = None
+        if prepared is None:
+            return
+
+        json_file, expressions = prepared
+        print(f"Loading model: {json_file}")
+        start = time.perf_counter()
+        try:
+            model = live2d.LAppModel()
+            model.LoadModelJson(json_file)
+            
+            # Set initial scale/position if API allows
+            model.Resize(self.width, self.height)
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            self.loading = False
+            return
+
+        if self.model is not None:
+            self.retired_models.append(self.model)
+        self.model = model
+        self.blender.bind(model, expressions)
+        if self.expression and self.blender.has_expression(self.expression):
+            self.blender.set_expression(self.expression)
+        self.loading = False
+        print(f"Model loaded in {(time.perf_counter() - start) * 1000:.0f} ms on the render thread")
 
     def resize(self, w, h):
         self.width = w
@@ -145,9 +264,14 @@ class Live2DManager:
             self.model.Resize(w, h)
             # Re-apply scale logic in draw()
 
-    def update(self, mouse_x=0.0, mouse_y=0.0):
+    def update(self, mouse_x=0.0, mouse_y=0.0, dt=1.0 / 60.0):
+        # dt: seconds since the previous update
+        if self.has_live2d:
+            self.finish_pending_load()
         if self.has_live2d and self.model:
             # Update model state (time, physics, etc)
+            profiler = self.profiler
+            phase_start = profiler.start()
             
             if self.look_at_mouse:
                 # Calculate model center in pixels
@@ -195,8 +319,8 @@ class Live2DManager:
                     self.target_random_y = random.uniform(center_y - range_y, center_y + range_y)
                 
                 # Smoothly interpolate current look position towards target
-                # Lower lerp speed for smoother, slower movement
-                lerp_speed = 0.02
+                # Frame-rate independent exponential smoothing
+                lerp_speed = 1.0 - math.exp(-RANDOM_LOOK_SMOOTHING * dt)
                 self.current_random_x += (self.target_random_x - self.current_random_x) * lerp_speed
                 self.current_random_y += (self.target_random_y - self.current_random_y) * lerp_speed
                 
@@ -204,14 +328,18 @@ class Live2DManager:
             else:
                 # Look at center (straight ahead)
                 self.model.Drag(self.width / 2, self.height / 2)
+            profiler.stop('drag', phase_start)
 
+            phase_start = profiler.start()
             self.model.Update()
+            profiler.stop('model_update', phase_start)
             
-            # Apply expression overrides
-            for param_id, value in self.expression_params.items():
-                self.model.SetParameterValue(param_id, value, 1.0)
-        else:
-            self.mock_angle += 2.0
+            # Apply expression and lip-sync layers in one pass
+            phase_start = profiler.start()
+            self.blender.apply(dt)
+            profiler.stop('expressions', phase_start)
+        elif not self.has_live2d:
+            self.mock_angle += MOCK_ROTATION_SPEED * dt
             if self.mock_angle > 360:
                 self.mock_angle -= 360
 
@@ -225,10 +353,6 @@ class Live2DManager:
         final_scale = self.scale * compensation
 
         if self.has_live2d and self.model:
-            # Update Lip Sync
-            # Parameter ID for mouth open is usually "ParamMouthOpenY"
-            self.model.SetParameterValue("ParamMouthOpenY", self.lip_sync_value, 1.0)
-            
             # Use LAppModel's SetScale instead of glScalef
             # Note: SetScale usually sets the scale relative to the model's base scale.
             # We might need to be careful if it accumulates, but usually it's a setter.
@@ -245,7 +369,7 @@ class Live2DManager:
             self.model.SetScale(final_scale)
             self.model.SetOffset(self.offset_x, self.offset_y)
             self.model.Draw()
-        else:
+        elif not self.has_live2d:
             glPushMatrix()
             glScalef(final_scale, final_scale, 1.0)
             self.draw_mock()
@@ -1,3 +1,6 @@
+import time
+_PROCESS_START = time.perf_counter() # Taken before any heavy import
+
 import sys
 import json
 import os
@@ -7,6 +10,15 @@ from PySide6.QtGui import QSurfaceFormat # type: ignore
 from app.window import OverlayWindow
 from app.renderer import RendererWidget
 
+_IMPORTS_DONE = time.perf_counter()
+
+# Modules that should only be imported once a feature actually needs them.
+# Reported by the startup check so regressions in lazy loading are visible.
+DEFERRED_MODULES = ['openai', 'scipy', 'sounddevice', 'elevenlabs', 'gradio_client', 'typecast', 'whisper']
+# Needed once the model is bound, so only checked against the imports above
+IMPORT_DEFERRED_MODULES = ['numpy']
+_LOADED_BY_IMPORTS = [name for name in DEFERRED_MODULES + IMPORT_DEFERRED_MODULES if name in sys.modules]
+
 def load_config():
     config_path = 'config.json'
     if not os.path.exists(config_path):
@@ -19,6 +31,26 @@ def load_config():
     with open(config_path, 'r') as f:
         return json.load(f)
 
+def report_startup(app, main_start):
+    # Called once the renderer has drawn its first frame showing the model.
+    now = time.perf_counter()
+    import_ms = (_IMPORTS_DONE - _PROCESS_START) * 1000.0
+    startup_ms = (now - main_start) * 1000.0
+    loaded = _LOADED_BY_IMPORTS + [name for name in DEFERRED_MODULES
+                                   if name in sys.modules and name not in _LOADED_BY_IMPORTS]
+    print(f"Startup: module imports {import_ms:.0f} ms, main() to first model frame {startup_ms:.0f} ms")
+    if loaded:
+        print(f"Startup: deferred modules already loaded: {', '.join(loaded)}")
+
+    # Startup check mode: YAZUKI_STARTUP_BUDGET_MS=<ms> makes the app exit right
+    # after the first frame, with status 1 if imports plus main() went over budget.
+    budget = os.environ.get('YAZUKI_STARTUP_BUDGET_MS')
+    if budget:
+        total_ms = import_ms + startup_ms
+        over = total_ms > float(budget)
+        print(f"Startup check: {total_ms:.0f} ms against a budget of {float(budget):.0f} ms -> {'FAIL' if over else 'OK'}")
+        app.exit(1 if over else 0)
+
 # Global socket to hold the lock
 _lock_socket = None
 
@@ -34,6 +66,7 @@ def is_already_running():
         return True
 
 def main():
+    main_start = time.perf_counter()
     if is_already_running():
         # Show a message box if possible, or just print
         # Since we haven't created QApplication yet, we can create a temporary one or just print
@@ -53,6 +86,7 @@ def main():
     format.setDepthBufferSize(24)
     format.setStencilBufferSize(8)
     format.setSamples(4) # Multisampling for smoother edges
+    format.setSwapInterval(1) # Swap on vblank; the renderer paces frames off frameSwapped
     QSurfaceFormat.setDefaultFormat(format)
 
     app = QApplication(sys.argv)
@@ -65,8 +99,10 @@ def main():
     
     # Create Renderer
     renderer = RendererWidget(config)
+    renderer.first_frame_drawn.connect(lambda: report_startup(app, main_start))
     
-    if not renderer.live2d_manager.has_live2d:
+    # Skip the modal warning in startup check mode so the run can finish unattended
+    if not renderer.live2d_manager.has_live2d and not os.environ.get('YAZUKI_STARTUP_BUDGET_MS'):
         QMessageBox.warning(None, "Live2D Library Missing", 
             "The 'live2d' Python library was not found.\n"
             "The application will run in Mock Mode (rotating green square).\n\n"
@@ -77,6 +113,7 @@ def main():
     window.show()
     
     print("App started.")
+    print("F7: Toggle Performance Overlay")
     print("F8: Toggle Click-Through")
     print("F9: Reload Model")
     print("ESC: Quit")
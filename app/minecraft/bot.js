@@ -2,6 +2,8 @@ const mineflayer = require('mineflayer')
 const readline = require('readline')
 const { pathfinder, Movements, goals } = require('mineflayer-pathfinder')
 const { GoalNear, GoalBlock, GoalFollow } = goals
+const { connectChannel, CODEC_JSON, CODEC_MSGPACK } = require('./ipc')
+const { createIntentMatcher } = require('./intents')
 
 const rl = readline.createInterface({
   input: process.stdin,
@@ -9,174 +11,565 @@ const rl = readline.createInterface({
   terminal: false
 })
 
-let bot = null
+// Protocol messages go over the channel Python opened (YAZUKI_IPC), leaving
+// stdout/stderr for logs. Without it, fall back to JSON lines on stdout.
+let channel = null
 
-function log(type, data) {
-  console.log(JSON.stringify({ type, data }))
+function send(type, data, botId) {
+  const msg = botId === undefined ? { type, data } : { type, data, bot: botId }
+  if (channel) channel.send(msg)
+  else console.log(JSON.stringify(msg))
 }
 
-function processNaturalLanguageCommand(username, message, isVoice = false) {
-    if (!bot) return
-
-    // Normalize message: lowercase and remove punctuation
-    const lowerMsg = message.toLowerCase().replace(/[^\w\s]/gi, '').trim()
-    const target = bot.players[username] ? bot.players[username].entity : null
-    
-    // Check if message is directed at bot (contains "yazuki" or is a direct command)
-    // If it comes from voice (IPC), it is always directed at the bot.
-    const isDirected = isVoice || lowerMsg.includes('yazuki') || lowerMsg.includes('hey bot')
-    
-    // Helper to check for command phrases
-    const hasPhrase = (phrases) => phrases.some(p => lowerMsg.includes(p))
-
-    if (hasPhrase(['come here', 'come to me', 'come over'])) {
-      if (!target) {
-        bot.chat("I can't see you!")
-        return
+// Several named bots can run in this process (companions on one server, or
+// on different servers). Each session has its own connection, goals, chat
+// queue and state stream; mineflayer, minecraft-data and the pathfinder are
+// loaded once and shared.
+const DEFAULT_BOT = 'main'
+const sessions = new Map()
+
+function memoryReport() {
+  const usage = process.memoryUsage()
+  return { bots: sessions.size, rss: usage.rss, heapUsed: usage.heapUsed, external: usage.external }
+}
+
+function createSession(id) {
+  let bot = null
+
+  function log(type, data) {
+    send(type, data, id)
+  }
+
+  // World state stream: a flat snapshot ('self.pos', 'players.<name>',
+  // 'entities.<id>', 'goal') sampled at stateRate Hz. Only keys that changed
+  // since the last tick are sent; 'full' snapshots reset the receiver.
+  let currentGoal = null
+  let lastState = {}
+  let stateSeq = 0
+  let stateTimer = null
+  let stateRadius = 16
+  const MAX_STATE_ENTITIES = 10
+
+  const round1 = (v) => Math.round(v * 10) / 10
+  const vec = (p) => [round1(p.x), round1(p.y), round1(p.z)]
+
+  function flattenState() {
+    const flat = {}
+    if (!bot || !bot.entity) return flat
+    const me = bot.entity.position
+    flat['self.pos'] = vec(me)
+    flat['self.health'] = bot.health
+    flat['self.food'] = bot.food
+    flat['self.dimension'] = bot.game ? bot.game.dimension : null
+    flat['goal'] = currentGoal
+
+    for (const name of Object.keys(bot.players)) {
+      if (name === bot.username) continue
+      const entity = bot.players[name].entity
+      flat['players.' + name] = entity ? vec(entity.position) : null // null = online, out of view
+    }
+
+    const nearby = Object.values(bot.entities)
+      .filter(e => e !== bot.entity && e.type !== 'player' && e.position.distanceTo(me) <= stateRadius)
+      .sort((a, b) => a.position.distanceTo(me) - b.position.distanceTo(me))
+      .slice(0, MAX_STATE_ENTITIES)
+    for (const e of nearby) {
+      flat['entities.' + e.id] = [e.name || e.type, ...vec(e.position)]
+    }
+    return flat
+  }
+
+  function sameValue(a, b) {
+    if (Array.isArray(a) && Array.isArray(b)) {
+      return a.length === b.length && a.every((v, i) => v === b[i])
+    }
+    return a === b
+  }
+
+  function publishState(full = false) {
+    const flat = flattenState()
+    const set = {}
+    const del = []
+    for (const key of Object.keys(flat)) {
+      if (full || !(key in lastState) || !sameValue(flat[key], lastState[key])) set[key] = flat[key]
+    }
+    if (!full) {
+      for (const key of Object.keys(lastState)) {
+        if (!(key in flat)) del.push(key)
       }
-      const p = target.position
-      bot.pathfinder.setMovements(new Movements(bot))
-      bot.pathfinder.setGoal(new GoalNear(p.x, p.y, p.z, 1))
-      bot.chat("Coming!")
-    }
-    else if (hasPhrase(['stop', 'stay here', 'wait here']) && (isDirected || lowerMsg === 'stop')) {
-      bot.pathfinder.setGoal(null)
-      bot.chat("Stopped.")
-    }
-    else if (hasPhrase(['follow me', 'follow', 'come with me']) && (isDirected || lowerMsg === 'follow me')) {
-      if (!target) {
-        bot.chat("I can't see you!")
-        return
+    }
+    lastState = flat
+    if (full || del.length || Object.keys(set).length) {
+      log('state', { seq: ++stateSeq, full, set, del })
+    }
+  }
+
+  function startStateStream(rate) {
+    stopStateStream()
+    if (!(rate > 0)) return
+    publishState(true)
+    stateTimer = setInterval(() => publishState(false), 1000 / rate)
+  }
+
+  function stopStateStream() {
+    if (stateTimer) clearInterval(stateTimer)
+    stateTimer = null
+    lastState = {}
+  }
+
+  // Movements builds block-property tables for the registry; one instance is
+  // kept per connection and rebuilt only when the version or dimension changes
+  let movements = null
+  let movementsKey = null
+
+  function refreshMovements() {
+    const key = `${bot.version}:${bot.game ? bot.game.dimension : ''}`
+    if (movements && key === movementsKey) return
+    movements = new Movements(bot)
+    movementsKey = key
+    bot.pathfinder.setMovements(movements)
+  }
+
+  // Goals are kept as specs ({ type: 'follow'|'near', username } or
+  // { type: 'block', x, y, z }) so they can be rebuilt after a reconnect
+  let goalSpec = null
+  let pendingGoal = null // Spec waiting for its player to come into view
+  let goalStartedAt = 0
+
+  function goalFromSpec(spec) {
+    if (spec.type === 'block') return new GoalBlock(spec.x, spec.y, spec.z)
+    const target = findPlayerEntity(spec.username)
+    if (!target) return null
+    if (spec.type === 'follow') return new GoalFollow(target, 1)
+    const p = target.position
+    return new GoalNear(p.x, p.y, p.z, 1)
+  }
+
+  function describeGoal(spec) {
+    if (spec.type === 'block') return `going to ${spec.x} ${spec.y} ${spec.z}`
+    return spec.type === 'follow' ? `following ${spec.username}` : `going to ${spec.username}`
+  }
+
+  // Returns false if the goal's player isn't visible
+  function setGoal(spec) {
+    pendingGoal = null
+    const goal = spec ? goalFromSpec(spec) : null
+    if (spec && !goal) return false
+    if (goal) refreshMovements()
+    bot.pathfinder.setGoal(goal, Boolean(spec && spec.type === 'follow'))
+    goalSpec = spec
+    currentGoal = spec ? describeGoal(spec) : null
+    goalStartedAt = performance.now()
+    log('goal', spec)
+    return true
+  }
+
+  function restoreGoal() {
+    const spec = goalSpec
+    if (!spec || setGoal(spec)) return
+    goalSpec = spec // Still wanted; wait for the player to appear
+    pendingGoal = spec
+    const onEntitySpawn = (entity) => {
+      if (pendingGoal !== spec) {
+        bot.removeListener('entitySpawn', onEntitySpawn)
+      } else if (entity.username === spec.username) {
+        bot.removeListener('entitySpawn', onEntitySpawn)
+        setGoal(spec)
       }
-      bot.pathfinder.setMovements(new Movements(bot))
-      bot.pathfinder.setGoal(new GoalFollow(target, 1), true)
-      bot.chat("Following you!")
-    }
-    else if (lowerMsg.startsWith('goto ')) {
-      const args = message.split(' ')
-      if (args.length === 4) {
-          const x = parseInt(args[1])
-          const y = parseInt(args[2])
-          const z = parseInt(args[3])
-          
-          if (!isNaN(x) && !isNaN(y) && !isNaN(z)) {
-              bot.pathfinder.setMovements(new Movements(bot))
-              bot.pathfinder.setGoal(new GoalBlock(x, y, z))
-              bot.chat(`Going to ${x} ${y} ${z}`)
-          }
+    }
+    bot.on('entitySpawn', onEntitySpawn)
+  }
+
+  // Unless Python asked the bot to quit, a lost connection is retried with
+  // jittered exponential backoff. The backoff only resets once a connection
+  // has lasted a while, so a bot kicked right after joining keeps backing off.
+  const STABLE_CONNECTION_MS = 30000
+  let lastOptions = null
+  let connected = false
+  let connectedAt = 0
+  let quitting = false
+  let reconnectAttempt = 0
+  let reconnectTimer = null
+  let disconnectedAt = 0
+
+  function scheduleReconnect(reason) {
+    const base = lastOptions.reconnectBaseMs || 1000
+    const ceiling = Math.min(lastOptions.reconnectMaxMs || 60000, base * 2 ** reconnectAttempt)
+    const delay = Math.round(ceiling / 2 + Math.random() * ceiling / 2)
+    reconnectAttempt++
+    log('reconnect', { attempt: reconnectAttempt, delayMs: delay, reason: String(reason || '') })
+    reconnectTimer = setTimeout(() => {
+      reconnectTimer = null
+      createBot(lastOptions)
+    }, delay)
+  }
+
+  function cancelReconnect() {
+    if (reconnectTimer) clearTimeout(reconnectTimer)
+    reconnectTimer = null
+    reconnectAttempt = 0
+    disconnectedAt = 0
+    connectedAt = 0
+  }
+
+  // Outgoing chat. Acknowledgements ('high') go out before queued replies
+  // ('normal'), long text is split at word boundaries to the server's
+  // message limit, and a token bucket keeps the rate below spam kicks.
+  let chatRate = 1 // messages per second
+  let chatBurst = 3
+  let chatMaxQueue = 20
+  let chatTokens = 0
+  let chatRefilledAt = 0
+  let chatTimer = null
+  const chatQueue = { high: [], normal: [] }
+  const chatStats = { sent: 0, dropped: 0, chunked: 0 }
+
+  function chatLengthLimit() {
+    return bot.supportFeature('lessCharsInChat') ? 100 : 256
+  }
+
+  function chunkChat(text, limit) {
+    const chunks = []
+    let current = ''
+    for (let word of text.split(/\s+/)) {
+      while (word.length > limit) { // A single word longer than a message
+        if (current) chunks.push(current)
+        current = ''
+        chunks.push(word.slice(0, limit))
+        word = word.slice(limit)
+      }
+      if (!word) continue
+      if (!current) {
+        current = word
+      } else if (current.length + 1 + word.length <= limit) {
+        current += ' ' + word
+      } else {
+        chunks.push(current)
+        current = word
       }
     }
-}
+    if (current) chunks.push(current)
+    return chunks
+  }
 
-function createBot(options) {
-  if (bot) {
-    try {
-        bot.quit()
-    } catch (e) {}
+  function say(text, priority = 'normal') {
+    if (!bot) return 0
+    const chunks = text.startsWith('/') ? [text] : chunkChat(text, chatLengthLimit())
+    if (chunks.length > 1) chatStats.chunked++
+    chatQueue[priority].push(...chunks)
+    // Over the limit: drop the oldest replies; acknowledgements are kept
+    let excess = chatQueue.high.length + chatQueue.normal.length - chatMaxQueue
+    while (excess-- > 0 && chatQueue.normal.length) {
+      chatQueue.normal.shift()
+      chatStats.dropped++
+    }
+    pumpChat(true)
+    return chunks.length
   }
 
-  try {
-    log('info', `Connecting to ${options.host}:${options.port} as ${options.username}...`)
-    
-    bot = mineflayer.createBot({
-      host: options.host,
-      port: parseInt(options.port),
-      username: options.username,
-      auth: options.auth || 'offline',
-      version: options.version === 'auto' ? false : options.version
-    })
-
-    bot.loadPlugin(pathfinder)
-
-    let hasSpawned = false
-    bot.on('spawn', () => {
-      log('status', 'Spawned')
-      
-      if (!hasSpawned) {
-        hasSpawned = true
-        log('info', 'Bot has spawned in the world.')
-        
-        // Apply skin if configured
-        if (options.skin) {
-            setTimeout(() => {
-                log('info', `Applying skin: ${options.skin}`)
-                if (options.skin.startsWith('http')) {
-                    // URL skin (SkinRestorer format: /skin set web slim "URL" Name)
-                    bot.chat(`/skin set web slim "${options.skin}" ${bot.username}`)
-                }
-            }, 2000) // Wait 2 seconds to ensure server is ready
+  function pumpChat(changed = false) {
+    const now = performance.now()
+    chatTokens = Math.min(chatBurst, chatTokens + (now - chatRefilledAt) / 1000 * chatRate)
+    chatRefilledAt = now
+    while (chatTokens >= 1 && (chatQueue.high.length || chatQueue.normal.length)) {
+      bot.chat(chatQueue.high.length ? chatQueue.high.shift() : chatQueue.normal.shift())
+      chatTokens -= 1
+      chatStats.sent++
+      changed = true
+    }
+    const depth = chatQueue.high.length + chatQueue.normal.length
+    if (depth && !chatTimer) {
+      chatTimer = setTimeout(() => {
+        chatTimer = null
+        pumpChat()
+      }, Math.ceil((1 - chatTokens) / chatRate * 1000))
+    }
+    if (changed) log('chat_queue', { depth, ...chatStats })
+  }
+
+  function resetChat(options) {
+    if (chatTimer) clearTimeout(chatTimer)
+    chatTimer = null
+    chatStats.dropped += chatQueue.high.length + chatQueue.normal.length
+    chatQueue.high.length = 0
+    chatQueue.normal.length = 0
+    if (options) {
+      chatRate = options.chatRate || 1
+      chatBurst = options.chatBurst || 3
+      chatMaxQueue = options.chatMaxQueue || 20
+    }
+    chatTokens = chatBurst
+    chatRefilledAt = performance.now()
+  }
+
+  // Bots answer to their own username; the main one also to its character
+  // name. Rebuilt when this or another bot's username changes.
+  let matcher = null
+  let matcherKey = null
+
+  function intentMatcher() {
+    const names = [bot.username]
+    if (id === DEFAULT_BOT) names.push('yazuki', 'hey bot')
+    const others = [...sessions.values()]
+      .filter(session => session.id !== id && session.bot && session.bot.username)
+      .map(session => session.bot.username)
+    const key = JSON.stringify([names, others])
+    if (key !== matcherKey) {
+      matcher = createIntentMatcher(names, others)
+      matcherKey = key
+    }
+    return matcher
+  }
+
+  // Runs a recognized chat or voice command; returns { intent, anchored,
+  // reply } or null when the line isn't one. Only anchored commands (the
+  // whole line) are answered by the reply alone; see intents.js
+  function processNaturalLanguageCommand(username, message, isVoice = false) {
+      if (!bot) return null
+
+      const match = intentMatcher()(message, { players: Object.keys(bot.players), isVoice })
+      if (!match) return null
+
+      let reply
+      if (match.intent === 'come' || match.intent === 'follow') {
+        const name = match.player || username
+        const isSpeaker = name === username
+        if (!setGoal({ type: match.intent === 'come' ? 'near' : 'follow', username: name })) {
+          reply = isSpeaker ? "I can't see you!" : `I can't see ${name}!`
+        } else if (match.intent === 'come') {
+          reply = isSpeaker ? "Coming!" : `Coming to ${name}!`
+        } else {
+          reply = isSpeaker ? "Following you!" : `Following ${name}!`
         }
+      } else if (match.intent === 'stop') {
+        setGoal(null)
+        reply = "Stopped."
+      } else if (match.intent === 'goto') {
+        const { x, y, z } = match
+        setGoal({ type: 'block', x, y, z })
+        reply = `Going to ${x} ${y} ${z}`
       }
-    })
+      say(reply, 'high')
+      return { intent: match.intent, anchored: match.anchored, reply }
+  }
 
-    bot.on('chat', (username, message) => {
-      if (username === bot.username) return
-      log('chat', { username, message })
-      processNaturalLanguageCommand(username, message)
-    })
+  function createBot(options) {
+    if (bot) {
+      const previous = bot
+      bot = null // So its 'end' isn't taken for a lost connection
+      try {
+          previous.quit()
+      } catch (e) {}
+    }
+    lastOptions = options
+    quitting = false
+    connected = false
 
-    bot.on('error', (err) => {
-      log('error', err.message)
-    })
+    try {
+      log('info', `Connecting to ${options.host}:${options.port} as ${options.username}...`)
+
+      bot = mineflayer.createBot({
+        host: options.host,
+        port: parseInt(options.port),
+        username: options.username,
+        auth: options.auth || 'offline',
+        version: options.version === 'auto' ? false : options.version
+      })
+
+      bot.loadPlugin(pathfinder)
+      stateRadius = options.stateRadius || 16
+      resetChat(options)
+      currentGoal = null
+      movements = null
+      movementsKey = null
+
+      // Search budgets: tickTimeout is how much of each 50 ms tick the search
+      // may use, so keep it low enough for chat and IPC to stay responsive
+      if (options.thinkTimeout) bot.pathfinder.thinkTimeout = options.thinkTimeout
+      if (options.tickTimeout) bot.pathfinder.tickTimeout = options.tickTimeout
+      if (options.searchRadius) bot.pathfinder.searchRadius = options.searchRadius
 
+      // One report per search; 'partial' means it continues on the next tick
+      bot.on('path_update', (results) => {
+        if (results.status === 'partial') return
+        log('path', {
+          goal: currentGoal,
+          status: results.status,
+          planMs: Math.round(results.time * 10) / 10,
+          nodes: results.visitedNodes,
+          length: results.path.length
+        })
+      })
 
-    bot.on('end', () => {
-      log('status', 'Disconnected')
-    })
-    
-    bot.on('kicked', (reason) => {
-        log('error', 'Kicked: ' + reason)
-    })
+      bot.on('goal_reached', () => {
+        log('path', { goal: currentGoal, status: 'reached', elapsedMs: Math.round(performance.now() - goalStartedAt) })
+        currentGoal = null
+        goalSpec = null
+        log('goal', null)
+      })
 
-  } catch (err) {
-    log('error', err.message)
+      const thisBot = bot
+      let hasSpawned = false
+      bot.on('spawn', () => {
+        connected = true
+        log('status', 'Spawned')
+        refreshMovements() // Respawns and dimension changes also fire 'spawn'
+        startStateStream(options.stateRate === undefined ? 2 : options.stateRate)
+
+        if (!hasSpawned) {
+          hasSpawned = true
+          log('info', 'Bot has spawned in the world.')
+          send('memory', memoryReport())
+          if (disconnectedAt) {
+            log('reconnected', { attempts: reconnectAttempt, downtimeMs: Math.round(performance.now() - disconnectedAt) })
+          }
+          connectedAt = performance.now()
+          disconnectedAt = 0
+          restoreGoal()
+
+          // Apply skin if configured
+          if (options.skin) {
+              setTimeout(() => {
+                  log('info', `Applying skin: ${options.skin}`)
+                  if (options.skin.startsWith('http')) {
+                      // URL skin (SkinRestorer format: /skin set web slim "URL" Name)
+                      say(`/skin set web slim "${options.skin}" ${bot.username}`, 'high')
+                  }
+              }, 2000) // Wait 2 seconds to ensure server is ready
+          }
+        }
+      })
+
+      bot.on('chat', (username, message) => {
+        if (username === bot.username) return
+        // Commands run first so the app knows not to answer them itself
+        const handled = processNaturalLanguageCommand(username, message)
+        log('chat', { username, message, intent: handled ? handled.intent : null, anchored: Boolean(handled && handled.anchored) })
+      })
+
+      bot.on('error', (err) => {
+        log('error', err.message)
+      })
+
+
+      bot.on('end', (reason) => {
+        if (bot !== thisBot) return // Replaced by a newer connection
+        connected = false
+        stopStateStream()
+        resetChat()
+        log('status', 'Disconnected')
+        if (quitting || options.reconnect === false) return
+        if (connectedAt && performance.now() - connectedAt > STABLE_CONNECTION_MS) reconnectAttempt = 0
+        connectedAt = 0
+        if (!disconnectedAt) disconnectedAt = performance.now()
+        scheduleReconnect(reason)
+      })
+
+      bot.on('kicked', (reason) => {
+          log('error', 'Kicked: ' + reason)
+      })
+
+    } catch (err) {
+      log('error', err.message)
+    }
   }
-}
 
-rl.on('line', (line) => {
-  try {
-    const msg = JSON.parse(line)
-    
+  function findPlayerEntity(username) {
+    return bot.players[username] ? bot.players[username].entity : null
+  }
+
+  // Runs one command from Python. The return value is sent back as the ack's
+  // result; throwing sends the error instead.
+  function handleCommand(msg) {
     if (msg.command === 'connect') {
+      cancelReconnect()
+      goalSpec = msg.options.restoreGoal || null // Set when Python restarted the host
       createBot(msg.options)
-    } else if (msg.command === 'chat') {
-      if (bot) bot.chat(msg.message)
-    } else if (msg.command === 'quit') {
+      return 'connecting'
+    }
+    if (msg.command === 'quit') {
+      quitting = true
+      cancelReconnect()
       if (bot) bot.quit()
+      return true
+    }
+    if (!bot) throw new Error('Not connected')
+    if (!connected) throw new Error(reconnectTimer ? 'Reconnecting' : 'Not connected yet')
+
+    if (msg.command === 'chat') {
+      return { queued: say(msg.message) }
     } else if (msg.command === 'follow') {
-        if (bot) {
-            const target = bot.players[msg.username] ? bot.players[msg.username].entity : null
-            if (target) {
-                bot.pathfinder.setMovements(new Movements(bot))
-                bot.pathfinder.setGoal(new GoalFollow(target, 1), true)
-                bot.chat(`Following ${msg.username}`)
-            } else {
-                log('info', `Cannot follow ${msg.username}: Player not found/visible`)
-            }
-        }
+      if (!setGoal({ type: 'follow', username: msg.username })) {
+        log('info', `Cannot follow ${msg.username}: Player not found/visible`)
+        throw new Error(`Player ${msg.username} not found/visible`)
+      }
+      say(`Following ${msg.username}`, 'high')
     } else if (msg.command === 'stop') {
-        if (bot) {
-            bot.pathfinder.setGoal(null)
-            bot.chat("Stopped moving.")
-        }
+      setGoal(null)
+      say("Stopped moving.", 'high')
     } else if (msg.command === 'come') {
-        if (bot) {
-            const target = bot.players[msg.username] ? bot.players[msg.username].entity : null
-            if (target) {
-                const p = target.position
-                bot.pathfinder.setMovements(new Movements(bot))
-                bot.pathfinder.setGoal(new GoalNear(p.x, p.y, p.z, 1))
-                bot.chat(`Coming to ${msg.username}`)
-            }
-        }
+      const target = findPlayerEntity(msg.username)
+      if (!target || !setGoal({ type: 'near', username: msg.username })) {
+        throw new Error(`Player ${msg.username} not found/visible`)
+      }
+      const p = target.position
+      say(`Coming to ${msg.username}`, 'high')
+      return { x: p.x, y: p.y, z: p.z }
     } else if (msg.command === 'voice') {
-        if (bot) {
-            processNaturalLanguageCommand(msg.username, msg.text, true)
-        }
+      return processNaturalLanguageCommand(msg.username, msg.text, true) || { intent: null }
+    } else if (msg.command === 'state_sync') {
+      publishState(true)
+    } else {
+      throw new Error(`Unknown command: ${msg.command}`)
     }
+    return true
+  }
+
+  return {
+    id,
+    handleCommand,
+    get bot() { return bot }
+  }
+}
+
+// Routes a command to its bot; 'connect' starts a new session
+function handleCommand(msg) {
+  if (msg.command === 'memory') return memoryReport()
+  const id = msg.bot || DEFAULT_BOT
+  let session = sessions.get(id)
+  if (!session) {
+    if (msg.command !== 'connect') throw new Error('Not connected')
+    session = createSession(id)
+    sessions.set(id, session)
+  }
+  const result = session.handleCommand(msg)
+  if (msg.command === 'quit') sessions.delete(id)
+  return result
+}
+
+// Commands with an id get an ack carrying the result or the error
+function onCommand(msg) {
+  try {
+    const result = handleCommand(msg)
+    if (msg.id !== undefined) send('ack', { id: msg.id, ok: true, result: result === undefined ? null : result })
   } catch (e) {
-    // Ignore invalid JSON
+    if (msg.id !== undefined) send('ack', { id: msg.id, ok: false, error: e.message })
   }
+}
+
+rl.on('line', (line) => {
+  let msg
+  try {
+    msg = JSON.parse(line)
+  } catch (e) {
+    return // Ignore invalid JSON
+  }
+  onCommand(msg)
 })
 
-log('status', 'Ready')
+if (process.env.YAZUKI_IPC) {
+  const codec = process.env.YAZUKI_IPC_CODEC === 'msgpack' ? CODEC_MSGPACK : CODEC_JSON
+  channel = connectChannel(process.env.YAZUKI_IPC, codec, onCommand)
+}
+
+send('status', 'Ready')
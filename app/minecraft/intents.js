@@ -0,0 +1,151 @@
+// Intent matching for chat and voice commands.
+// Command phrases are compiled into an Aho-Corasick automaton over words, so
+// a line is scanned a single time however many phrases there are and phrases
+// only match whole words ('stop' doesn't match 'stopwatch'). Slots after a
+// phrase are filled from the following words: a player name the bot knows,
+// or x y z coordinates.
+
+// Earlier rules win when several match; within a rule, the earliest and then
+// longest phrase. `directed`: only when addressed to the bot (voice, or the
+// line names it) or when the command is the whole line; `alone` narrows that
+// to the listed lines. `slot`: what has to follow the phrase; `optional`
+// slots fall back to the speaker.
+const RULES = [
+  { intent: 'come', phrases: ['come here', 'come to me', 'come over'] },
+  { intent: 'come', phrases: ['come to'], slot: 'player', directed: true },
+  { intent: 'stop', phrases: ['stop', 'stop following', 'stay here', 'wait here'], directed: true, alone: ['stop', 'stop following'] },
+  { intent: 'follow', phrases: ['follow me', 'come with me'], directed: true, alone: ['follow me'] },
+  { intent: 'follow', phrases: ['follow'], slot: 'player', optional: true, directed: true },
+  { intent: 'goto', phrases: ['goto', 'go to'], slot: 'coords', directed: true }
+]
+
+const NUMBER = /^-?\d+(\.\d+)?$/
+
+function tokenize(text) {
+  // Lowercase words; numbers keep their sign and decimals ("-10.5")
+  return text.toLowerCase().match(/-?\d+(?:\.\d+)?|\w+/g) || []
+}
+
+function compile(rules) {
+  const root = { next: new Map(), fail: null, out: [] }
+  rules.forEach((rule, priority) => {
+    for (const phrase of rule.phrases) {
+      const words = tokenize(phrase)
+      let node = root
+      for (const word of words) {
+        if (!node.next.has(word)) node.next.set(word, { next: new Map(), fail: root, out: [] })
+        node = node.next.get(word)
+      }
+      node.out.push({ rule, priority, length: words.length })
+    }
+  })
+
+  // Breadth-first failure links; each node also reports its suffixes' outputs
+  const queue = [...root.next.values()]
+  while (queue.length) {
+    const node = queue.shift()
+    for (const [word, child] of node.next) {
+      let fail = node.fail
+      while (fail && !fail.next.has(word)) fail = fail.fail
+      child.fail = fail ? fail.next.get(word) : root
+      child.out = child.out.concat(child.fail.out)
+      queue.push(child)
+    }
+  }
+  return root
+}
+
+function scan(automaton, words) {
+  const matches = []
+  let node = automaton
+  words.forEach((word, index) => {
+    while (node !== automaton && !node.next.has(word)) node = node.fail
+    node = node.next.get(word) || automaton
+    for (const out of node.out) {
+      matches.push({ ...out, start: index - out.length + 1, end: index + 1 })
+    }
+  })
+  return matches
+}
+
+function playerSlot(words, index, players) {
+  const word = words[index]
+  if (!word) return null
+  return players.find(name => name.toLowerCase() === word) || null
+}
+
+function coordsSlot(words, index) {
+  // Decimal coordinates name the block they fall in
+  const values = words.slice(index, index + 3)
+  if (values.length < 3 || !values.every(word => NUMBER.test(word))) return null
+  const [x, y, z] = values.map(word => Math.floor(Number(word)))
+  return { x, y, z }
+}
+
+// Builds a matcher for one bot. `names` address it ("yazuki follow me");
+// `others` address other bots, and lines meant only for them are ignored.
+// The matcher returns { intent, anchored, player?, x?, y?, z? } or null.
+// `anchored`: the command is the whole line, apart from address words at
+// either end, so nothing else was said that needs an answer. `players` are
+// the names the bot can see; `isVoice` lines are addressed to it unless they
+// name another bot.
+function createIntentMatcher(names = [], others = []) {
+  const automaton = compile(RULES.concat(
+    { intent: 'address', phrases: names },
+    { intent: 'other', phrases: others }
+  ))
+
+  return (text, { players = [], isVoice = false } = {}) => {
+    const words = tokenize(text)
+    const line = words.join(' ')
+    const matches = scan(automaton, words)
+    const addressed = matches.some(m => m.rule.intent === 'address')
+    if (!addressed && matches.some(m => m.rule.intent === 'other')) return null
+    const directed = isVoice || addressed
+
+    // Address words at the start and end don't count against anchoring
+    const address = matches.filter(m => m.rule.intent === 'address' || m.rule.intent === 'other')
+    let first = 0
+    for (const m of address.slice().sort((a, b) => a.start - b.start)) {
+      if (m.start === first) first = m.end
+    }
+    let last = words.length
+    for (const m of address.slice().sort((a, b) => b.end - a.end)) {
+      if (m.end === last && m.start >= first) last = m.start
+    }
+
+    const commands = matches.filter(m => m.rule.intent !== 'address' && m.rule.intent !== 'other')
+    commands.sort((a, b) => a.priority - b.priority || a.start - b.start || b.length - a.length)
+    for (const match of commands) {
+      const { rule } = match
+      if (rule.directed && !directed && rule.alone && !rule.alone.includes(line)) continue
+      let result = null
+      let end = match.end
+      if (rule.slot === 'coords') {
+        const coords = coordsSlot(words, match.end)
+        if (coords) {
+          result = { intent: rule.intent, ...coords }
+          end += 3
+        }
+      } else if (rule.slot === 'player') {
+        const player = playerSlot(words, match.end, players)
+        if (player) {
+          result = { intent: rule.intent, player }
+          end += 1
+        } else if (rule.optional) {
+          result = { intent: rule.intent }
+        }
+      } else {
+        result = { intent: rule.intent }
+      }
+      if (!result) continue
+      const anchored = match.start === first && end === last
+      // Chat that doesn't name the bot only counts as a command on its own
+      if (rule.directed && !directed && !anchored) continue
+      return { ...result, anchored }
+    }
+    return null
+  }
+}
+
+module.exports = { RULES, tokenize, createIntentMatcher }
@@ -0,0 +1,174 @@
+// Length-prefixed message channel to the Python app.
+// Frame: 4-byte big-endian payload length, 1 codec byte, payload.
+// Codec 0 = JSON (UTF-8), 1 = MessagePack.
+const net = require('net')
+
+const CODEC_JSON = 0
+const CODEC_MSGPACK = 1
+const MAX_FRAME = 64 * 1024 * 1024
+
+// Minimal MessagePack encoder (nil, bool, numbers, strings, arrays, maps).
+// Writes into one growing buffer; a scratch buffer is reused across calls.
+let scratch = Buffer.allocUnsafe(64 * 1024)
+
+function msgpackEncode(value) {
+  let buf = scratch
+  let pos = 0
+
+  function reserve(n) {
+    if (pos + n <= buf.length) return
+    const grown = Buffer.allocUnsafe(Math.max(buf.length * 2, pos + n))
+    buf.copy(grown, 0, 0, pos)
+    buf = grown
+  }
+
+  function lengthHeader(n, fix, b16, b32) {
+    reserve(5)
+    if (n < 16) {
+      buf[pos++] = fix | n
+    } else if (n < 0x10000) {
+      buf[pos++] = b16
+      buf.writeUInt16BE(n, pos)
+      pos += 2
+    } else {
+      buf[pos++] = b32
+      buf.writeUInt32BE(n, pos)
+      pos += 4
+    }
+  }
+
+  function enc(v) {
+    if (v === null || v === undefined) {
+      reserve(1)
+      buf[pos++] = 0xc0
+    } else if (v === true || v === false) {
+      reserve(1)
+      buf[pos++] = v ? 0xc3 : 0xc2
+    } else if (typeof v === 'number') {
+      reserve(9)
+      if (Number.isInteger(v) && v >= 0 && v < 0x80) {
+        buf[pos++] = v
+      } else if (Number.isInteger(v) && v < 0 && v >= -32) {
+        buf[pos++] = 0x100 + v
+      } else if (Number.isInteger(v) && v >= -0x80000000 && v <= 0x7fffffff) {
+        buf[pos++] = 0xd2
+        buf.writeInt32BE(v, pos)
+        pos += 4
+      } else {
+        buf[pos++] = 0xcb
+        buf.writeDoubleBE(v, pos)
+        pos += 8
+      }
+    } else if (typeof v === 'string') {
+      // Worst case 3 bytes per UTF-16 unit; write, then fix up the header
+      const max = v.length * 3
+      reserve(5 + max)
+      const headerSize = max < 32 ? 1 : max < 0x100 ? 2 : max < 0x10000 ? 3 : 5
+      const length = buf.write(v, pos + headerSize, 'utf8')
+      if (headerSize === 1) {
+        buf[pos] = 0xa0 | length
+      } else if (headerSize === 2) {
+        buf[pos] = 0xd9
+        buf[pos + 1] = length
+      } else if (headerSize === 3) {
+        buf[pos] = 0xda
+        buf.writeUInt16BE(length, pos + 1)
+      } else {
+        buf[pos] = 0xdb
+        buf.writeUInt32BE(length, pos + 1)
+      }
+      pos += headerSize + length
+    } else if (Array.isArray(v)) {
+      lengthHeader(v.length, 0x90, 0xdc, 0xdd)
+      for (const item of v) enc(item)
+    } else if (typeof v === 'object') {
+      const keys = Object.keys(v).filter(k => v[k] !== undefined)
+      lengthHeader(keys.length, 0x80, 0xde, 0xdf)
+      for (const k of keys) {
+        enc(k)
+        enc(v[k])
+      }
+    } else {
+      enc(String(v))
+    }
+  }
+
+  enc(value)
+  if (buf.length <= 1024 * 1024) scratch = buf
+  return buf.subarray(0, pos) // Only valid until the next call; copy to keep it
+}
+
+function encodeFrame(message, codec) {
+  if (codec === CODEC_MSGPACK) {
+    const payload = msgpackEncode(message)
+    const frame = Buffer.allocUnsafe(payload.length + 5)
+    frame.writeUInt32BE(payload.length, 0)
+    frame[4] = codec
+    payload.copy(frame, 5)
+    return frame
+  }
+  const text = JSON.stringify(message)
+  const frame = Buffer.allocUnsafe(Buffer.byteLength(text, 'utf8') + 5)
+  const length = frame.write(text, 5, 'utf8')
+  frame.writeUInt32BE(length, 0)
+  frame[4] = CODEC_JSON
+  return frame
+}
+
+// Incoming frames from Python (always JSON)
+function createFrameDecoder(onMessage) {
+  let buffer = Buffer.alloc(0)
+  return (chunk) => {
+    buffer = buffer.length ? Buffer.concat([buffer, chunk]) : chunk
+    let offset = 0
+    while (buffer.length - offset >= 5) {
+      const length = buffer.readUInt32BE(offset)
+      if (length > MAX_FRAME) {
+        buffer = Buffer.alloc(0)
+        return
+      }
+      if (buffer.length - offset < 5 + length) break
+      const codec = buffer[offset + 4]
+      const payload = buffer.subarray(offset + 5, offset + 5 + length)
+      offset += 5 + length
+      if (codec !== CODEC_JSON) continue
+      try {
+        onMessage(JSON.parse(payload.toString('utf8')))
+      } catch (e) {
+        // Ignore invalid JSON
+      }
+    }
+    buffer = buffer.subarray(offset)
+  }
+}
+
+// Connects to the path Python passed in; until connected, messages are buffered
+function connectChannel(path, codec, onMessage, onConnect) {
+  const pending = []
+  let connected = false
+  const socket = net.createConnection(path)
+  socket.setNoDelay(true)
+  socket.on('connect', () => {
+    connected = true
+    for (const frame of pending) socket.write(frame)
+    pending.length = 0
+    if (onConnect) onConnect()
+  })
+  socket.on('data', createFrameDecoder(onMessage))
+  socket.on('error', (err) => {
+    console.error(`IPC channel error: ${err.message}`)
+  })
+  socket.on('close', () => {
+    // Python side went away; nothing left to talk to
+    process.exit(0)
+  })
+  return {
+    send(message) {
+      const frame = encodeFrame(message, codec)
+      if (connected) socket.write(frame)
+      else pending.push(frame)
+    }
+  }
+}
+
+module.exports = { CODEC_JSON, CODEC_MSGPACK, msgpackEncode, encodeFrame, createFrameDecoder, connectChannel }
@@ -0,0 +1,180 @@
+// Local stand-in for a Minecraft server, for running the bot without a
+// network or a real server. Speaks protocol 1.12.2 in offline mode, sends a
+// small flat world and a fake owner player that walks in a circle.
+//
+//   node local_server.js [--port 25566] [--owner Owner]
+//
+// Events go to stdout as JSON lines ({ type, data }); commands come in on
+// stdin as JSON lines:
+//   { "command": "flood", "count": 1000, "rate": 0 }  owner chat lines
+//       "flood <seq> <Date.now()>", rate per second (0 = all at once)
+//   { "command": "say", "text": "follow me" }          owner says one line
+//   { "command": "owner", "x": 20, "z": 20, "walk": false }
+const mc = require('minecraft-protocol')
+const Vec3 = require('vec3')
+const crypto = require('crypto')
+const readline = require('readline')
+
+const VERSION = '1.12.2'
+const mcData = require('minecraft-data')(VERSION)
+const Chunk = require('prismarine-chunk')(VERSION)
+
+const GROUND_Y = 4 // Players stand on top of bedrock, dirt and grass
+const VIEW_RADIUS = 3 // Chunks sent around spawn
+const OWNER_ENTITY_ID = 100000
+const OWNER_CIRCLE = 6 // Blocks; radius the owner walks around spawn
+
+function argValue(name, fallback) {
+  const index = process.argv.indexOf(name)
+  return index >= 0 && index + 1 < process.argv.length ? process.argv[index + 1] : fallback
+}
+
+function report(type, data) {
+  console.log(JSON.stringify({ type, data }))
+}
+
+function flatChunkData() {
+  const chunk = new Chunk()
+  const { bedrock, dirt, grass } = mcData.blocksByName
+  for (let x = 0; x < 16; x++) {
+    for (let z = 0; z < 16; z++) {
+      chunk.setBlockType(new Vec3(x, 0, z), bedrock.id)
+      for (let y = 1; y < GROUND_Y - 1; y++) chunk.setBlockType(new Vec3(x, y, z), dirt.id)
+      chunk.setBlockType(new Vec3(x, GROUND_Y - 1, z), grass.id)
+      for (let y = 0; y < 16; y++) chunk.setSkyLight(new Vec3(x, y, z), 15)
+    }
+  }
+  return { bitMap: chunk.getMask(), chunkData: chunk.dump() }
+}
+
+const owner = {
+  name: argValue('--owner', 'Owner'),
+  uuid: crypto.randomUUID(),
+  x: OWNER_CIRCLE + 0.5,
+  z: 0.5,
+  angle: 0,
+  walk: true
+}
+
+const server = mc.createServer({
+  'online-mode': false,
+  host: '127.0.0.1',
+  port: parseInt(argValue('--port', '25566')),
+  version: VERSION,
+  maxPlayers: 20,
+  motd: 'Yazuki local test server'
+})
+const world = flatChunkData()
+
+function players() {
+  return Object.values(server.clients).filter(client => client.state === mc.states.PLAY)
+}
+
+function ownerChat(text) {
+  const message = JSON.stringify({ translate: 'chat.type.text', with: [{ text: owner.name }, text] })
+  for (const client of players()) client.write('chat', { message, position: 0 })
+}
+
+function moveOwner() {
+  for (const client of players()) {
+    client.write('entity_teleport', { entityId: OWNER_ENTITY_ID, x: owner.x, y: GROUND_Y, z: owner.z, yaw: 0, pitch: 0, onGround: true })
+  }
+}
+
+server.on('listening', () => {
+  report('listening', { port: server.socketServer.address().port, version: VERSION })
+})
+
+server.on('playerJoin', (client) => {
+  client.write('login', {
+    entityId: client.id,
+    gameMode: 0,
+    dimension: 0,
+    difficulty: 2,
+    maxPlayers: server.maxPlayers,
+    levelType: 'flat',
+    reducedDebugInfo: false
+  })
+  client.write('spawn_position', { location: { x: 0, y: GROUND_Y, z: 0 } })
+  for (let x = -VIEW_RADIUS; x <= VIEW_RADIUS; x++) {
+    for (let z = -VIEW_RADIUS; z <= VIEW_RADIUS; z++) {
+      client.write('map_chunk', { x, z, groundUp: true, bitMap: world.bitMap, chunkData: world.chunkData, blockEntities: [] })
+    }
+  }
+  client.write('position', { x: 0.5, y: GROUND_Y, z: 0.5, yaw: 0, pitch: 0, flags: 0, teleportId: 1 })
+  client.write('update_health', { health: 20, food: 20, foodSaturation: 5 })
+
+  client.write('player_info', {
+    action: 'add_player',
+    data: [{ uuid: owner.uuid, name: owner.name, properties: [], gamemode: 0, ping: 0 }]
+  })
+  client.write('named_entity_spawn', {
+    entityId: OWNER_ENTITY_ID,
+    playerUUID: owner.uuid,
+    x: owner.x,
+    y: GROUND_Y,
+    z: owner.z,
+    yaw: 0,
+    pitch: 0,
+    metadata: []
+  })
+
+  client.on('chat', (packet) => {
+    report('bot_chat', { username: client.username, message: packet.message, t: Date.now() })
+  })
+  client.on('end', () => {
+    report('leave', { username: client.username })
+  })
+  report('join', { username: client.username })
+})
+
+setInterval(() => {
+  if (!owner.walk) return
+  owner.angle += 0.05
+  owner.x = Math.cos(owner.angle) * OWNER_CIRCLE + 0.5
+  owner.z = Math.sin(owner.angle) * OWNER_CIRCLE + 0.5
+  moveOwner()
+}, 100)
+
+// Sends `count` lines at `rate` per second in 10 ms batches, so rates above
+// the timer resolution still hold
+function flood(count, rate) {
+  const start = performance.now()
+  let sent = 0
+  const sendUpTo = (target) => {
+    for (; sent < Math.min(target, count); sent++) ownerChat(`flood ${sent} ${Date.now()}`)
+  }
+  if (!(rate > 0)) {
+    sendUpTo(count)
+    report('flood_done', { count, ms: performance.now() - start })
+    return
+  }
+  const timer = setInterval(() => {
+    sendUpTo(Math.floor((performance.now() - start) / 1000 * rate) + 1)
+    if (sent >= count) {
+      clearInterval(timer)
+      report('flood_done', { count, ms: performance.now() - start })
+    }
+  }, 10)
+}
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false })
+rl.on('line', (line) => {
+  let msg
+  try {
+    msg = JSON.parse(line)
+  } catch (e) {
+    return
+  }
+  if (msg.command === 'flood') {
+    flood(msg.count || 100, msg.rate || 0)
+  } else if (msg.command === 'say') {
+    ownerChat(String(msg.text))
+  } else if (msg.command === 'owner') {
+    if (msg.walk !== undefined) owner.walk = Boolean(msg.walk)
+    if (msg.x !== undefined) owner.x = msg.x
+    if (msg.z !== undefined) owner.z = msg.z
+    moveOwner()
+  }
+})
+rl.on('close', () => process.exit(0))
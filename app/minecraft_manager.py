@@ -1,12 +1,60 @@
 import json
 import os
-from PySide6.QtCore import QObject, Signal, QProcess, QByteArray # type: ignore
+import time
+import random
+import codecs
+from collections import deque
+from concurrent.futures import Future
+from PySide6.QtCore import QObject, Signal, QProcess, QProcessEnvironment, QByteArray, QTimer, QThread # type: ignore
+from PySide6.QtNetwork import QLocalServer # type: ignore
+from app.ipc_framing import JsonLineDecoder, FrameDecoder, encode_frame, msgpack_available
+from app.world_state import WorldState
+
+# Commands not acknowledged within this many seconds fail with TimeoutError
+COMMAND_TIMEOUT = 30.0
+
+# How long speech handling waits to hear whether the bot took a voice command
+VOICE_COMMAND_TIMEOUT = 1.0
+
+# The bot configured in the minecraft section; extra_bots are named by their id
+DEFAULT_BOT = 'main'
+
+# A host process that ran this long before exiting restarts without backoff
+STABLE_PROCESS_TIME = 30.0
+
+def backoff_delay(attempt, base, maximum):
+    # Exponential backoff with jitter: uniform in [ceiling/2, ceiling]
+    ceiling = min(maximum, base * 2 ** attempt)
+    return ceiling / 2 + random.random() * ceiling / 2
+
+class MinecraftCommandError(Exception):
+    # The bot received the command but reported an error
+    pass
+
+class BotState:
+    # What the manager tracks for one named bot in the host process
+    def __init__(self, bot_id):
+        self.bot_id = bot_id
+        self.status = "Idle"
+        self.world_state = WorldState() # Read directly when building prompts
+        self.path_reports = deque(maxlen=200) # Pathfinder search results per goal
+        self.chat_queue_stats = {} # Outgoing chat: depth, sent, dropped, chunked
+        self.wants_connection = False # Connected by the user, so restored after a crash
+        self.goal = None # Last goal spec reported by the bot
+        self.reconnect_attempts = 0
+        self.reconnects = 0
+        self.downtime = 0.0 # Seconds spent reconnecting
 
 class MinecraftManager(QObject):
+    # status_changed, chat_received and error_occurred are for the main bot;
+    # the bot_* signals cover every bot and carry its id
     status_changed = Signal(str)
     log_message = Signal(str)
     chat_received = Signal(str, str) # username, message
     error_occurred = Signal(str)
+    bot_status_changed = Signal(str, str) # bot_id, status
+    bot_chat_received = Signal(str, str, str) # bot_id, username, message
+    command_posted = Signal(object, object) # msg, future; from other threads
 
     def __init__(self, config):
         super().__init__()
@@ -15,6 +63,47 @@ class MinecraftManager(QObject):
         self.process.readyReadStandardOutput.connect(self.handle_stdout)
         self.process.readyReadStandardError.connect(self.handle_stderr)
         self.process.finished.connect(self.handle_finished)
+
+        # Reads can end mid-line or mid-character; decoders keep the remainder
+        self.stdout_decoder = JsonLineDecoder()
+        self.stderr_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+        # Protocol channel: a local socket (named pipe on Windows) carrying
+        # length-prefixed frames, so stdout/stderr only carry logs. MessagePack
+        # is used when the msgpack package is installed, JSON otherwise.
+        self.server = None
+        self.channel = None
+        self.channel_decoder = FrameDecoder()
+        self.channel_codec = 'msgpack' if msgpack_available() else 'json'
+        self.server_count = 0
+
+        # Request/response: commands carry an id and the bot acks each one.
+        # Commands sent before the bot reports Ready are queued.
+        self.ready = False
+        self.queued_commands = []
+        self.in_flight = {} # id -> (future, command, sent_at)
+        self.next_command_id = 1
+        self.command_latency = {} # command -> deque of round-trip seconds
+        self.timeout_timer = QTimer()
+        self.timeout_timer.setInterval(1000)
+        self.timeout_timer.timeout.connect(self.expire_commands)
+        self.command_posted.connect(self._post_command)
+
+        # All bots run in one Node process; messages and commands carry a bot id
+        self.bots = {DEFAULT_BOT: BotState(DEFAULT_BOT)}
+        self.memory_samples = {} # bot count -> host process RSS in bytes
+
+        # Supervision: bots reconnect on their own; if the host process dies
+        # unexpectedly it is restarted with backoff and the bots reconnected
+        self.stopping = False
+        self.started_at = 0.0
+        self.restart_attempt = 0
+        self.process_restarts = 0
+        self.process_down_since = None
+        self.process_downtime = 0.0
+        self.restart_timer = QTimer()
+        self.restart_timer.setSingleShot(True)
+        self.restart_timer.timeout.connect(self.restart_bot)
         
         self.node_path = "node" # Assumes node is in PATH
         self.script_path = os.path.join(os.path.dirname(__file__), "minecraft", "bot.js")
@@ -23,6 +112,23 @@ class MinecraftManager(QObject):
         if self.process.state() == QProcess.Running:
             self.stop_bot()
 
+        self.stdout_decoder = JsonLineDecoder()
+        self.stderr_decoder.reset()
+        self.ready = False
+        self.stopping = False
+        self.started_at = time.monotonic()
+        self.restart_timer.stop()
+        for state in self.bots.values():
+            state.world_state.clear()
+            state.status = "Idle"
+        self.memory_samples = {}
+
+        environment = QProcessEnvironment.systemEnvironment()
+        if self.open_channel_server():
+            environment.insert("YAZUKI_IPC", self.server.fullServerName())
+            environment.insert("YAZUKI_IPC_CODEC", self.channel_codec)
+        self.process.setProcessEnvironment(environment)
+
         # Start Node.js process
         self.process.setProgram(self.node_path)
         self.process.setArguments([self.script_path])
@@ -31,85 +137,466 @@ class MinecraftManager(QObject):
         self.status_changed.emit("Starting...")
 
     def stop_bot(self):
+        self.stopping = True
+        self.restart_timer.stop()
+        self.process_down_since = None
+        for state in self.bots.values():
+            state.wants_connection = False
         if self.process.state() == QProcess.Running:
             self.send_command("quit")
             self.process.waitForFinished(1000)
             self.process.kill()
+            self.process.waitForFinished(1000) # Deliver finished() while stopping is set
             self.status_changed.emit("Stopped")
 
-    def connect_to_server(self):
-        if self.process.state() != QProcess.Running:
+    def restart_bot(self):
+        # Relaunch the host after a crash and reconnect the bots that were
+        # connected, restoring each one's goal
+        wanted = [state for state in self.bots.values() if state.wants_connection]
+        self.process_restarts += 1
+        self.start_bot()
+        for state in wanted:
+            options = self.bot_options(state.bot_id)
+            if options is None:
+                continue
+            if state.goal:
+                options["restoreGoal"] = state.goal
+            state.wants_connection = True
+            self.send_command("connect", {"options": options}, state.bot_id)
+
+    def open_channel_server(self):
+        self.close_channel()
+        self.server_count += 1
+        name = f"yazuki-bot-{os.getpid()}-{self.server_count}"
+        QLocalServer.removeServer(name) # Stale socket file from a crash
+        self.server = QLocalServer()
+        self.server.newConnection.connect(self.on_channel_connected)
+        if not self.server.listen(name):
+            print(f"Minecraft IPC: local channel unavailable ({self.server.errorString()}), using stdout")
+            self.server = None
+            return False
+        return True
+
+    def on_channel_connected(self):
+        channel = self.server.nextPendingConnection()
+        if channel is None:
+            return
+        if self.channel is not None:
+            channel.abort() # One bot process, one channel
+            return
+        self.channel = channel
+        self.channel_decoder = FrameDecoder()
+        channel.readyRead.connect(self.handle_channel)
+        self.server.close() # Stop accepting; the bot is connected
+
+    def close_channel(self):
+        if self.channel is not None:
+            self.channel.readyRead.disconnect(self.handle_channel)
+            self.channel.abort()
+            self.channel.deleteLater()
+            self.channel = None
+        if self.server is not None:
+            self.server.close()
+            self.server.deleteLater()
+            self.server = None
+
+    def handle_channel(self):
+        for msg in self.channel_decoder.feed(self.channel.readAll().data()):
+            self.process_message(msg)
+
+    @property
+    def world_state(self):
+        return self.bots[DEFAULT_BOT].world_state
+
+    def bot(self, bot_id):
+        state = self.bots.get(bot_id)
+        if state is None:
+            state = self.bots[bot_id] = BotState(bot_id)
+        return state
+
+    def connect_to_server(self, bot_id=None):
+        # Connects one bot, or the main bot and every entry in extra_bots.
+        # Returns the connect future of `bot_id` (or of the main bot).
+        if self.process.state() == QProcess.NotRunning:
             self.start_bot()
-            # Wait a bit for process to start? 
-            # Actually, we can just send the command, it will be buffered or we wait for "Ready" status.
-            # But for simplicity, let's assume we can send it immediately after start or check state.
-        
+        # Queued until the bot reports Ready
+        if bot_id is None:
+            future = self.connect_to_server(DEFAULT_BOT)
+            for extra in self.config.get('minecraft', {}).get('extra_bots', []):
+                if extra.get('id') and extra['id'] != DEFAULT_BOT:
+                    self.connect_to_server(extra['id'])
+            return future
+
+        options = self.bot_options(bot_id)
+        if options is None:
+            future = Future()
+            future.set_exception(KeyError(f"No Minecraft bot named '{bot_id}' in extra_bots"))
+            return future
+        self.bot(bot_id).wants_connection = True
+        return self.send_command("connect", {"options": options}, bot_id)
+
+    def bot_options(self, bot_id):
+        # Extra bots inherit the main settings and override what they set
+        # (at least username; host/port for another server). Skins aren't inherited.
+        overrides = {}
+        if bot_id != DEFAULT_BOT:
+            extras = self.config.get('minecraft', {}).get('extra_bots', [])
+            overrides = next((e for e in extras if e.get('id') == bot_id), None)
+            if overrides is None:
+                return None
+            overrides = {'skin': '', **overrides}
+        settings = {**self.config.get('minecraft', {}), **overrides}
+
         options = {
-            "host": self.config.get('minecraft', {}).get('host', 'localhost'),
-            "port": self.config.get('minecraft', {}).get('port', 25565),
-            "username": self.config.get('minecraft', {}).get('username', 'Yazuki'),
-            "auth": self.config.get('minecraft', {}).get('auth', 'offline'),
-            "version": self.config.get('minecraft', {}).get('version', 'auto'),
-            "skin": self.config.get('minecraft', {}).get('skin', '')
+            "host": settings.get('host', 'localhost'),
+            "port": settings.get('port', 25565),
+            "username": settings.get('username', 'Yazuki'),
+            "auth": settings.get('auth', 'offline'),
+            "version": settings.get('version', 'auto'),
+            "skin": settings.get('skin', ''),
+            "stateRate": settings.get('state_rate', 2),
+            "stateRadius": settings.get('state_radius', 16),
+            "thinkTimeout": settings.get('path_think_timeout_ms', 5000),
+            "tickTimeout": settings.get('path_tick_timeout_ms', 20),
+            "searchRadius": settings.get('path_search_radius', 64),
+            "chatRate": settings.get('chat_rate', 1.0),
+            "chatBurst": settings.get('chat_burst', 3),
+            "chatMaxQueue": settings.get('chat_max_queue', 20),
+            "reconnect": settings.get('reconnect', True),
+            "reconnectBaseMs": settings.get('reconnect_base_ms', 1000),
+            "reconnectMaxMs": settings.get('reconnect_max_ms', 60000)
         }
-        
-        self.send_command("connect", {"options": options})
+        return options
 
-    def send_chat(self, message):
-        self.send_command("chat", {"message": message})
+    def disconnect_bot(self, bot_id):
+        self.bot(bot_id).wants_connection = False
+        return self.send_command("quit", bot_id=bot_id)
 
-    def command_follow(self, username):
-        self.send_command("follow", {"username": username})
+    def send_chat(self, message, bot_id=DEFAULT_BOT):
+        # Queued by the bot and rate limited; the ack's result is {'queued': chunks}
+        return self.send_command("chat", {"message": message}, bot_id)
 
-    def command_stop(self):
-        self.send_command("stop")
+    def command_follow(self, username, bot_id=DEFAULT_BOT):
+        return self.send_command("follow", {"username": username}, bot_id)
 
-    def command_come(self, username):
-        self.send_command("come", {"username": username})
+    def command_stop(self, bot_id=DEFAULT_BOT):
+        return self.send_command("stop", bot_id=bot_id)
 
-    def send_voice_command(self, username, text):
-        self.send_command("voice", {"username": username, "text": text})
+    def command_come(self, username, bot_id=DEFAULT_BOT):
+        return self.send_command("come", {"username": username}, bot_id)
 
-    def send_command(self, command, data=None):
-        if self.process.state() != QProcess.Running:
-            return
+    def send_voice_command(self, username, text, bot_id=DEFAULT_BOT):
+        # The ack's result is {'intent', 'anchored', 'reply'}; intent is None
+        # if the text wasn't a command
+        return self.send_command("voice", {"username": username, "text": text}, bot_id)
+
+    def run_voice_command(self, username, text, timeout=VOICE_COMMAND_TIMEOUT, bot_id=DEFAULT_BOT):
+        # Blocks until the bot answers, so only call it off the GUI thread.
+        # Returns the bot's reply if it ran the text as a command, else None.
+        # Only a command that was the whole utterance counts; anything else
+        # said along with it still gets an answer from the AI.
+        future = self.send_voice_command(username, text, bot_id)
+        try:
+            result = future.result(timeout)
+        except Exception as e:
+            if not future.done() and not future.cancel():
+                # Already sent; it may still run after the AI has answered
+                print("Voice command sent to Minecraft but not answered in time")
+            else:
+                # Cancelled if still queued, so it doesn't run later
+                print(f"Voice command not sent to Minecraft: {str(e) or 'timed out'}")
+            return None
+        if isinstance(result, dict) and result.get('intent') and result.get('anchored'):
+            return result.get('reply')
+        return None
+
+    def request_memory_report(self):
+        # Host process memory; the ack's result is {'bots', 'rss', 'heapUsed', 'external'}
+        return self.send_command("memory", bot_id=None)
+
+    def send_command(self, command, data=None, bot_id=DEFAULT_BOT):
+        # Returns a Future resolved with the bot's result when it acks the
+        # command, or failed with MinecraftCommandError / TimeoutError
+        future = Future()
+        if self.process.state() == QProcess.NotRunning:
+            future.set_exception(RuntimeError("Minecraft bot is not running"))
+            return future
 
-        msg = {"command": command}
+        msg = {"command": command, "id": None} # Numbered on the GUI thread
+        if bot_id is not None:
+            msg["bot"] = bot_id
         if data:
             msg.update(data)
-        
-        json_str = json.dumps(msg) + "\n"
-        self.process.write(json_str.encode('utf-8'))
+
+        if QThread.currentThread() != self.thread():
+            # The process and socket belong to the GUI thread; write from there
+            self.command_posted.emit(msg, future)
+        else:
+            self._post_command(msg, future)
+        return future
+
+    def _post_command(self, msg, future):
+        msg['id'] = self.next_command_id
+        self.next_command_id += 1
+        if self.ready:
+            self._write_command(msg, future)
+        else:
+            self.queued_commands.append((msg, future))
+
+    def _write_command(self, msg, future):
+        # Once running, a command can no longer be cancelled
+        if not future.set_running_or_notify_cancel():
+            return # Cancelled while queued
+        self.in_flight[msg['id']] = (future, msg['command'], time.monotonic())
+        if not self.timeout_timer.isActive():
+            self.timeout_timer.start()
+        if self.channel is not None:
+            self.channel.write(encode_frame(msg))
+        else:
+            json_str = json.dumps(msg) + "\n"
+            self.process.write(json_str.encode('utf-8'))
+
+    def on_bot_ready(self):
+        self.ready = True
+        queued, self.queued_commands = self.queued_commands, []
+        for msg, future in queued:
+            self._write_command(msg, future)
+
+    def handle_ack(self, data):
+        entry = self.in_flight.pop(data.get('id'), None)
+        if entry is None:
+            return # Already timed out
+        future, command, sent_at = entry
+        self.command_latency.setdefault(command, deque(maxlen=200)).append(time.monotonic() - sent_at)
+        if data.get('ok'):
+            future.set_result(data.get('result'))
+        else:
+            future.set_exception(MinecraftCommandError(data.get('error', 'Unknown error')))
+
+    def expire_commands(self):
+        now = time.monotonic()
+        for command_id, (future, command, sent_at) in list(self.in_flight.items()):
+            if now - sent_at > COMMAND_TIMEOUT:
+                del self.in_flight[command_id]
+                future.set_exception(TimeoutError(f"No response to '{command}' after {COMMAND_TIMEOUT:.0f}s"))
+        if not self.in_flight:
+            self.timeout_timer.stop()
+
+    def fail_pending_commands(self, reason):
+        pending = [future for future, _, _ in self.in_flight.values()]
+        pending += [future for _, future in self.queued_commands if future.set_running_or_notify_cancel()]
+        self.in_flight.clear()
+        self.queued_commands = []
+        self.timeout_timer.stop()
+        for future in pending:
+            future.set_exception(RuntimeError(reason))
+
+    def latency_summary(self):
+        # {command: {'count', 'mean_ms', 'p95_ms', 'max_ms'}} over recent round trips
+        summary = {}
+        for command, samples in self.command_latency.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            summary[command] = {
+                'count': len(ordered),
+                'mean_ms': sum(ordered) * 1000.0 / len(ordered),
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000.0,
+                'max_ms': ordered[-1] * 1000.0,
+            }
+        return summary
+
+    def handle_path_report(self, state, data):
+        state.path_reports.append(data)
+        status = data.get('status')
+        if status in ('timeout', 'noPath'):
+            self.bot_log(state.bot_id, f"Pathfinding {status} for '{data.get('goal')}' after {data.get('planMs', 0):.0f} ms ({data.get('nodes', 0)} nodes)")
+
+    def pathfinding_summary(self, bot_id=DEFAULT_BOT):
+        # {'searches', 'mean_ms', 'max_ms', 'failed', 'reached', 'mean_reach_ms'} over recent goals
+        reports = self.bots[bot_id].path_reports if bot_id in self.bots else []
+        searches = [r for r in reports if 'planMs' in r]
+        reached = [r['elapsedMs'] for r in reports if r.get('status') == 'reached']
+        if not searches and not reached:
+            return {}
+        plan_ms = [r['planMs'] for r in searches]
+        return {
+            'searches': len(searches),
+            'mean_ms': sum(plan_ms) / len(plan_ms) if plan_ms else 0.0,
+            'max_ms': max(plan_ms) if plan_ms else 0.0,
+            'failed': sum(1 for r in searches if r.get('status') != 'success'),
+            'reached': len(reached),
+            'mean_reach_ms': sum(reached) / len(reached) if reached else 0.0,
+        }
+
+    def record_memory(self, data):
+        self.memory_samples[data.get('bots', 0)] = data.get('rss', 0)
+        per_bot = self.memory_per_extra_bot()
+        if per_bot is not None:
+            self.log_message.emit(f"Minecraft host: {data['bots']} bots, {data['rss'] / 1048576:.0f} MB RSS "
+                                  f"(~{per_bot / 1048576:.1f} MB per extra bot)")
+
+    def memory_per_extra_bot(self):
+        # Average RSS growth per bot after the first, in bytes, or None
+        if 1 not in self.memory_samples:
+            return None
+        most = max(self.memory_samples)
+        if most < 2:
+            return None
+        return (self.memory_samples[most] - self.memory_samples[1]) / (most - 1)
+
+    def schedule_restart(self, exit_code):
+        settings = self.config.get('minecraft', {})
+        if self.stopping or not settings.get('restart_on_crash', True):
+            return
+        if not any(state.wants_connection for state in self.bots.values()):
+            return
+        if time.monotonic() - self.started_at > STABLE_PROCESS_TIME:
+            self.restart_attempt = 0
+        delay = backoff_delay(self.restart_attempt, settings.get('reconnect_base_ms', 1000) / 1000.0,
+                              settings.get('reconnect_max_ms', 60000) / 1000.0)
+        self.restart_attempt += 1
+        if self.process_down_since is None:
+            self.process_down_since = time.monotonic()
+        self.log_message.emit(f"Bot process exited unexpectedly (code {exit_code}), restarting in {delay:.1f}s")
+        self.restart_timer.start(int(delay * 1000))
+
+    def supervisor_metrics(self):
+        # Reconnects and downtime for the host process and each bot
+        return {
+            'process_restarts': self.process_restarts,
+            'process_downtime_s': self.process_downtime,
+            'bots': {
+                bot_id: {
+                    'status': state.status,
+                    'reconnect_attempts': state.reconnect_attempts,
+                    'reconnects': state.reconnects,
+                    'downtime_s': state.downtime,
+                }
+                for bot_id, state in self.bots.items()
+            },
+        }
+
+    def bot_log(self, bot_id, message):
+        self.log_message.emit(message if bot_id == DEFAULT_BOT else f"[{bot_id}] {message}")
 
     def handle_stdout(self):
-        data = self.process.readAllStandardOutput().data().decode('utf-8')
-        for line in data.splitlines():
-            if not line.strip(): continue
-            try:
-                msg = json.loads(line)
+        messages, raw_lines = self.stdout_decoder.feed(self.process.readAllStandardOutput().data())
+        self.handle_stdout_lines(messages, raw_lines)
+
+    def handle_stdout_lines(self, messages, raw_lines):
+        # With a channel offered, the bot sends its protocol only there, so
+        # JSON on stdout is just console output and must not be obeyed
+        if self.server is None and self.channel is None:
+            for msg in messages:
                 self.process_message(msg)
-            except json.JSONDecodeError:
-                # Raw log?
-                self.log_message.emit(f"[Raw] {line}")
+        else:
+            raw_lines = [json.dumps(msg) for msg in messages] + raw_lines
+        for line in raw_lines:
+            # Raw log?
+            self.log_message.emit(f"[Raw] {line}")
 
     def handle_stderr(self):
-        data = self.process.readAllStandardError().data().decode('utf-8')
-        self.log_message.emit(f"[Node Error] {data}")
+        data = self.stderr_decoder.decode(self.process.readAllStandardError().data())
+        if data:
+            self.log_message.emit(f"[Node Error] {data}")
 
     def handle_finished(self, exit_code, exit_status):
+        self.handle_stdout_lines(*self.stdout_decoder.flush())
+        if self.channel is not None:
+            self.handle_channel() # Anything still buffered
+        for decoder in (self.stdout_decoder, self.channel_decoder):
+            if decoder.malformed_frames:
+                print(f"Minecraft IPC: {decoder.malformed_frames} malformed frames out of {decoder.frames}")
+        self.close_channel()
+        self.ready = False
+        self.fail_pending_commands("Minecraft bot process ended")
+        for command, stats in self.latency_summary().items():
+            print(f"Minecraft IPC: {command} x{stats['count']}: mean {stats['mean_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+        for bot_id, state in self.bots.items():
+            chat = state.chat_queue_stats
+            if chat:
+                print(f"Minecraft chat [{bot_id}]: {chat.get('sent', 0)} sent, {chat.get('dropped', 0)} dropped, "
+                      f"{chat.get('chunked', 0)} split into several messages")
+            path = self.pathfinding_summary(bot_id)
+            if path:
+                print(f"Minecraft pathfinding [{bot_id}]: {path['searches']} searches, mean {path['mean_ms']:.1f} ms, "
+                      f"max {path['max_ms']:.1f} ms, {path['failed']} failed, {path['reached']} goals reached")
+            if state.reconnect_attempts:
+                print(f"Minecraft reconnects [{bot_id}]: {state.reconnects} of {state.reconnect_attempts} attempts, "
+                      f"{state.downtime:.1f}s down")
+        per_bot = self.memory_per_extra_bot()
+        if per_bot is not None:
+            print(f"Minecraft host: ~{per_bot / 1048576:.1f} MB per extra bot")
+        self.schedule_restart(exit_code)
         self.status_changed.emit("Process Ended")
 
     def process_message(self, msg):
         msg_type = msg.get('type')
         data = msg.get('data')
+        bot_id = msg.get('bot')
 
-        if msg_type == 'status':
+        if msg_type == 'ack':
+            self.handle_ack(data)
+        elif msg_type == 'memory':
+            self.record_memory(data)
+        elif msg_type == 'status' and bot_id is None:
+            # The host process itself
+            if data == 'Ready':
+                self.on_bot_ready()
             self.status_changed.emit(str(data))
+        else:
+            self.process_bot_message(self.bot(bot_id or DEFAULT_BOT), msg_type, data)
+
+    def process_bot_message(self, state, msg_type, data):
+        is_main = state.bot_id == DEFAULT_BOT
+        if msg_type == 'state':
+            if state.world_state.apply(data) and self.ready:
+                self.send_command("state_sync", bot_id=state.bot_id)
+        elif msg_type == 'path':
+            self.handle_path_report(state, data)
+        elif msg_type == 'chat_queue':
+            if data.get('dropped', 0) > state.chat_queue_stats.get('dropped', 0):
+                self.bot_log(state.bot_id, f"Chat queue full, {data['dropped']} messages dropped so far")
+            state.chat_queue_stats = data
+        elif msg_type == 'goal':
+            state.goal = data
+        elif msg_type == 'reconnect':
+            state.reconnect_attempts += 1
+            reason = f" ({data['reason']})" if data.get('reason') else ""
+            self.bot_log(state.bot_id, f"Connection lost{reason}, reconnecting in {data.get('delayMs', 0) / 1000:.1f}s "
+                                       f"(attempt {data.get('attempt')})")
+        elif msg_type == 'reconnected':
+            state.reconnects += 1
+            state.downtime += data.get('downtimeMs', 0) / 1000.0
+            self.bot_log(state.bot_id, f"Reconnected after {data.get('downtimeMs', 0) / 1000:.1f}s")
+        elif msg_type == 'status':
+            state.status = str(data)
+            if data == 'Spawned' and self.process_down_since is not None:
+                self.process_downtime += time.monotonic() - self.process_down_since
+                self.process_down_since = None
+            if data == 'Disconnected':
+                state.world_state.clear()
+            self.bot_status_changed.emit(state.bot_id, state.status)
+            if is_main:
+                self.status_changed.emit(state.status)
+            else:
+                self.bot_log(state.bot_id, state.status)
         elif msg_type == 'info':
-            self.log_message.emit(str(data))
+            self.bot_log(state.bot_id, str(data))
         elif msg_type == 'error':
-            self.error_occurred.emit(str(data))
+            if is_main:
+                self.error_occurred.emit(str(data))
+            else:
+                self.bot_log(state.bot_id, f"Error: {data}")
         elif msg_type == 'chat':
             username = data.get('username')
             message = data.get('message')
-            self.chat_received.emit(username, message)
+            self.bot_chat_received.emit(state.bot_id, username, message)
+            # Every bot on a server hears the same chat; only the main one
+            # answers, and not to lines that were just a command it already
+            # acknowledged in game
+            if is_main and data.get('anchored'):
+                self.log_message.emit(f"{username} gave command '{data['intent']}': {message}")
+            elif is_main:
+                self.chat_received.emit(username, message)
@@ -0,0 +1,263 @@
+import os
+import json
+
+# Blend modes, as used by .exp3.json files
+OVERWRITE = "Overwrite"
+ADD = "Add"
+MULTIPLY = "Multiply"
+
+# Built-in emotions, used when the model doesn't ship a matching expression
+DEFAULT_EMOTIONS = {
+    "Joy": {"ParamEyeLSmile": 1.0, "ParamEyeRSmile": 1.0, "ParamMouthForm": 1.0},
+    "Happy": {"ParamEyeLSmile": 1.0, "ParamEyeRSmile": 1.0, "ParamMouthForm": 1.0},
+    "Anger": {"ParamBrowLY": -0.5, "ParamBrowRY": -0.5, "ParamBrowLAngle": 0.5, "ParamBrowRAngle": 0.5, "ParamMouthForm": -1.0},
+    "Angry": {"ParamBrowLY": -0.5, "ParamBrowRY": -0.5, "ParamBrowLAngle": 0.5, "ParamBrowRAngle": 0.5, "ParamMouthForm": -1.0},
+    "Surprise": {"ParamEyeLOpen": 1.2, "ParamEyeROpen": 1.2, "ParamBrowLY": 0.5, "ParamBrowRY": 0.5, "ParamMouthForm": -0.5},
+    "Neutral": {}
+}
+
+def ease_in_out(t):
+    # Smoothstep: zero slope at both ends so fades don't pop
+    return t * t * (3.0 - 2.0 * t)
+
+def load_model_expressions(model_json):
+    # {name: {param_id: (value, blend)}} from the model's FileReferences.Expressions
+    expressions = {}
+    try:
+        with open(model_json, 'r', encoding='utf-8') as f:
+            refs = json.load(f).get('FileReferences', {}).get('Expressions', [])
+    except Exception as e:
+        print(f"Could not read expressions from {model_json}: {e}")
+        return expressions
+
+    base_dir = os.path.dirname(model_json)
+    for ref in refs:
+        name = ref.get('Name')
+        path = os.path.join(base_dir, ref.get('File', ''))
+        if not name:
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Could not load expression '{name}': {e}")
+            continue
+        expressions[name] = {
+            p['Id']: (float(p.get('Value', 0.0)), p.get('Blend', ADD))
+            for p in data.get('Parameters', []) if 'Id' in p
+        }
+    return expressions
+
+class ParamLayer:
+    """
+    A set of parameter targets over the whole parameter vector, with a weight
+    that eases towards a target over `fade_time` seconds.
+    """
+    __slots__ = ('name', 'values', 'overwrite', 'add', 'multiply', 'weight',
+                 'start_weight', 'target_weight', 'fade_time', 'progress')
+
+    def __init__(self, name, size, weight=0.0):
+        import numpy as np # Deferred until a model is bound, not at startup
+        self.name = name
+        self.values = np.zeros(size, dtype=np.float32)
+        # Per-parameter masks (1.0 where this layer drives the parameter)
+        self.overwrite = np.zeros(size, dtype=np.float32)
+        self.add = np.zeros(size, dtype=np.float32)
+        self.multiply = np.zeros(size, dtype=np.float32)
+        self.weight = weight
+        self.start_weight = weight
+        self.target_weight = weight
+        self.fade_time = 0.0
+        self.progress = 1.0
+
+    def fade_to(self, weight, fade_time):
+        self.start_weight = self.weight
+        self.target_weight = weight
+        self.fade_time = fade_time
+        self.progress = 0.0 if fade_time > 0 else 1.0
+        if self.progress >= 1.0:
+            self.weight = weight
+
+    def advance(self, dt):
+        if self.progress >= 1.0:
+            return
+        self.progress = min(1.0, self.progress + dt / self.fade_time)
+        self.weight = self.start_weight + (self.target_weight - self.start_weight) * ease_in_out(self.progress)
+
+    def is_fading(self):
+        return self.progress < 1.0
+
+class ParamBlender:
+    """
+    Combines parameter layers into one vector per frame and writes it to the
+    model in a single pass. Parameter IDs are resolved to indices once, when a
+    model is bound; per-frame work is array math plus one call per driven
+    parameter.
+
+    Overwrite layers compose like repeated SetParameterValue(id, v, w) calls,
+    so the result still blends with what the model's own Update() produced
+    (motions, breathing, look-at via Drag, physics inputs).
+    """
+    def __init__(self, fade_time=0.3):
+        self.fade_time = fade_time
+        self.model = None
+        self.ids = []
+        self.index = {}
+        self.defaults = None
+        self.layers = []
+        self.expression = None
+        self.fading_out = []
+        self.lip_sync = None
+        self.mouth_index = None
+        self.expression_table = dict(DEFAULT_EMOTIONS)
+        self._set_index = None
+        self._add_index = None
+
+    def bind(self, model, expressions=None):
+        # Resolve parameter IDs for a freshly loaded model.
+        # expressions: {name: params} from load_model_expressions()
+        self.model = model
+        self.ids = self._read_parameter_ids(model)
+        self.index = {param_id: i for i, param_id in enumerate(self.ids)}
+        self.defaults = self._read_defaults(model, len(self.ids))
+        self._set_index = getattr(model, 'SetIndexParamValue', None)
+        self._add_index = getattr(model, 'AddIndexParamValue', None)
+
+        self.expression_table = dict(DEFAULT_EMOTIONS)
+        if expressions:
+            # Model expressions replace built-ins with the same (case-insensitive) name
+            by_lower = {name.lower(): name for name in self.expression_table}
+            for name, params in expressions.items():
+                self.expression_table.pop(by_lower.get(name.lower()), None)
+                self.expression_table[name] = params
+            print(f"Loaded {len(expressions)} expressions from model: {', '.join(expressions)}")
+
+        size = len(self.ids)
+        self.mouth_index = self.index.get("ParamMouthOpenY")
+        self.lip_sync = ParamLayer("lip_sync", size, weight=1.0)
+        self._set_targets(self.lip_sync, {"ParamMouthOpenY": (0.0, OVERWRITE)})
+        self.expression = None
+        self.fading_out = []
+        self.layers = [self.lip_sync]
+        print(f"Parameter blender bound to {size} parameters")
+
+    def unbind(self):
+        self.model = None
+        self.layers = []
+        self.expression = None
+        self.fading_out = []
+        self.lip_sync = None
+
+    def _read_parameter_ids(self, model):
+        if hasattr(model, 'GetParamIds'):
+            return list(model.GetParamIds())
+        return [model.GetParameter(i).id for i in range(model.GetParameterCount())]
+
+    def _read_defaults(self, model, size):
+        import numpy as np
+        defaults = np.zeros(size, dtype=np.float32)
+        if hasattr(model, 'GetParameter'):
+            try:
+                for i in range(size):
+                    defaults[i] = model.GetParameter(i).default
+            except Exception:
+                pass
+        return defaults
+
+    def _set_targets(self, layer, params):
+        # params: {param_id: value} or {param_id: (value, blend)}
+        for param_id, target in params.items():
+            i = self.index.get(param_id)
+            if i is None:
+                continue
+            value, blend = target if isinstance(target, tuple) else (target, OVERWRITE)
+            layer.values[i] = value
+            if blend == ADD:
+                layer.add[i] = 1.0
+            elif blend == MULTIPLY:
+                layer.multiply[i] = 1.0
+            else:
+                layer.overwrite[i] = 1.0
+
+    def has_expression(self, name):
+        return name in self.expression_table
+
+    def set_expression(self, name):
+        # Cross-fade from the current expression to `name` ("Neutral" = none)
+        if self.model is None:
+            return
+        if self.expression is not None:
+            self.expression.fade_to(0.0, self.fade_time)
+            self.fading_out.append(self.expression)
+            self.expression = None
+
+        params = self.expression_table.get(name, {})
+        if params:
+            layer = ParamLayer(name, len(self.ids))
+            self._set_targets(layer, params)
+            layer.fade_to(1.0, self.fade_time)
+            self.expression = layer
+
+        self.layers = [l for l in self.fading_out + [self.expression, self.lip_sync] if l is not None]
+
+    def set_lip_sync(self, value):
+        if self.lip_sync is not None and self.mouth_index is not None:
+            self.lip_sync.values[self.mouth_index] = value
+
+    def is_transitioning(self):
+        return any(layer.is_fading() for layer in self.layers)
+
+    def advance(self, dt):
+        for layer in self.layers:
+            layer.advance(dt)
+        if self.fading_out:
+            finished = [l for l in self.fading_out if not l.is_fading()]
+            if finished:
+                self.fading_out = [l for l in self.fading_out if l.is_fading()]
+                self.layers = [l for l in self.layers if l not in finished]
+
+    def combine(self):
+        # Returns (indices, target, weight, add) for the parameters driven this frame
+        import numpy as np
+        size = len(self.ids)
+        keep = np.ones(size, dtype=np.float32)    # Share of the model's own value kept
+        target = np.zeros(size, dtype=np.float32) # Weighted overwrite contribution
+        add = np.zeros(size, dtype=np.float32)
+        for layer in self.layers:
+            if layer.weight <= 0.0:
+                continue
+            w = layer.overwrite * layer.weight
+            target = target * (1.0 - w) + layer.values * w
+            keep *= 1.0 - w
+            add += layer.values * layer.add * layer.weight
+            # Multiply needs the live value; approximate around the default
+            add += self.defaults * (layer.values - 1.0) * layer.multiply * layer.weight
+
+        weight = 1.0 - keep
+        indices = np.flatnonzero((weight > 1e-4) | (add != 0.0))
+        safe = np.where(weight > 1e-4, weight, 1.0)
+        return indices, target / safe, weight, add
+
+    def apply(self, dt):
+        # Advance fades and write the combined layers to the model
+        if self.model is None or not self.layers:
+            return
+        self.advance(dt)
+        indices, target, weight, add = self.combine()
+        model = self.model
+        set_index = self._set_index
+        add_index = self._add_index
+        ids = self.ids
+        for i in indices.tolist():
+            w = float(weight[i])
+            if w > 1e-4:
+                if set_index:
+                    set_index(i, float(target[i]), w)
+                else:
+                    model.SetParameterValue(ids[i], float(target[i]), w)
+            a = float(add[i])
+            if a != 0.0:
+                if add_index:
+                    add_index(i, a)
+                else:
+                    model.AddParameterValue(ids[i], a)
@@ -0,0 +1,198 @@
+"""
+Offscreen render benchmark.
+
+Renders Live2DManager into a framebuffer for a fixed number of frames with
+scripted cursor, lip-sync and expression input, then reports frame time
+percentiles and CPU time per phase. Needs no window or GPU; on a headless
+box use Qt's offscreen platform with a software GL (Mesa llvmpipe):
+
+    python -m app.render_benchmark --frames 600 --software
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+EXPRESSION_CYCLE = ["Joy", "Surprise", "Anger", "Neutral"]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * pct / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+def scripted_input(frame, width, height, dt):
+    # Cursor sweeping a Lissajous curve, and talking for 2s out of every 4
+    t = frame * dt
+    mx = width / 2 + width * 0.4 * math.sin(2 * math.pi * 0.5 * t)
+    my = height / 2 + height * 0.3 * math.sin(2 * math.pi * 0.3 * t)
+    lip = max(0.0, math.sin(2 * math.pi * 4 * t)) if t % 4.0 < 2.0 else 0.0
+    return mx, my, lip
+
+def create_context(width, height):
+    from PySide6.QtGui import QOpenGLContext, QOffscreenSurface, QSurfaceFormat # type: ignore
+    from PySide6.QtOpenGL import QOpenGLFramebufferObject # type: ignore
+
+    # Compatibility profile: the mock renderer uses fixed-function GL
+    fmt = QSurfaceFormat()
+    fmt.setProfile(QSurfaceFormat.CompatibilityProfile)
+    fmt.setAlphaBufferSize(8)
+
+    context = QOpenGLContext()
+    context.setFormat(fmt)
+    if not context.create():
+        raise RuntimeError("Could not create an OpenGL context (try --software, or run under xvfb-run)")
+    surface = QOffscreenSurface()
+    surface.setFormat(context.format())
+    surface.create()
+    if not context.makeCurrent(surface):
+        raise RuntimeError("Could not make the OpenGL context current")
+
+    fbo = QOpenGLFramebufferObject(width, height, QOpenGLFramebufferObject.CombinedDepthStencil)
+    fbo.bind()
+    return context, surface, fbo
+
+def run(config, frames, warmup, width, height, mock, expression_every):
+    from OpenGL.GL import ( # type: ignore
+        glViewport, glClearColor, glClear, glEnable, glBlendFunc, glFinish, glGetString,
+        GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_BLEND, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_RENDERER
+    )
+    from app.live2d_manager import Live2DManager
+    from app.frame_profiler import FrameProfiler
+
+    context, surface, fbo = create_context(width, height)
+
+    config['window']['width'] = width
+    config['window']['height'] = height
+    config['render']['random_look'] = False
+    config['render']['look_at_mouse'] = True
+
+    manager = Live2DManager(config)
+    if mock:
+        manager.has_live2d = False
+    # CPU time per phase, independent of how long the GPU takes
+    profiler = FrameProfiler(capacity=frames, enabled=True, clock=time.thread_time)
+    manager.profiler = profiler
+
+    glViewport(0, 0, width, height)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    manager.init_gl()
+    manager.resize(width, height)
+
+    # Wait for the background model load to finish
+    deadline = time.monotonic() + 60.0
+    while manager.loading and time.monotonic() < deadline:
+        manager.finish_pending_load()
+        time.sleep(0.01)
+    if manager.has_live2d and not manager.model:
+        print("Model failed to load; benchmarking the mock renderer")
+        manager.has_live2d = False
+    mode = "live2d" if manager.has_live2d else "mock"
+
+    dt = 1.0 / config['render'].get('fps', 60)
+    frame_ms = []
+    cpu_ms = []
+    for i in range(warmup + frames):
+        if i == warmup:
+            profiler.clear()
+        if expression_every and i % expression_every == 0:
+            manager.set_expression(EXPRESSION_CYCLE[(i // expression_every) % len(EXPRESSION_CYCLE)])
+        mx, my, lip = scripted_input(i, width, height, dt)
+        manager.set_lip_sync(lip)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        profiler.begin_frame(dt)
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        manager.update(mx, my, dt)
+        phase_start = profiler.start()
+        manager.draw()
+        glFinish() # Count the GPU (or software rasteriser) work in the frame
+        profiler.stop('draw', phase_start)
+        profiler.end_frame()
+
+        if i >= warmup:
+            frame_ms.append((time.perf_counter() - wall_start) * 1000.0)
+            cpu_ms.append((time.thread_time() - cpu_start) * 1000.0)
+
+    renderer = glGetString(GL_RENDERER)
+    summary = profiler.summary() or {'phase_ms': {}}
+    fbo.release()
+    context.doneCurrent()
+
+    return {
+        'mode': mode,
+        'gl_renderer': renderer.decode() if isinstance(renderer, bytes) else str(renderer),
+        'frames': frames,
+        'size': [width, height],
+        'frame_ms': {
+            'p50': percentile(frame_ms, 50),
+            'p90': percentile(frame_ms, 90),
+            'p99': percentile(frame_ms, 99),
+            'max': max(frame_ms) if frame_ms else 0.0,
+            'mean': sum(frame_ms) / len(frame_ms) if frame_ms else 0.0,
+        },
+        'cpu_ms_per_frame': sum(cpu_ms) / len(cpu_ms) if cpu_ms else 0.0,
+        'cpu_phase_ms': summary['phase_ms'],
+    }
+
+def print_report(result):
+    f = result['frame_ms']
+    print(f"Render benchmark: {result['frames']} frames at {result['size'][0]}x{result['size'][1]} "
+          f"({result['mode']}, {result['gl_renderer']})")
+    print(f"  frame ms   p50 {f['p50']:.2f}  p90 {f['p90']:.2f}  p99 {f['p99']:.2f}  max {f['max']:.2f}  mean {f['mean']:.2f}")
+    print(f"  CPU ms/frame {result['cpu_ms_per_frame']:.2f}")
+    for name, ms in result['cpu_phase_ms'].items():
+        print(f"    {name:<12} {ms:.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offscreen Live2D render benchmark")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=60)
+    parser.add_argument('--width', type=int, default=None)
+    parser.add_argument('--height', type=int, default=None)
+    parser.add_argument('--mock', action='store_true', help="Benchmark the mock renderer even if live2d is installed")
+    parser.add_argument('--expression-every', type=int, default=90, help="Frames between expression changes (0 = never)")
+    parser.add_argument('--software', action='store_true', help="Force software OpenGL")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--budget-ms', type=float, help="Exit with status 1 if p99 frame time exceeds this")
+    args = parser.parse_args(argv)
+
+    # No window is ever shown, so default to Qt's offscreen platform
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    if args.software:
+        os.environ['LIBGL_ALWAYS_SOFTWARE'] = '1' # Mesa llvmpipe
+        os.environ['QT_OPENGL'] = 'software'      # opengl32sw on Windows
+
+    from PySide6.QtGui import QGuiApplication # type: ignore
+    from app.main import load_config
+    app = QGuiApplication(sys.argv[:1])
+
+    config = load_config()
+    width = args.width or config['window']['width']
+    height = args.height or config['window']['height']
+    try:
+        result = run(config, args.frames, args.warmup, width, height, args.mock, args.expression_every)
+    except RuntimeError as e:
+        print(f"Render benchmark failed: {e}")
+        return 2
+
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=4)
+    if args.budget_ms is not None:
+        over = result['frame_ms']['p99'] > args.budget_ms
+        print(f"Frame budget check: p99 {result['frame_ms']['p99']:.2f} ms against {args.budget_ms:.2f} ms -> {'FAIL' if over else 'OK'}")
+        return 1 if over else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
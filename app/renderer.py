@@ -1,12 +1,62 @@
 from PySide6.QtOpenGLWidgets import QOpenGLWidget # type: ignore
+from PySide6.QtWidgets import QWidget # type: ignore
 from PySide6.QtCore import QTimer, Qt, QRect, Signal, QPoint # type: ignore
-from PySide6.QtGui import QCursor, QPainter, QPen, QColor, QFont, QFontDatabase, QFontMetrics # type: ignore
+from PySide6.QtGui import QCursor, QPainter, QPen, QColor, QFont, QFontDatabase, QFontMetrics, QRegion # type: ignore
 from OpenGL.GL import * # type: ignore
 from app.live2d_manager import Live2DManager
+from app.frame_governor import FrameGovernor, ACTIVE, PAUSED
+from app.frame_profiler import FrameProfiler, PHASES
+from app.chat_bubble import ChatBubble
+from app.silhouette import SilhouetteSampler, mask_runs
 import os
+import math
+import time
+
+# While paused (window hidden/minimised) keep polling at this interval so we
+# notice when the window becomes visible again, without rendering anything
+PAUSED_POLL_MS = 250
+
+# When frames are paced by buffer swaps, the timer only samples activity
+SAMPLE_INTERVAL_MS = 50
+
+# Longest frame delta fed to animation, so a stall or a resumed pause
+# doesn't make everything jump
+MAX_FRAME_DELTA = 0.1
+
+# Performance overlay colors, one per profiler phase
+PHASE_COLORS = {
+    'drag': QColor(80, 160, 255),
+    'model_update': QColor(255, 170, 60),
+    'expressions': QColor(200, 90, 255),
+    'draw': QColor(90, 220, 120),
+    'overlay': QColor(255, 90, 90),
+}
+PROFILER_PANEL = QRect(10, 10, 260, 130)
+
+class OverlayLayer(QWidget):
+    """
+    Transparent child widget stacked over the GL view for the chat bubble,
+    status text and borders. Repainting it reuses the last rendered model
+    frame instead of running paintGL again.
+    """
+    def __init__(self, renderer):
+        super().__init__(renderer)
+        self.renderer = renderer
+        self.setAttribute(Qt.WA_TransparentForMouseEvents) # Clicks/drags go to the renderer
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAutoFillBackground(False)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.renderer.paint_overlay(painter)
+        painter.end()
 
 class RendererWidget(QOpenGLWidget):
     chat_position_changed = Signal(int, int)
+    first_frame_drawn = Signal()
+    silhouette_changed = Signal(object) # QRegion, or None for the whole window
 
     def __init__(self, config):
         super().__init__()
@@ -14,7 +64,6 @@ class RendererWidget(QOpenGLWidget):
         self.show_border = False
         self.chat_text = ""
         self.full_chat_text = ""
-        self.displayed_chat_text = ""
         self.status_text = ""
         self.chat_timer = QTimer()
         self.chat_timer.setSingleShot(True)
@@ -25,11 +74,38 @@ class RendererWidget(QOpenGLWidget):
         self.current_char_index = 0
         
         self.live2d_manager = Live2DManager(self.config)
+
+        # Frame timing (toggle the graph with F7, export from the tray menu)
+        self.profiler = FrameProfiler(enabled=config['render'].get('profiler', False))
+        self.live2d_manager.profiler = self.profiler
+        self.show_profiler = False
+        self.profiler_summary = None
+        self.profiler_summary_time = 0.0
+
+        # Frame rate follows activity: full rate while something moves, a low
+        # idle rate once settled, and no rendering while the window is hidden
+        render_config = config['render']
+        fps = render_config.get('fps', 60)
+        self.governor = FrameGovernor(
+            active_fps=fps,
+            idle_fps=render_config.get('idle_fps', 10),
+            settle_time=render_config.get('settle_time', 2.0),
+            enabled=render_config.get('adaptive_fps', True)
+        )
+        self.frame_state = self.governor.state
+        self.last_cursor_pos = QCursor.pos()
+
+        # At the full rate, frames are scheduled from frameSwapped so they land
+        # on vsync; the timer drives the idle rate and samples activity
+        self.vsync_paced = render_config.get('vsync', True)
+        self.last_frame_time = None
+        self.last_update_time = None
+        self.frameSwapped.connect(self.on_frame_swapped)
+
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update) # Trigger paintGL
-        
-        fps = config['render'].get('fps', 60)
-        self.timer.start(1000 // fps)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.on_frame_timer)
+        self.timer.start(self.timer_interval())
         
         # Chat Settings
         chat_config = config.get('chat', {})
@@ -55,6 +131,10 @@ class RendererWidget(QOpenGLWidget):
         
         self.chat_font = QFont(self.font_family, self.chat_font_size)
         self.status_font = QFont("Segoe UI", 12, QFont.Bold)
+
+        # Laid out and rendered once per text/style change
+        self.chat_bubble = ChatBubble()
+        self.chat_bubble.set_style(self.chat_font, self.chat_text_color, self.chat_bg_color)
         
         # Dragging state
         self.is_dragging_chat = False
@@ -62,6 +142,20 @@ class RendererWidget(QOpenGLWidget):
         self.drag_start_offset = QPoint()
         self.edit_mode = False
         self.preview_mode = False
+        self.first_frame_done = False
+
+        # Text and borders live on their own layer so typewriter ticks and
+        # status changes don't re-render the model
+        self.overlay = OverlayLayer(self)
+
+        # Silhouette: a low-rate alpha readback of the model, used as the
+        # window's shape and input mask so clicks on transparent pixels pass through
+        self.shape_to_model = config['window'].get('shape_to_model', False)
+        self.silhouette_interval = config['window'].get('shape_interval_ms', 200) / 1000.0
+        self.silhouette = None
+        self.last_silhouette_time = 0.0
+        self.model_region = None
+        self.silhouette_region = None
 
     def set_edit_mode(self, enabled):
         self.edit_mode = enabled
@@ -72,7 +166,7 @@ class RendererWidget(QOpenGLWidget):
                 self.clear_chat()
             else:
                 self.set_chat_text("Sample Text", duration=9999)
-        self.update()
+        self.update_overlay()
 
     def set_preview_mode(self, enabled):
         self.preview_mode = enabled
@@ -83,7 +177,7 @@ class RendererWidget(QOpenGLWidget):
         else:
             if not self.edit_mode:
                 self.clear_chat()
-        self.update()
+        self.update_overlay()
 
     def update_chat_settings(self, settings):
         self.chat_font_size = settings.get('font_size', 16)
@@ -94,13 +188,14 @@ class RendererWidget(QOpenGLWidget):
         self.chat_offset_x = settings.get('offset_x', 0)
         self.chat_offset_y = settings.get('offset_y', 0)
         self.chat_font = QFont(self.font_family, self.chat_font_size)
+        self.chat_bubble.set_style(self.chat_font, self.chat_text_color, self.chat_bg_color)
         self.typewriter_effect = settings.get('typewriter_effect', True)
         self.typewriter_speed = settings.get('typewriter_speed', 50)
-        self.update()
+        self.update_overlay()
 
     def set_chat_text(self, text, duration=10.0):
         self.full_chat_text = text
-        self.chat_text = text # Keep for compatibility if needed, but we use displayed_chat_text
+        self.chat_text = text # Keep for compatibility if needed, but we use full_chat_text
         
         # Ensure a minimum duration of 2 seconds, and add a small buffer
         # If typewriter is on, add time for typing
@@ -112,41 +207,131 @@ class RendererWidget(QOpenGLWidget):
         self.chat_timer.start(int(display_time * 1000)) 
         
         if self.typewriter_effect:
-            self.displayed_chat_text = ""
             self.current_char_index = 0
             self.typewriter_timer.start(self.typewriter_speed)
         else:
-            self.displayed_chat_text = text
+            self.current_char_index = len(text)
             self.typewriter_timer.stop()
             
-        self.update()
+        self.update_overlay()
+
+    def chat_origin(self):
+        # Top-left of the chat text area; the bubble is laid out relative to it
+        return QPoint(20 + self.chat_offset_x, 20 + self.chat_offset_y)
+
+    def prepare_chat_bubble(self):
+        # In edit mode keep a placeholder bubble so there is something to drag
+        text = self.full_chat_text
+        if not text and self.edit_mode:
+            text = "Drag me to position!"
+        self.chat_bubble.prepare(text, self.width() - 40, self.devicePixelRatioF())
 
     def update_typewriter(self):
+        # Only the reveal count changes; the bubble clips its cached text to it
         if self.current_char_index < len(self.full_chat_text):
             self.current_char_index += 1
-            self.displayed_chat_text = self.full_chat_text[:self.current_char_index]
-            self.update()
+            self.update_overlay()
         else:
             self.typewriter_timer.stop()
 
     def set_status_text(self, text):
         self.status_text = text
-        self.update()
+        self.update_overlay()
 
     def clear_chat(self):
         self.chat_text = ""
         self.full_chat_text = ""
-        self.displayed_chat_text = ""
+        self.current_char_index = 0
         self.typewriter_timer.stop()
-        self.update()
+        self.update_overlay()
 
     def set_lip_sync(self, value):
         if self.live2d_manager:
             self.live2d_manager.set_lip_sync(value)
+            if value > 0.0:
+                self.wake()
 
     def set_expression(self, emotion):
         if self.live2d_manager:
             self.live2d_manager.set_expression(emotion)
+            self.wake()
+
+    def on_frame_timer(self):
+        # Sample activity sources and let the governor pick the frame rate
+        cursor_pos = QCursor.pos()
+        if cursor_pos != self.last_cursor_pos and self.live2d_manager.look_at_mouse:
+            self.governor.note_activity()
+        self.last_cursor_pos = cursor_pos
+
+        if self.live2d_manager.is_animating():
+            self.governor.note_activity()
+
+        state = self.governor.choose_state(self.is_on_screen())
+        if state != self.frame_state:
+            self.apply_frame_state(state)
+
+        if state == PAUSED:
+            return
+        if self.swap_paced():
+            # Restart the swap chain if it stalled (e.g. a skipped paint)
+            period = 1.0 / self.governor.target_fps()
+            if self.last_frame_time is None or time.perf_counter() - self.last_frame_time > period * 3:
+                self.update()
+        else:
+            self.update() # Trigger paintGL
+
+    def swap_paced(self):
+        return self.vsync_paced and self.frame_state == ACTIVE
+
+    def timer_interval(self):
+        if self.swap_paced():
+            return SAMPLE_INTERVAL_MS
+        fps = self.governor.target_fps()
+        return round(1000 / fps) if fps > 0 else PAUSED_POLL_MS
+
+    def on_frame_swapped(self):
+        if not self.swap_paced():
+            return
+        # The swap waited for vblank. Render on the next one unless that would
+        # run faster than the target rate, in which case wait out the difference.
+        period = 1.0 / self.governor.target_fps()
+        refresh_rate = self.screen().refreshRate() if self.screen() else 60.0
+        refresh = 1.0 / max(1.0, refresh_rate)
+        elapsed = time.perf_counter() - self.last_frame_time if self.last_frame_time else period
+        remaining = period - elapsed - refresh / 2
+        if remaining <= 0:
+            self.update()
+        else:
+            QTimer.singleShot(int(remaining * 1000), self.update)
+
+    def wake(self):
+        # Boost to the full rate right away instead of waiting for the next idle tick
+        self.governor.note_activity()
+        if self.frame_state != self.governor.choose_state(self.is_on_screen()):
+            self.apply_frame_state(self.governor.state)
+            self.update()
+
+    def apply_frame_state(self, state):
+        self.frame_state = state
+        fps = self.governor.target_fps()
+        self.timer.setInterval(self.timer_interval())
+        if self.swap_paced():
+            self.update() # Start the swap chain
+        print(f"Renderer: {state} ({fps} fps target, {self.get_effective_fps():.0f} fps effective)")
+
+    def get_effective_fps(self):
+        return self.governor.effective_fps()
+
+    def is_on_screen(self):
+        window = self.window()
+        if not self.isVisible() or window.isMinimized():
+            return False
+        handle = window.windowHandle()
+        return handle is None or handle.isExposed()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.wake()
 
     def initializeGL(self):
         # Initialize OpenGL state
@@ -155,8 +340,12 @@ class RendererWidget(QOpenGLWidget):
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA) # type: ignore
         
         # Initialize Live2D GL context
+        self.live2d_manager.pixel_ratio = self.devicePixelRatioF()
         self.live2d_manager.init_gl()
 
+        if self.shape_to_model:
+            self.start_silhouette()
+
     def resizeGL(self, w, h):
         glViewport(0, 0, w, h) # type: ignore
         if self.live2d_manager:
@@ -178,39 +367,146 @@ class RendererWidget(QOpenGLWidget):
             # If we pass normalized (-1 to 1), it interprets them as pixels near (0,0) (Top-Left).
             mx = float(cursor_pos.x())
             my = float(cursor_pos.y())
+
+            # Animation advances by real elapsed time, not by frame count
+            now = time.perf_counter()
+            dt = min(now - self.last_update_time, MAX_FRAME_DELTA) if self.last_update_time else 0.0
+            self.last_update_time = now
             
-            self.live2d_manager.update(mx, my)
+            self.live2d_manager.update(mx, my, dt)
             
+            phase_start = self.profiler.start()
             self.live2d_manager.draw()
+            self.profiler.stop('draw', phase_start)
+
+        self.governor.note_frame()
+        self.sample_silhouette()
+
+        # Frames drawn while the model is still loading are empty; wait for
+        # one that shows it (or for the load to have failed)
+        manager = self.live2d_manager
+        if not self.first_frame_done and (manager is None or manager.model is not None or not manager.loading):
+            self.first_frame_done = True
+            self.first_frame_drawn.emit()
 
     def paintEvent(self, event):
+        self.last_frame_time = time.perf_counter()
+        target_fps = self.governor.target_fps()
+        self.profiler.begin_frame(1.0 / target_fps if target_fps > 0 else 0.0)
+
         # Call the default paintEvent which calls paintGL
         super().paintEvent(event)
+        self.profiler.end_frame()
+
+        if self.show_profiler:
+            self.overlay.update() # Keep the graph in step with the frames
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.overlay.setGeometry(self.rect())
+
+    def update_overlay(self):
+        # Repaint text/borders only; the model frame is reused as-is
+        self.overlay.update()
+        self.emit_silhouette()
+
+    def set_shape_to_model(self, enabled):
+        self.shape_to_model = enabled
+        self.makeCurrent()
+        if enabled:
+            self.start_silhouette()
+        else:
+            self.stop_silhouette()
+        self.doneCurrent()
+        self.wake()
+        self.update()
+
+    def start_silhouette(self):
+        # GL context must be current
+        if self.silhouette is not None:
+            return
+        try:
+            sampler = SilhouetteSampler()
+            sampler.init_gl()
+            self.silhouette = sampler
+            self.last_silhouette_time = 0.0
+        except Exception as e:
+            print(f"Window shaping unavailable: {e}")
+
+    def stop_silhouette(self):
+        # GL context must be current
+        if self.silhouette is not None:
+            self.silhouette.release()
+        self.silhouette = None
+        self.model_region = None
+        self.emit_silhouette()
+
+    def sample_silhouette(self):
+        sampler = self.silhouette
+        if sampler is None:
+            return
+        try:
+            alpha = sampler.collect() # Read started on an earlier frame
+            if alpha is not None:
+                self.update_model_region(alpha)
+            now = time.monotonic()
+            if now - self.last_silhouette_time >= self.silhouette_interval:
+                self.last_silhouette_time = now
+                ratio = self.devicePixelRatioF()
+                sampler.request(self.defaultFramebufferObject(), int(self.width() * ratio), int(self.height() * ratio))
+        except Exception as e:
+            print(f"Silhouette readback failed, window shaping disabled: {e}")
+            self.stop_silhouette()
+            message = "Window shaping disabled (see log)"
+            self.set_status_text(message)
+            QTimer.singleShot(5000, lambda: self.status_text == message and self.set_status_text(""))
+
+    def update_model_region(self, alpha):
+        # Mask cells -> widget coordinates (cells overlap by a pixel to avoid seams)
+        rows, cols = alpha.shape
+        cell_w = self.width() / cols
+        cell_h = self.height() / rows
+        rects = [
+            QRect(int(x * cell_w), int(y * cell_h), math.ceil(w * cell_w) + 1, math.ceil(cell_h) + 1)
+            for x, y, w in mask_runs(alpha)
+        ]
+        region = QRegion()
+        region.setRects(rects)
+        self.model_region = region
+        self.emit_silhouette()
+
+    def overlay_region(self):
+        # Areas the overlay layer draws into, which must stay visible too
+        region = QRegion()
+        self.prepare_chat_bubble()
+        if self.full_chat_text:
+            region = region.united(self.chat_bubble.rect_at(self.chat_origin()))
+        if self.status_text:
+            area = self.rect().adjusted(0, 0, -10, -10)
+            text_rect = QFontMetrics(self.status_font).boundingRect(area, Qt.AlignBottom | Qt.AlignRight, self.status_text)
+            region = region.united(text_rect.adjusted(-2, -2, 2, 2))
+        if self.show_profiler:
+            region = region.united(PROFILER_PANEL)
+        return region
+
+    def emit_silhouette(self):
+        # The whole window stays interactive while editing the chat position or resizing
+        if self.model_region is None or self.edit_mode or self.show_border:
+            region = None
+        else:
+            region = self.model_region.united(self.overlay_region())
+        previous = self.silhouette_region
+        if (region is None) != (previous is None) or (region is not None and region != previous):
+            self.silhouette_region = region
+            self.silhouette_changed.emit(region)
+
+    def paint_overlay(self, painter):
+        phase_start = self.profiler.start()
         
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Draw Chat Text
-        if self.displayed_chat_text or (self.typewriter_effect and self.full_chat_text):
-            painter.setFont(self.chat_font)
-            
-            # Calculate text rect
-            rect = self.rect().adjusted(20 + self.chat_offset_x, 20 + self.chat_offset_y, -20 + self.chat_offset_x, -20 + self.chat_offset_y)
-            flags = Qt.AlignTop | Qt.AlignHCenter | Qt.TextWordWrap
-            
-            # Draw background bubble
-            # Measure text - Use full text for stable bubble size
-            text_to_measure = self.full_chat_text if self.full_chat_text else self.displayed_chat_text
-            bounding_rect = painter.boundingRect(rect, flags, text_to_measure)
-            bounding_rect.adjust(-10, -10, 10, 10) # Padding
-            
-            painter.setBrush(self.chat_bg_color) # Semi-transparent black
-            painter.setPen(Qt.NoPen)
-            painter.drawRoundedRect(bounding_rect, 10, 10)
-            
-            # Draw text - Use displayed text
-            painter.setPen(self.chat_text_color)
-            painter.drawText(rect, flags, self.displayed_chat_text)
+        # Draw Chat Text (cached bubble; re-laid out only when text/style/size change)
+        self.prepare_chat_bubble()
+        if self.full_chat_text:
+            self.chat_bubble.draw(painter, self.chat_origin(), self.current_char_index)
 
         # Draw Status Text (Listening/Thinking)
         if self.status_text:
@@ -221,11 +517,7 @@ class RendererWidget(QOpenGLWidget):
         # Draw Edit Mode Overlay
         if self.edit_mode:
             # Draw a dashed border around the chat area to indicate it's draggable
-            rect = self.rect().adjusted(20 + self.chat_offset_x, 20 + self.chat_offset_y, -20 + self.chat_offset_x, -20 + self.chat_offset_y)
-            flags = Qt.AlignTop | Qt.AlignHCenter | Qt.TextWordWrap
-            text_to_measure = self.full_chat_text if self.full_chat_text else "Drag me to position!"
-            bounding_rect = painter.boundingRect(rect, flags, text_to_measure)
-            bounding_rect.adjust(-10, -10, 10, 10)
+            bounding_rect = self.chat_bubble.rect_at(self.chat_origin())
             
             pen = QPen(QColor(255, 255, 0))
             pen.setStyle(Qt.DashLine)
@@ -253,26 +545,85 @@ class RendererWidget(QOpenGLWidget):
             painter.setPen(pen)
             painter.drawLine(rect.center().x(), rect.top(), rect.center().x(), rect.bottom())
             painter.drawLine(rect.left(), rect.center().y(), rect.right(), rect.center().y())
-            
-        painter.end()
+
+        self.profiler.stop('overlay', phase_start)
+
+        if self.show_profiler:
+            self.draw_profiler_overlay(painter)
+
+    def set_profiler_overlay(self, enabled):
+        self.show_profiler = enabled
+        # Recording follows the overlay unless it was switched on in config
+        if enabled or not self.config['render'].get('profiler', False):
+            self.profiler.set_enabled(enabled)
+        self.wake()
+        self.update_overlay()
+
+    def export_frame_trace(self, path):
+        self.profiler.export_trace(path)
+
+    def draw_profiler_overlay(self, painter):
+        # Stacked per-phase bars for recent frames, with the frame budget as a line
+        panel = PROFILER_PANEL
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 170))
+        painter.drawRect(panel)
+
+        frames = list(self.profiler.frames)[-panel.width():]
+        graph_bottom = panel.bottom() - 50
+        graph_height = 60
+        ms_scale = graph_height / 33.3 # Full height = two 60 Hz frames
+
+        target_fps = self.governor.target_fps()
+        if target_fps > 0:
+            budget_y = graph_bottom - int(1000.0 / target_fps * ms_scale)
+            painter.setPen(QPen(QColor(255, 255, 255, 120), 1, Qt.DashLine))
+            painter.drawLine(panel.left(), budget_y, panel.right(), budget_y)
+
+        painter.setPen(Qt.NoPen)
+        x = panel.left()
+        for frame in frames:
+            y = graph_bottom
+            for name, _, duration in frame.phases:
+                h = max(1, int(duration * 1000.0 * ms_scale))
+                painter.setBrush(PHASE_COLORS.get(name, QColor(200, 200, 200)))
+                painter.drawRect(x, y - h, 1, h)
+                y -= h
+            x += 1
+
+        # Text summary, recomputed a few times per second
+        now = time.monotonic()
+        if now - self.profiler_summary_time > 0.5:
+            self.profiler_summary = self.profiler.summary()
+            self.profiler_summary_time = now
+        summary = self.profiler_summary
+        painter.setFont(QFont("Consolas", 8))
+        painter.setPen(QColor(255, 255, 255))
+        if summary:
+            phase_text = "  ".join(f"{name} {summary['phase_ms'].get(name, 0.0):.2f}" for name in PHASES)
+            lines = [
+                phase_text,
+                f"frame {summary['frame_ms']:.2f} ms  jitter {summary['jitter_ms']:.2f} ms",
+                f"{self.get_effective_fps():.0f} fps ({self.frame_state})  dropped {summary['dropped_frames']}",
+            ]
+        else:
+            lines = ["Collecting frame timings..."]
+        text_y = graph_bottom + 4
+        for line in lines:
+            painter.drawText(QRect(panel.left() + 4, text_y, panel.width() - 8, 14), Qt.AlignLeft | Qt.AlignVCenter, line)
+            text_y += 14
 
     def reload_model(self):
         if self.live2d_manager:
             print("Reloading model...")
             self.live2d_manager.load_model()
+            self.wake() # Keep frames coming so the new model is picked up promptly
 
     def mousePressEvent(self, event):
         if self.edit_mode and event.button() == Qt.LeftButton:
             # Check if click is inside chat bubble
-            rect = self.rect().adjusted(20 + self.chat_offset_x, 20 + self.chat_offset_y, -20 + self.chat_offset_x, -20 + self.chat_offset_y)
-            flags = Qt.AlignTop | Qt.AlignHCenter | Qt.TextWordWrap
-            text_to_measure = self.full_chat_text if self.full_chat_text else "Drag me to position!"
-            
-            # We need a painter to measure accurately, or just approximate
-            # Since we don't have a painter here, let's use QFontMetrics
-            fm = QFontMetrics(self.chat_font)
-            bounding_rect = fm.boundingRect(rect, flags, text_to_measure)
-            bounding_rect.adjust(-10, -10, 10, 10)
+            self.prepare_chat_bubble()
+            bounding_rect = self.chat_bubble.rect_at(self.chat_origin())
             
             if bounding_rect.contains(event.pos()):
                 self.is_dragging_chat = True
@@ -288,7 +639,7 @@ class RendererWidget(QOpenGLWidget):
             delta = event.pos() - self.drag_start_pos
             self.chat_offset_x = self.drag_start_offset.x() + delta.x()
             self.chat_offset_y = self.drag_start_offset.y() + delta.y()
-            self.update()
+            self.update_overlay()
             self.chat_position_changed.emit(self.chat_offset_x, self.chat_offset_y)
             event.accept()
             return
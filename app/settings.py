@@ -1,9 +1,9 @@
 import os
 import json
+import time
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider, QCheckBox, QPushButton, QGroupBox, QSpinBox, QDoubleSpinBox, QTabWidget, QFrame, QLineEdit, QComboBox, QColorDialog, QFileDialog, QPlainTextEdit) # type: ignore
 from PySide6.QtCore import Qt, Signal # type: ignore
 from PySide6.QtGui import QIcon, QColor, QKeySequence, QKeyEvent # type: ignore
-from app.ai_manager import AIManager
 
 class SettingsWindow(QWidget):
     scale_changed = Signal(float)
@@ -36,11 +36,14 @@ class SettingsWindow(QWidget):
     minecraft_settings_changed = Signal()
     minecraft_connect_requested = Signal()
     minecraft_disconnect_requested = Signal()
+    input_devices_updated = Signal(list)
 
-    def __init__(self, config):
+    def __init__(self, config, device_inventory):
         super().__init__()
         self.config = config
+        self.device_inventory = device_inventory
         self.waiting_for_key = False
+        self.mc_status = "Disconnected"
         self.setWindowTitle("Yazuki Settings")
         
         # Set Window Icon
@@ -156,11 +159,47 @@ class SettingsWindow(QWidget):
         
         # Tabs
         self.tabs = QTabWidget()
-        self.tabs.currentChanged.connect(self.on_tab_changed)
         main_layout.addWidget(self.tabs)
         
-        # --- Tab 1: Appearance ---
-        tab_appearance = QWidget()
+        # Tabs are built the first time they are shown (see ensure_tab_built);
+        # most sessions never open settings, so only the empty pages exist here.
+        self.tab_builders = [
+            ("Appearance", self.build_appearance_tab),
+            ("Behavior", self.build_behavior_tab),
+            ("Window", self.build_window_tab),
+            ("Input", self.build_input_tab),
+            ("Chat", self.init_chat_tab),
+            ("AI", self.build_ai_tab),
+            ("Personality", self.build_personality_tab),
+            ("TTS", self.build_tts_tab),
+            ("Minecraft", self.build_minecraft_tab),
+        ]
+        self.built_tabs = set()
+        self.tab_build_stats = {}
+        for title, builder in self.tab_builders:
+            self.tabs.addTab(QWidget(), title)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+        # --- Bottom Actions ---
+        action_layout = QHBoxLayout()
+        
+        btn_reload = QPushButton("Reload Model")
+        btn_reload.clicked.connect(self.reload_requested.emit)
+        action_layout.addWidget(btn_reload)
+        
+        btn_save = QPushButton("Save Settings")
+        btn_save.clicked.connect(self.save_requested.emit)
+        action_layout.addWidget(btn_save)
+        
+        btn_quit = QPushButton("Quit Application")
+        btn_quit.setStyleSheet("background-color: #d32f2f; color: white;") # Red color for quit
+        btn_quit.clicked.connect(self.quit_requested.emit)
+        action_layout.addWidget(btn_quit)
+        
+        main_layout.addLayout(action_layout)
+
+    def build_appearance_tab(self, tab_appearance):
+        config = self.config
         layout_appearance = QVBoxLayout(tab_appearance)
         
         # Model Selection
@@ -235,10 +274,9 @@ class SettingsWindow(QWidget):
         
         layout_appearance.addWidget(group_scale)
         layout_appearance.addStretch()
-        self.tabs.addTab(tab_appearance, "Appearance")
-        
-        # --- Tab 2: Behavior ---
-        tab_behavior = QWidget()
+
+    def build_behavior_tab(self, tab_behavior):
+        config = self.config
         layout_behavior = QVBoxLayout(tab_behavior)
         
         group_tracking = QGroupBox("Eye Tracking")
@@ -328,10 +366,9 @@ class SettingsWindow(QWidget):
         layout_behavior.addWidget(group_lipsync)
         
         layout_behavior.addStretch()
-        self.tabs.addTab(tab_behavior, "Behavior")
-        
-        # --- Tab 3: Window ---
-        tab_window = QWidget()
+
+    def build_window_tab(self, tab_window):
+        config = self.config
         layout_window = QVBoxLayout(tab_window)
         
         group_window = QGroupBox("Window Properties")
@@ -378,33 +415,29 @@ class SettingsWindow(QWidget):
         layout_window.addWidget(group_size)
         
         layout_window.addStretch()
-        self.tabs.addTab(tab_window, "Window")
 
-        # --- Tab 4: Input ---
-        tab_input = QWidget()
+    def build_input_tab(self, tab_input):
+        config = self.config
         layout_input = QVBoxLayout(tab_input)
         
         group_input = QGroupBox("Audio Input")
         layout_group_input = QVBoxLayout(group_input)
         
         layout_group_input.addWidget(QLabel("Microphone Device:"))
+        device_layout = QHBoxLayout()
         self.combo_input_device = QComboBox()
         self.combo_input_device.addItem("Default", -1)
-        
-        # Populate devices
-        self.ai_manager = AIManager(config) # Temp instance to list devices
-        devices = self.ai_manager.get_input_devices()
-        for idx, name in devices:
-            self.combo_input_device.addItem(name, idx)
-            
-        # Set current selection
-        current_device = config.get('ai', {}).get('input_device', -1)
-        index = self.combo_input_device.findData(current_device)
-        if index >= 0:
-            self.combo_input_device.setCurrentIndex(index)
-            
         self.combo_input_device.currentIndexChanged.connect(self.on_input_device_changed)
-        layout_group_input.addWidget(self.combo_input_device)
+        device_layout.addWidget(self.combo_input_device, 1)
+
+        btn_refresh_devices = QPushButton("Refresh")
+        btn_refresh_devices.clicked.connect(lambda: self.device_inventory.refresh(rescan=True))
+        device_layout.addWidget(btn_refresh_devices)
+        layout_group_input.addLayout(device_layout)
+
+        # Populate devices once the inventory has enumerated them (background thread)
+        self.input_devices_updated.connect(self.populate_input_devices)
+        self.device_inventory.add_listener(self.input_devices_updated.emit)
         
         layout_input.addWidget(group_input)
 
@@ -426,15 +459,9 @@ class SettingsWindow(QWidget):
         layout_input.addWidget(group_keybind)
         
         layout_input.addStretch()
-        self.tabs.addTab(tab_input, "Input")
 
-        # --- Tab 5: Chat ---
-        tab_chat = QWidget()
-        self.init_chat_tab(tab_chat)
-        self.tabs.addTab(tab_chat, "Chat")
-
-        # --- Tab 6: AI ---
-        tab_ai = QWidget()
+    def build_ai_tab(self, tab_ai):
+        config = self.config
         layout_ai = QVBoxLayout(tab_ai)
         
         # Global AI Toggle
@@ -522,10 +549,9 @@ class SettingsWindow(QWidget):
         self.update_ai_ui_state(self.chk_ai_enabled.isChecked())
         
         layout_ai.addStretch()
-        self.tabs.addTab(tab_ai, "AI")
 
-        # --- Tab 7: Personality ---
-        tab_personality = QWidget()
+    def build_personality_tab(self, tab_personality):
+        config = self.config
         layout_personality_tab = QVBoxLayout(tab_personality)
 
         # Memory Control
@@ -597,10 +623,9 @@ class SettingsWindow(QWidget):
         layout_personality_tab.addWidget(self.group_emotions)
 
         layout_personality_tab.addStretch()
-        self.tabs.addTab(tab_personality, "Personality")
 
-        # --- Tab 8: TTS ---
-        tab_tts = QWidget()
+    def build_tts_tab(self, tab_tts):
+        config = self.config
         layout_tts = QVBoxLayout(tab_tts)
         
         # Enable TTS
@@ -836,15 +861,14 @@ class SettingsWindow(QWidget):
         self.update_tts_ui_state(self.chk_tts_enabled.isChecked())
         
         layout_tts.addStretch()
-        self.tabs.addTab(tab_tts, "TTS")
 
-        # --- Tab 9: Minecraft ---
-        tab_minecraft = QWidget()
+    def build_minecraft_tab(self, tab_minecraft):
+        config = self.config
         layout_minecraft = QVBoxLayout(tab_minecraft)
         
         # Status Label
-        self.lbl_mc_status = QLabel("Status: Disconnected")
-        self.lbl_mc_status.setStyleSheet("font-weight: bold; color: #666;")
+        self.lbl_mc_status = QLabel()
+        self.apply_minecraft_status()
         layout_minecraft.addWidget(self.lbl_mc_status)
         
         # Enable Minecraft Bot
@@ -940,25 +964,6 @@ class SettingsWindow(QWidget):
         layout_minecraft.addLayout(mc_controls_layout)
         
         layout_minecraft.addStretch()
-        self.tabs.addTab(tab_minecraft, "Minecraft")
-
-        # --- Bottom Actions ---
-        action_layout = QHBoxLayout()
-        
-        btn_reload = QPushButton("Reload Model")
-        btn_reload.clicked.connect(self.reload_requested.emit)
-        action_layout.addWidget(btn_reload)
-        
-        btn_save = QPushButton("Save Settings")
-        btn_save.clicked.connect(self.save_requested.emit)
-        action_layout.addWidget(btn_save)
-        
-        btn_quit = QPushButton("Quit Application")
-        btn_quit.setStyleSheet("background-color: #d32f2f; color: white;") # Red color for quit
-        btn_quit.clicked.connect(self.quit_requested.emit)
-        action_layout.addWidget(btn_quit)
-        
-        main_layout.addLayout(action_layout)
 
     def on_look_at_mouse_toggled(self, checked):
         self.look_at_mouse_toggled.emit(checked)
@@ -1113,6 +1118,13 @@ class SettingsWindow(QWidget):
         self.minecraft_settings_changed.emit()
 
     def update_minecraft_status(self, status):
+        # Remember the status so the Minecraft tab shows it when first built
+        self.mc_status = status
+        if self.is_tab_built("Minecraft"):
+            self.apply_minecraft_status()
+
+    def apply_minecraft_status(self):
+        status = self.mc_status
         self.lbl_mc_status.setText(f"Status: {status}")
         if status == "Connected":
             self.lbl_mc_status.setStyleSheet("font-weight: bold; color: green;")
@@ -1146,6 +1158,20 @@ class SettingsWindow(QWidget):
     def on_size_changed(self):
         self.window_size_changed.emit(self.spin_width.value(), self.spin_height.value())
 
+    def populate_input_devices(self, devices):
+        self.combo_input_device.blockSignals(True)
+        self.combo_input_device.clear()
+        self.combo_input_device.addItem("Default", -1)
+        for idx, name in devices:
+            self.combo_input_device.addItem(name, idx)
+
+        # Set current selection
+        current_device = self.config.get('ai', {}).get('input_device', -1)
+        index = self.combo_input_device.findData(current_device)
+        if index >= 0:
+            self.combo_input_device.setCurrentIndex(index)
+        self.combo_input_device.blockSignals(False)
+
     def on_input_device_changed(self, index):
         device_id = self.combo_input_device.currentData()
         self.config.setdefault('ai', {})['input_device'] = device_id
@@ -1162,6 +1188,8 @@ class SettingsWindow(QWidget):
         self.mouth_sensitivity_changed.emit(sens)
 
     def update_size_display(self, w, h):
+        if not self.is_tab_built("Window"):
+            return # Built from config on first show
         self.spin_width.blockSignals(True)
         self.spin_height.blockSignals(True)
         self.spin_width.setValue(w)
@@ -1171,6 +1199,8 @@ class SettingsWindow(QWidget):
 
     def update_state(self, click_through):
         # Update UI if state changes externally (e.g. F8)
+        if not self.is_tab_built("Window"):
+            return # Built from config on first show
         self.chk_click_through.blockSignals(True)
         self.chk_click_through.setChecked(click_through)
         self.chk_click_through.blockSignals(False)
@@ -1530,17 +1560,56 @@ class SettingsWindow(QWidget):
             self.btn_edit_pos.setStyleSheet("")
 
     def update_chat_position(self, x, y):
-        self.offset_x_spin.blockSignals(True)
-        self.offset_y_spin.blockSignals(True)
-        self.offset_x_spin.setValue(x)
-        self.offset_y_spin.setValue(y)
-        self.offset_x_spin.blockSignals(False)
-        self.offset_y_spin.blockSignals(False)
+        if self.is_tab_built("Chat"):
+            self.offset_x_spin.blockSignals(True)
+            self.offset_y_spin.blockSignals(True)
+            self.offset_x_spin.setValue(x)
+            self.offset_y_spin.setValue(y)
+            self.offset_x_spin.blockSignals(False)
+            self.offset_y_spin.blockSignals(False)
         # Update config
         self.config.setdefault('chat', {})['offset_x'] = x
         self.config.setdefault('chat', {})['offset_y'] = y
 
+    def is_tab_built(self, title):
+        return title in self.built_tabs
+
+    def ensure_tab_built(self, index):
+        if index < 0 or index >= len(self.tab_builders):
+            return
+        title, builder = self.tab_builders[index]
+        if title in self.built_tabs:
+            return
+
+        start = time.perf_counter()
+        builder(self.tabs.widget(index))
+        self.built_tabs.add(title)
+
+        # Record what building this tab cost; every tab never opened is
+        # startup time and widgets saved (see report_tab_build_stats)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        widget_count = len(self.tabs.widget(index).findChildren(QWidget))
+        self.tab_build_stats[title] = (elapsed_ms, widget_count)
+        print(f"Settings: built {title} tab in {elapsed_ms:.1f} ms ({widget_count} widgets)")
+
+    def build_all_tabs(self):
+        for index in range(len(self.tab_builders)):
+            self.ensure_tab_built(index)
+
+    def report_tab_build_stats(self):
+        total_ms = sum(ms for ms, _ in self.tab_build_stats.values())
+        total_widgets = sum(count for _, count in self.tab_build_stats.values())
+        for title, (ms, count) in self.tab_build_stats.items():
+            print(f"  {title:<12} {ms:7.1f} ms {count:5d} widgets")
+        print(f"  {'Total':<12} {total_ms:7.1f} ms {total_widgets:5d} widgets")
+        return total_ms, total_widgets
+
+    def showEvent(self, event):
+        self.ensure_tab_built(self.tabs.currentIndex())
+        super().showEvent(event)
+
     def on_tab_changed(self, index):
+        self.ensure_tab_built(index)
         # Chat tab is index 4 now
         # 0: Appearance, 1: Behavior, 2: Window, 3: Input, 4: Chat, 5: AI, 6: Personality, 7: TTS
         is_chat_tab = (index == 4)
@@ -0,0 +1,139 @@
+import ctypes
+from OpenGL.GL import ( # type: ignore
+    glGenFramebuffers, glDeleteFramebuffers, glBindFramebuffer, glFramebufferRenderbuffer,
+    glCheckFramebufferStatus, glBlitFramebuffer, glGenRenderbuffers, glDeleteRenderbuffers,
+    glBindRenderbuffer, glRenderbufferStorage, glGenBuffers, glDeleteBuffers, glBindBuffer,
+    glBufferData, glMapBuffer, glUnmapBuffer, glReadBuffer,
+    GL_FRAMEBUFFER, GL_READ_FRAMEBUFFER, GL_DRAW_FRAMEBUFFER, GL_RENDERBUFFER, GL_RGBA8,
+    GL_COLOR_ATTACHMENT0, GL_FRAMEBUFFER_COMPLETE, GL_COLOR_BUFFER_BIT, GL_LINEAR, GL_NEAREST,
+    GL_PIXEL_PACK_BUFFER, GL_STREAM_READ, GL_READ_ONLY, GL_RGBA, GL_UNSIGNED_BYTE
+)
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as raw_glReadPixels # type: ignore
+
+def attach_renderbuffer(fbo, renderbuffer, width, height):
+    # (Re)allocates a single-sample RGBA8 renderbuffer as the fbo's color buffer
+    glBindRenderbuffer(GL_RENDERBUFFER, renderbuffer)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+    glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+    glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, renderbuffer)
+    status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+    glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    if status != GL_FRAMEBUFFER_COMPLETE:
+        raise RuntimeError(f"Silhouette framebuffer incomplete (0x{int(status):x})")
+
+class SilhouetteSampler:
+    """
+    Downsampled alpha channel of the rendered frame.
+    request() resolves the frame into a single-sample framebuffer of the same
+    size (the window's own one is multisampled, and a scaled blit out of that
+    is an error), blits it into a small framebuffer and starts reading that
+    into a pixel buffer; collect() on a later frame maps the finished result,
+    so the GPU is never waited on. Needs GL 3.0 (framebuffer blit + PBO).
+    """
+    def __init__(self, downsample=8):
+        self.downsample = downsample
+        self.fbo = None
+        self.renderbuffer = None
+        self.resolve_fbo = None
+        self.resolve_renderbuffer = None
+        self.pbo = None
+        self.source_size = (0, 0)
+        self.size = (0, 0)
+        self.pending = False
+
+    def init_gl(self):
+        self.fbo = int(glGenFramebuffers(1))
+        self.renderbuffer = int(glGenRenderbuffers(1))
+        self.resolve_fbo = int(glGenFramebuffers(1))
+        self.resolve_renderbuffer = int(glGenRenderbuffers(1))
+        self.pbo = int(glGenBuffers(1))
+
+    def ensure_size(self, width, height):
+        # width/height: source framebuffer size in device pixels
+        if (width, height) == self.source_size:
+            return
+        self.source_size = (width, height)
+        self.size = (max(1, -(-width // self.downsample)), max(1, -(-height // self.downsample)))
+        self.pending = False
+        w, h = self.size
+        attach_renderbuffer(self.resolve_fbo, self.resolve_renderbuffer, width, height)
+        attach_renderbuffer(self.fbo, self.renderbuffer, w, h)
+
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbo)
+        glBufferData(GL_PIXEL_PACK_BUFFER, w * h * 4, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+    def request(self, source_fbo, width, height):
+        # Start an asynchronous read of the frame in `source_fbo`
+        self.ensure_size(width, height)
+        w, h = self.size
+        # Multisample resolve: same size, no filtering
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, source_fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.resolve_fbo)
+        glBlitFramebuffer(0, 0, width, height, 0, 0, width, height, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.resolve_fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.fbo)
+        glBlitFramebuffer(0, 0, width, height, 0, 0, w, h, GL_COLOR_BUFFER_BIT, GL_LINEAR)
+
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glReadBuffer(GL_COLOR_ATTACHMENT0)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbo)
+        raw_glReadPixels(0, 0, w, h, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, source_fbo)
+        self.pending = True
+
+    def collect(self):
+        # Alpha (rows top to bottom) from the last request(), or None
+        import numpy as np # Only needed once shaping is on
+        if not self.pending:
+            return None
+        self.pending = False
+        w, h = self.size
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbo)
+        try:
+            address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+            if not address:
+                return None
+            data = ctypes.string_at(address, w * h * 4)
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        finally:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        rgba = np.frombuffer(data, dtype=np.uint8).reshape(h, w, 4)
+        return rgba[::-1, :, 3] # GL rows start at the bottom
+
+    def release(self):
+        if self.fbo:
+            glDeleteFramebuffers(2, [self.fbo, self.resolve_fbo])
+            glDeleteRenderbuffers(2, [self.renderbuffer, self.resolve_renderbuffer])
+            glDeleteBuffers(1, [self.pbo])
+        self.fbo = self.renderbuffer = self.resolve_fbo = self.resolve_renderbuffer = self.pbo = None
+        self.source_size = self.size = (0, 0)
+        self.pending = False
+
+def mask_runs(alpha, threshold=8, margin=2):
+    # Horizontal runs (x, y, width) of cells at or above `threshold`, grown by
+    # `margin` cells so the mask still covers the model as it moves between samples
+    import numpy as np
+    solid = alpha >= threshold
+    for _ in range(margin):
+        grown = solid.copy()
+        grown[1:] |= solid[:-1]
+        grown[:-1] |= solid[1:]
+        grown[:, 1:] |= solid[:, :-1]
+        grown[:, :-1] |= solid[:, 1:]
+        solid = grown
+
+    rows, cols = solid.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = solid
+    edges = np.diff(padded, axis=1)
+    runs = []
+    for y in range(rows):
+        starts = np.flatnonzero(edges[y] == 1)
+        ends = np.flatnonzero(edges[y] == -1)
+        runs.extend((int(s), y, int(e - s)) for s, e in zip(starts, ends))
+    return runs
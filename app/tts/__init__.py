@@ -1,6 +1,5 @@
-from .typecast_client import TypecastClient
-from .gpt_sovits_client import GPTSovitsClient
-from .elevenlabs_client import ElevenLabsClient
+# Provider modules are imported on first use so that only the configured
+# backend (and its SDK) gets loaded.
 
 def get_tts_provider(config):
     # Check if TTS is enabled globally
@@ -13,8 +12,11 @@ def get_tts_provider(config):
     provider_type = config.get('tts', {}).get('provider', 'gpt_sovits')
     
     if provider_type == 'typecast':
+        from .typecast_client import TypecastClient
         return TypecastClient(config)
     elif provider_type == 'elevenlabs':
+        from .elevenlabs_client import ElevenLabsClient
         return ElevenLabsClient(config)
     else:
+        from .gpt_sovits_client import GPTSovitsClient
         return GPTSovitsClient(config)
@@ -2,20 +2,23 @@ import sys
 import ctypes
 from ctypes import wintypes
 import os
-import json
+import time
 import subprocess
 from PySide6.QtCore import Qt, QPoint, QSize, QTimer, Signal # type: ignore
-from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QSystemTrayIcon, QMenu, QSizeGrip # type: ignore
+from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QSystemTrayIcon, QMenu, QSizeGrip, QFileDialog # type: ignore
 from PySide6.QtGui import QKeyEvent, QIcon, QAction, QPainter, QPen, QColor # type: ignore
 from app.settings import SettingsWindow
 from app.ai_manager import AIManager
 from app.minecraft_manager import MinecraftManager
+from app.audio_devices import AudioDeviceInventory
+from app.config_store import ConfigStore
 
 # Windows API constants
 GWL_EXSTYLE = -20
 WS_EX_LAYERED = 0x00080000
 WS_EX_TRANSPARENT = 0x00000020
 WM_HOTKEY = 0x0312
+WM_DEVICECHANGE = 0x0219
 MOD_NONE = 0x0000
 VK_F8 = 0x77
 VK_F9 = 0x78
@@ -23,6 +26,23 @@ VK_V = 0x56
 HOTKEY_ID_F8 = 1
 HOTKEY_ID_F9 = 2
 
+# Quiet period before AI/TTS setting edits are applied, so typing into an
+# API key or endpoint field rebuilds the provider once instead of per keystroke
+SETTINGS_APPLY_DELAY_MS = 600
+
+CONFIG_PATH = 'config.json'
+
+# SettingsWindow signals that mean the config dict was edited
+SETTINGS_EDIT_SIGNALS = [
+    'scale_changed', 'offset_x_changed', 'offset_y_changed', 'click_through_toggled',
+    'always_on_top_toggled', 'look_at_mouse_toggled', 'random_look_toggled',
+    'random_interval_changed', 'random_radius_changed', 'sensitivity_changed',
+    'window_size_changed', 'reload_requested', 'ai_settings_changed', 'chat_settings_changed',
+    'input_key_changed', 'memory_enabled_toggled', 'ai_enabled_toggled', 'tts_settings_changed',
+    'mouth_sensitivity_changed', 'system_prompt_changed', 'emotions_enabled_toggled',
+    'minecraft_settings_changed',
+]
+
 class OverlayWindow(QMainWindow):
     ai_response_received = Signal(str, str, float)
     lip_sync_updated = Signal(float)
@@ -32,12 +52,27 @@ class OverlayWindow(QMainWindow):
         super().__init__()
         self.config = config
         self.renderer = renderer_widget
-        self.ai_manager = AIManager(config)
+
+        # Config persistence: atomic writes on a background thread.
+        # Worker threads can read self.config_store.snapshot().
+        self.config_store = ConfigStore(CONFIG_PATH, config)
+        self.config_store.autosave = config.get('autosave', False)
+        QApplication.instance().aboutToQuit.connect(self.config_store.close)
+        self.device_inventory = AudioDeviceInventory()
+        self.ai_manager = AIManager(config, self.device_inventory)
 
         # Connect AI signal
         self.ai_response_received.connect(self.on_ai_response)
         self.lip_sync_updated.connect(self.renderer.set_lip_sync)
+        self.renderer.silhouette_changed.connect(self.apply_silhouette)
+        self.silhouette_checked = False
         self.mc_response_ready.connect(self.handle_mc_response)
+
+        # Debounce for AI/TTS reconfiguration
+        self.ai_settings_timer = QTimer()
+        self.ai_settings_timer.setSingleShot(True)
+        self.ai_settings_timer.setInterval(SETTINGS_APPLY_DELAY_MS)
+        self.ai_settings_timer.timeout.connect(self.apply_ai_settings)
         
         # Window setup
         self.setWindowFlags(
@@ -76,8 +111,16 @@ class OverlayWindow(QMainWindow):
         # Apply initial click-through state
         self.update_click_through()
 
-        # Settings Window
-        self.settings_window = SettingsWindow(config)
+        # Settings Window (tabs are built lazily when first shown)
+        settings_start = time.perf_counter()
+        self.settings_window = SettingsWindow(config, self.device_inventory)
+        settings_ms = (time.perf_counter() - settings_start) * 1000.0
+        print(f"Settings window created in {settings_ms:.1f} ms")
+        if os.environ.get('YAZUKI_SETTINGS_PROFILE'):
+            # Build every tab now to show what lazy construction saves at startup
+            self.settings_window.build_all_tabs()
+            print("Settings tab construction deferred from startup:")
+            self.settings_window.report_tab_build_stats()
         self.settings_window.scale_changed.connect(self.on_scale_changed)
         self.settings_window.offset_x_changed.connect(self.on_offset_x_changed)
         self.settings_window.offset_y_changed.connect(self.on_offset_y_changed)
@@ -106,6 +149,7 @@ class OverlayWindow(QMainWindow):
         self.settings_window.chat_edit_mode_toggled.connect(self.renderer.set_edit_mode)
         self.settings_window.chat_tab_active_changed.connect(self.renderer.set_preview_mode)
         self.renderer.chat_position_changed.connect(self.settings_window.update_chat_position)
+        self.renderer.chat_position_changed.connect(self.on_settings_edited)
         
         # Minecraft Manager
         self.mc_manager = MinecraftManager(config)
@@ -117,6 +161,10 @@ class OverlayWindow(QMainWindow):
         self.settings_window.minecraft_connect_requested.connect(self.mc_manager.connect_to_server)
         self.settings_window.minecraft_disconnect_requested.connect(self.mc_manager.stop_bot)
 
+        # Connected last so the handlers above have updated the config first
+        for signal_name in SETTINGS_EDIT_SIGNALS:
+            getattr(self.settings_window, signal_name).connect(self.on_settings_edited)
+
         # System Tray Icon
         self.init_tray_icon()
         
@@ -165,9 +213,10 @@ class OverlayWindow(QMainWindow):
         owner = self.config.get('minecraft', {}).get('owner', '')
         
         if owner:
-            # Send voice command to Minecraft Manager
-            # The manager will send it to the bot, which has natural language processing
-            self.mc_manager.send_voice_command(owner, text)
+            # The bot matches the text against its commands. If the whole
+            # utterance was one, its reply is returned and the AI answers with
+            # that instead of generating a response.
+            return self.mc_manager.run_voice_command(owner, text)
         else:
             print("Minecraft Owner not set. Voice commands for Minecraft might not work.")
 
@@ -213,15 +262,19 @@ class OverlayWindow(QMainWindow):
 
         print(f"[Minecraft Chat] {username}: {message}")
         
-        # Construct prompt context
+        # Construct prompt context; the world state goes with this request
+        # only, so history doesn't pile up stale snapshots
         user_text = f"[Minecraft] {username}: {message}"
+        world = self.mc_manager.world_state.describe()
+        context = f"[Minecraft state: {world}]" if world else None
         
         # Process with AI
         # Use signal emit as callback to ensure thread safety
         self.ai_manager.process_text_input(
             user_text, 
             self.mc_response_ready.emit, 
-            self.lip_sync_updated.emit
+            self.lip_sync_updated.emit,
+            context
         )
 
     def on_ai_response(self, text, emotion, duration):
@@ -258,11 +311,26 @@ class OverlayWindow(QMainWindow):
         self.action_click_through.setChecked(self.click_through)
         self.action_click_through.triggered.connect(self.toggle_click_through)
         tray_menu.addAction(self.action_click_through)
+
+        self.action_shape = QAction("Shape to Model", self)
+        self.action_shape.setCheckable(True)
+        self.action_shape.setChecked(self.config['window'].get('shape_to_model', False))
+        self.action_shape.triggered.connect(self.set_shape_to_model)
+        tray_menu.addAction(self.action_shape)
         
         action_reload = QAction("Reload Model", self)
         action_reload.triggered.connect(self.reload_model)
         tray_menu.addAction(action_reload)
 
+        self.action_profiler = QAction("Performance Overlay (F7)", self)
+        self.action_profiler.setCheckable(True)
+        self.action_profiler.triggered.connect(self.set_profiler_overlay)
+        tray_menu.addAction(self.action_profiler)
+
+        action_export_trace = QAction("Export Frame Trace...", self)
+        action_export_trace.triggered.connect(self.export_frame_trace)
+        tray_menu.addAction(action_export_trace)
+
         action_settings = QAction("Settings", self)
         action_settings.triggered.connect(self.show_settings)
         tray_menu.addAction(action_settings)
@@ -298,6 +366,21 @@ class OverlayWindow(QMainWindow):
         if hasattr(self.renderer, 'reload_model'):
             self.renderer.reload_model()
 
+    def set_profiler_overlay(self, enabled):
+        self.action_profiler.setChecked(enabled)
+        self.renderer.set_profiler_overlay(enabled)
+
+    def export_frame_trace(self):
+        if not self.renderer.profiler.frames:
+            print("No frame timings recorded yet. Enable the performance overlay (F7) first.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(None, "Export Frame Trace", "frame_trace.json", "Trace Files (*.json)")
+        if file_path:
+            try:
+                self.renderer.export_frame_trace(file_path)
+            except Exception as e:
+                print(f"Failed to export frame trace: {e}")
+
     def show_settings(self):
         self.settings_window.show()
         self.settings_window.activateWindow()
@@ -327,7 +410,7 @@ class OverlayWindow(QMainWindow):
         # Pass state to renderer for drawing border
         if hasattr(self.renderer, 'show_border'):
             self.renderer.show_border = enabled
-            self.renderer.update() # Trigger repaint
+            self.renderer.update_overlay() # Trigger repaint
         
         if enabled:
             # Disable click-through when resizing
@@ -367,6 +450,26 @@ class OverlayWindow(QMainWindow):
         self.action_click_through.setChecked(enabled)
         self.config['window']['click_through'] = enabled
 
+    def set_shape_to_model(self, enabled):
+        self.config['window']['shape_to_model'] = enabled
+        self.renderer.set_shape_to_model(enabled)
+        self.on_settings_edited()
+
+    def apply_silhouette(self, region):
+        # Window shape and input mask follow the model (XShape on X11,
+        # SetWindowRgn on Windows); None restores the full rectangle
+        if region is None or region.isEmpty():
+            self.clearMask()
+            return
+        self.setMask(region)
+        if not self.silhouette_checked:
+            # Check once that the platform actually took the mask
+            self.silhouette_checked = True
+            if self.mask().isEmpty():
+                print("Window shaping: the window mask was not applied, clicks won't pass through")
+            else:
+                print(f"Window shaping active ({region.rectCount()} mask rects)")
+
     def set_always_on_top(self, enabled):
         flags = self.windowFlags()
         if enabled:
@@ -419,21 +522,18 @@ class OverlayWindow(QMainWindow):
         if self.ai_manager:
             self.ai_manager.set_emotions_enabled(enabled)
 
+    def on_settings_edited(self, *args):
+        # Schedules a write if autosave is on; the worker-thread snapshot
+        # follows on the next save
+        self.config_store.mark_dirty()
+
     def save_settings(self):
-        try:
-            # Update position in config before saving
-            self.config['window']['x'] = self.x()
-            self.config['window']['y'] = self.y()
-            
-            with open('config.json', 'w') as f:
-                json.dump(self.config, f, indent=4)
-            print("Settings saved to config.json")
-        except Exception as e:
-            print(f"Failed to save settings: {e}")
+        # Update position in config before saving
+        self.config['window']['x'] = self.x()
+        self.config['window']['y'] = self.y()
 
-    def update_ai_settings(self):
-        # Re-initialize client if key changed
-        self.ai_manager.setup_client()
+        # Written atomically on the store's thread; bursts are coalesced
+        self.config_store.save()
 
     def update_click_through(self):
         if sys.platform == "win32":
@@ -453,7 +553,9 @@ class OverlayWindow(QMainWindow):
             print(f"Click-through set to: {self.click_through}")
 
     def keyPressEvent(self, event: QKeyEvent):
-        if event.key() == Qt.Key_F8:
+        if event.key() == Qt.Key_F7:
+            self.set_profiler_overlay(not self.renderer.show_profiler)
+        elif event.key() == Qt.Key_F8:
             self.toggle_click_through()
         elif event.key() == Qt.Key_F9:
             self.reload_model()
@@ -487,9 +589,13 @@ class OverlayWindow(QMainWindow):
                 print("Failed to register F9 hotkey")
 
     def update_ai_settings(self):
-        # Re-setup AI manager clients with new config
+        # Coalesce bursts of edits; restarting the timer pushes the apply back
+        self.ai_settings_timer.start()
+
+    def apply_ai_settings(self):
+        # Rebuild only the clients whose settings changed.
         # We don't want to create a new instance because we'd lose history
-        self.ai_manager.setup_client()
+        self.ai_manager.apply_settings()
 
     def update_chat_settings(self, settings):
         self.config['chat'] = settings
@@ -520,6 +626,9 @@ class OverlayWindow(QMainWindow):
                 elif msg.wParam == HOTKEY_ID_F9:
                     self.reload_model()
                     return True, 0
+            elif msg.message == WM_DEVICECHANGE:
+                # Audio device plugged in or removed
+                self.device_inventory.device_changed()
         return super().nativeEvent(eventType, message)
 
     def closeEvent(self, event):
@@ -0,0 +1,92 @@
+import math
+import time
+
+class WorldState:
+    """
+    Latest Minecraft world state as streamed by the bot.
+    The bot sends a flat dict ('self.pos', 'players.<name>', 'entities.<id>',
+    'goal') once in full and then only changed or removed keys. Each delta
+    builds a new dict that replaces the old one, so readers on other threads
+    always see a complete state.
+    """
+    def __init__(self):
+        self.values = {}
+        self.seq = 0
+        self.updated_at = 0.0
+        self.deltas = 0
+        self.needs_sync = False
+
+    def apply(self, delta):
+        # Returns True when a delta was missed and a full snapshot should be
+        # requested; later deltas are dropped until it arrives
+        seq = delta.get('seq', 0)
+        if delta.get('full'):
+            values = {}
+        elif seq != self.seq + 1:
+            request = not self.needs_sync
+            self.needs_sync = True
+            return request
+        else:
+            values = dict(self.values)
+        values.update(delta.get('set', {}))
+        for key in delta.get('del', []):
+            values.pop(key, None)
+        self.values = values
+        self.seq = seq
+        self.updated_at = time.monotonic()
+        self.deltas += 1
+        self.needs_sync = False
+        return False
+
+    def clear(self):
+        self.values = {}
+        self.seq = 0
+        self.needs_sync = False
+
+    def snapshot(self):
+        # Nested view: {'self': {...}, 'players': {...}, 'entities': {...}, 'goal': ...}
+        state = {'self': {}, 'players': {}, 'entities': {}, 'goal': None}
+        for key, value in self.values.items():
+            group, _, name = key.partition('.')
+            if name and isinstance(state.get(group), dict):
+                state[group][name] = value
+            else:
+                state[key] = value
+        return state
+
+    def describe(self, max_items=5):
+        # One line for prompts, e.g. "At 12, 64, -30 (overworld), health 20/20..."
+        values = self.values
+        pos = values.get('self.pos')
+        if not pos:
+            return ""
+
+        def distance(other):
+            return math.dist(pos, other)
+
+        parts = [f"At {pos[0]:.0f}, {pos[1]:.0f}, {pos[2]:.0f}"]
+        dimension = values.get('self.dimension')
+        if dimension:
+            parts[0] += f" ({str(dimension).replace('minecraft:', '')})"
+        if values.get('self.health') is not None:
+            parts.append(f"health {values['self.health']:.0f}/20")
+        if values.get('self.food') is not None:
+            parts.append(f"food {values['self.food']:.0f}/20")
+        if values.get('goal'):
+            parts.append(f"currently {values['goal']}")
+
+        players = []
+        for key, value in values.items():
+            if key.startswith('players.'):
+                name = key[len('players.'):]
+                players.append((distance(value), f"{name} {distance(value):.0f}m") if value else (math.inf, name))
+        if players:
+            players.sort()
+            parts.append("players: " + ", ".join(label for _, label in players[:max_items]))
+
+        entities = sorted(
+            (distance(value[1:]), value[0]) for key, value in values.items() if key.startswith('entities.')
+        )
+        if entities:
+            parts.append("nearby: " + ", ".join(f"{name} {d:.0f}m" for d, name in entities[:max_items]))
+        return "; ".join(parts)